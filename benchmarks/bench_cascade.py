@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from cascade import build_cascade
+from inference import build_pool, ensemble_predict, load_fold_models, load_metadata
+from bench_storage import TRAINING_FILE, synthetic_final
+
+"""
+End-to-end scoring time of the cascade (cascade.py: tier one on every review, Pool and fold ensemble on the
+escalated ones) against the fold ensemble on every review, for a few agreement targets. Reports the fraction
+escalated and the agreement of the decisions with the full ensemble (overall, and recall / precision of its
+spam flags). The first tier is trained on the training CSV; the scored reviews are synthetic reviews built
+from its texts, or the training CSV itself with --data training.
+
+    python benchmarks/bench_cascade.py --rows 50000 --targets 0.8 0.9 0.95
+"""
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(n_rows, targets, data):
+    feature_order, cat_features, text_features, best_threshold = load_metadata()
+    models = load_fold_models()
+    df = pd.read_csv(TRAINING_FILE) if data == "training" else synthetic_final(n_rows)
+
+    def full():
+        return ensemble_predict(models, build_pool(df, feature_order, cat_features, text_features))
+
+    def cascaded(tier_one):
+        probabilities, decisions, escalate = tier_one.route(df)
+        if escalate.any():
+            scored = ensemble_predict(models, build_pool(df[escalate], feature_order, cat_features, text_features))
+            decisions[escalate] = scored >= best_threshold
+        return decisions.astype(bool), escalate
+
+    full_time, reference = timed(full)
+    reference_decisions = reference >= best_threshold
+    print(f"{len(df)} rows ({data}), full ensemble {full_time:.3f}s ({len(df) / full_time:,.0f} rows/s), "
+          f"{reference_decisions.mean():.2%} spam")
+    print(f"{'target':>7} {'OOF esc.':>8} {'escalated':>9} {'agreement':>9} {'recall':>7} {'precision':>9} "
+          f"{'seconds':>8} {'rows/s':>9} {'speedup':>8}")
+    for target in targets:
+        tier_one, _, _ = build_cascade(target_agreement=target)
+        seconds, (decisions, escalate) = timed(lambda: cascaded(tier_one))
+        agreement = (decisions == reference_decisions).mean()
+        recall = decisions[reference_decisions].mean() if reference_decisions.any() else 1.0
+        precision = reference_decisions[decisions].mean() if decisions.any() else 1.0
+        print(f"{target:7.2f} {tier_one.check['escalated']:8.1%} {escalate.mean():9.1%} {agreement:9.3%} "
+              f"{recall:7.1%} {precision:9.1%} {seconds:8.3f} {len(df) / seconds:9,.0f} {full_time / seconds:8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--targets", type=float, nargs="+", default=[0.8, 0.9, 0.95])
+    parser.add_argument("--data", choices=["synthetic", "training"], default="synthetic")
+    args = parser.parse_args()
+    main(args.rows, args.targets, args.data)
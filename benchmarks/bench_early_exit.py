@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from inference import adaptive_predict, build_pool, ensemble_predict, load_fold_models, load_metadata
+from bench_storage import TRAINING_FILE, synthetic_final
+
+"""
+Scoring throughput of the early exit (inference.adaptive_predict) against the full fold ensemble, with the
+mean number of folds evaluated per review and the share of decisions that match the full ensemble. Runs on
+synthetic reviews built from the training texts, or on the training CSV itself (--data training; the folds
+saw these rows, so their decisions are more confident than on new reviews).
+
+    python benchmarks/bench_early_exit.py --rows 100000 --margins 0.05 0.1 0.15 0.2
+"""
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(n_rows, margins, data, thread_count):
+    feature_order, cat_features, text_features, best_threshold = load_metadata()
+    models = load_fold_models()
+    df = pd.read_csv(TRAINING_FILE) if data == "training" else synthetic_final(n_rows)
+    pool = build_pool(df, feature_order, cat_features, text_features)
+
+    full_time, full = timed(lambda: ensemble_predict(models, pool, thread_count=thread_count))
+    full_decisions = full >= best_threshold
+    print(f"{len(df)} rows ({data}), {len(models)} folds, threshold {best_threshold:.3f}, "
+          f"{full_decisions.mean():.1%} spam")
+    print(f"{'setting':16} {'folds/row':>9} {'all folds':>9} {'agreement':>9} {'predict s':>10} {'rows/s':>10} "
+          f"{'speedup':>8}")
+    print(f"{'full ensemble':16} {len(models):9.2f} {1:9.1%} {1:9.1%} {full_time:10.3f} {len(df) / full_time:10,.0f} "
+          f"{1:8.2f}")
+
+    settings = [("bound", None)] + [("margin", m) for m in margins]
+    for rule, margin in settings:
+        kwargs = {"margin": margin} if margin is not None else {}
+        seconds, (probabilities, folds_used) = timed(
+            lambda: adaptive_predict(models, pool, best_threshold, rule, thread_count=thread_count, **kwargs))
+        agreement = ((probabilities >= best_threshold) == full_decisions).mean()
+        name = rule if margin is None else f"margin {margin}"
+        print(f"{name:16} {folds_used.mean():9.2f} {(folds_used == len(models)).mean():9.1%} {agreement:9.2%} "
+              f"{seconds:10.3f} {len(df) / seconds:10,.0f} {full_time / seconds:8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.05, 0.1, 0.15, 0.2, 0.3])
+    parser.add_argument("--data", choices=["synthetic", "training"], default="synthetic")
+    parser.add_argument("--thread-count", type=int, default=-1)
+    args = parser.parse_args()
+    main(args.rows, args.margins, args.data, args.thread_count)
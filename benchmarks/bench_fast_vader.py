@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from fast_vader import FastVader
+
+"""
+NLTK's SentimentIntensityAnalyzer against fast_vader: time to load the lexicon and texts per second on unique
+review texts drawn from the training CSV (no caching on either side). Asserts identical compound scores.
+"""
+
+TRAINING_FILE = os.path.join(ROOT, "training_data", "reviews_with_vader.csv")
+
+
+def main(n_rows, repeats):
+    texts = pd.read_csv(TRAINING_FILE)["text"].dropna().astype(str).unique()
+    rng = np.random.default_rng(0)
+    corpus = [f"{t} #{i}" for i, t in enumerate(rng.choice(texts, size=n_rows, replace=True))]
+
+    start = time.perf_counter()
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    sia = SentimentIntensityAnalyzer()
+    nltk_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = FastVader()
+    fast_load = time.perf_counter() - start
+
+    nltk_times, fast_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        expected = [sia.polarity_scores(t)["compound"] for t in corpus]
+        nltk_times.append(time.perf_counter() - start)
+
+        fast = FastVader()  # cold token cache every repeat
+        start = time.perf_counter()
+        scores = fast.score_batch(corpus)
+        fast_times.append(time.perf_counter() - start)
+
+    assert scores == expected
+    nltk_time, fast_time = min(nltk_times), min(fast_times)
+    print(f"{n_rows} unique texts, best of {repeats}")
+    print(f"  load : nltk {nltk_load * 1000:8.1f} ms   fast_vader {fast_load * 1000:8.1f} ms")
+    print(f"  nltk       : {n_rows / nltk_time:10.0f} texts/sec")
+    print(f"  fast_vader : {n_rows / fast_time:10.0f} texts/sec ({nltk_time / fast_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.repeats)
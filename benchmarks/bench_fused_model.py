@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from inference import MODEL_FOLDER, FUSED_MODEL_FILE, load_metadata, load_fold_models, load_fused_model, build_pool, ensemble_predict
+from export_ensemble import VALIDATION_FILE
+
+"""
+Load time and rows/sec of the exported fused model (model/ensemble_fused.joblib) against the fold models
+and the per-fold predict_proba loop used by run_inference. Rows are sampled (with replacement) from the
+training CSV. Run export_ensemble.py first.
+"""
+
+
+def time_call(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(n_rows, repeats):
+    if not os.path.exists(os.path.join(MODEL_FOLDER, FUSED_MODEL_FILE)):
+        sys.exit(f"No {FUSED_MODEL_FILE} in {MODEL_FOLDER}, run src/export_ensemble.py first.")
+
+    load_folds_time, (metadata, models) = time_call(lambda: (load_metadata(MODEL_FOLDER), load_fold_models(MODEL_FOLDER)), repeats)
+    load_fused_time, fused = time_call(lambda: load_fused_model(MODEL_FOLDER), repeats)
+    feature_order, cat_features, text_features, best_threshold = metadata
+
+    df = pd.read_csv(VALIDATION_FILE).sample(n=n_rows, replace=True, random_state=0).reset_index(drop=True)
+    pool = build_pool(df, feature_order, cat_features, text_features)
+
+    loop_time, reference = time_call(lambda: ensemble_predict(models, pool), repeats)
+    fused_time, fused_probs = time_call(lambda: fused.predict_proba(pool), repeats)
+
+    print(f"rows: {n_rows}, fused kind: {fused.kind}")
+    print(f"load folds    : {load_folds_time:.3f}s")
+    print(f"load fused    : {load_fused_time:.3f}s")
+    print(f"per-fold loop : {n_rows / loop_time:12.0f} rows/sec ({loop_time:.3f}s)")
+    print(f"fused         : {n_rows / fused_time:12.0f} rows/sec ({fused_time:.3f}s)")
+    print(f"speedup       : {loop_time / fused_time:.2f}x")
+    print(f"max abs diff  : {np.max(np.abs(fused_probs - reference)):.6f}")
+    print(f"agreement     : {np.mean((fused_probs >= best_threshold) == (reference >= best_threshold)):.4%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.repeats)
@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from llm_client import AsyncLLMClient, HTTPTransport, StubLLMServer
+
+"""
+Batches per second of GPT standardization at different concurrency levels, against the local stub server
+(fixed latency per request, optional 503s) so no API key or network is needed. concurrency 1 is the old
+one-batch-after-another loop.
+"""
+
+
+def build_prompts(n_batches, batch_size):
+    from parse_file import build_extract_prompt
+    return [build_extract_prompt([json.dumps({"user_name": f"user {b}-{i}", "text": "Lovely place", "rating": 5})
+                                  for i in range(batch_size)]) for b in range(n_batches)]
+
+
+def main(n_batches, batch_size, latency, fail_every, levels, requests_per_minute):
+    prompts = build_prompts(n_batches, batch_size)
+    failures = f"every {fail_every}th request fails" if fail_every else "no failures"
+    print(f"{n_batches} batches of {batch_size}, {latency * 1000:.0f} ms per request, {failures}, "
+          f"rate limit {requests_per_minute or 'none'} rpm")
+    print(f"{'concurrency':>11} {'seconds':>8} {'batches/s':>10} {'speedup':>8} {'retries':>8}")
+
+    baseline = None
+    for concurrency in levels:
+        with StubLLMServer(latency=latency, fail_every=fail_every) as stub:
+            llm = AsyncLLMClient(HTTPTransport(stub.url), concurrency=concurrency,
+                                 requests_per_minute=requests_per_minute, backoff_base=0.05)
+            start = time.perf_counter()
+            outputs = llm.run(prompts)
+            elapsed = time.perf_counter() - start
+
+        assert all(len(json.loads(o)) == batch_size for o in outputs)
+        baseline = baseline or elapsed
+        print(f"{concurrency:>11} {elapsed:8.2f} {n_batches / elapsed:10.1f} {baseline / elapsed:7.1f}x "
+              f"{llm.stats['retries']:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per request")
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--rpm", type=float, default=None, help="Requests per minute limit")
+    args = parser.parse_args()
+    main(args.batches, args.batch_size, args.latency, args.fail_every, args.levels, args.rpm)
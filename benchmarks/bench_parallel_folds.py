@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from inference import MODEL_FOLDER, EXECUTION_MODES, load_metadata, load_fold_models, build_pool, ensemble_predict
+
+"""
+Throughput of each fold execution mode as the number of cores grows.
+For a core budget c, "serial" and "catboost-native" get c CatBoost threads per model, and the
+concurrent modes run min(c, folds) folds at once with c // workers threads each.
+"""
+
+TRAINING_FILE = os.path.join(ROOT, "training_data", "reviews_with_vader.csv")
+
+
+def core_budgets(max_cores):
+    budgets, c = [], 1
+    while c < max_cores:
+        budgets.append(c)
+        c *= 2
+    return budgets + [max_cores]
+
+
+def main(n_rows, modes, max_cores):
+    feature_order, cat_features, text_features, _ = load_metadata(MODEL_FOLDER)
+    models = load_fold_models(MODEL_FOLDER)
+
+    df = pd.read_csv(TRAINING_FILE).sample(n=n_rows, replace=True, random_state=0).reset_index(drop=True)
+    pool = build_pool(df, feature_order, cat_features, text_features)
+    reference = ensemble_predict(models, pool)
+
+    print(f"rows: {n_rows}, folds: {len(models)}")
+    print(f"{'mode':<16}{'cores':>6}{'workers':>8}{'threads':>8}{'rows/sec':>12}{'max diff':>10}")
+    for mode in modes:
+        for cores in core_budgets(max_cores):
+            if mode in ("serial", "catboost-native"):
+                workers, threads = 1, cores
+            else:
+                workers = min(cores, len(models))
+                threads = max(1, cores // workers)
+
+            start = time.perf_counter()
+            probs = ensemble_predict(models, pool, mode, n_workers=workers, thread_count=threads)
+            elapsed = time.perf_counter() - start
+
+            diff = np.max(np.abs(probs - reference))
+            print(f"{mode:<16}{cores:>6}{workers:>8}{threads:>8}{n_rows / elapsed:>12.0f}{diff:>10.2g}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--modes", nargs="+", choices=EXECUTION_MODES, default=EXECUTION_MODES)
+    parser.add_argument("--max-cores", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    main(args.rows, args.modes, args.max_cores)
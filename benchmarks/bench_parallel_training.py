@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from train_catboost import DATA_FOLDER, INPUT_FILE, NUMBEROFKFOLDS, load_training_data, train_folds
+
+"""
+Wall time of the fold training (train_catboost.train_folds) as the serial loop, every fold using all cores,
+against the process pool with n workers of cores // n CatBoost threads each. CatBoost does not scale
+linearly with threads on these small folds, so a few folds side by side keep the cores busier. Each setup
+trains into its own temporary run folder, so nothing is resumed. A rerun on a finished run folder is timed
+too, it only reads the checkpoints.
+
+    python benchmarks/bench_parallel_training.py --workers 1 2 5 --iterations 300
+"""
+
+
+def main(workers, iterations, n_folds):
+    data = load_training_data(os.path.join(DATA_FOLDER, INPUT_FILE))
+    params = {"iterations": iterations}
+    cores = os.cpu_count() or 1
+    print(f"{cores} cores, {n_folds} folds, {iterations} iterations")
+    print(f"{'workers':>8} {'threads':>8} {'wall s':>9} {'speedup':>8}")
+    serial = None
+    with tempfile.TemporaryDirectory() as folder:
+        for n in workers:
+            run_dir = os.path.join(folder, f"workers_{n}")
+            started = time.perf_counter()
+            train_folds(data, params, n_folds, run_dir, n_workers=n, verbose=0)
+            wall = time.perf_counter() - started
+            serial = serial or wall
+            print(f"{n:>8} {max(1, cores // n):>8} {wall:9.2f} {serial / wall:8.2f}")
+        started = time.perf_counter()
+        train_folds(data, params, n_folds, run_dir, n_workers=workers[-1], verbose=0)
+        print(f"resume of a finished run: {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 5])
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--folds", type=int, default=NUMBEROFKFOLDS)
+    args = parser.parse_args()
+    main(args.workers, args.iterations, args.folds)
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from nltk.sentiment import SentimentIntensityAnalyzer
+from sentiment_engine import SentimentEngine, vader_labels
+
+"""
+Row-by-row VADER (the original VADER_Sentiment_Score) against SentimentEngine on corpora with low and high
+duplication. Texts are drawn from the training CSV; low duplication makes every row unique by appending its
+row number, high duplication draws from a small pool of texts.
+"""
+
+TRAINING_FILE = os.path.join(ROOT, "training_data", "reviews_with_vader.csv")
+
+
+def make_corpus(texts, n_rows, distinct, seed=0):
+    rng = np.random.default_rng(seed)
+    pool = rng.choice(texts, size=min(distinct, len(texts)), replace=False)
+    corpus = rng.choice(pool, size=n_rows, replace=True)
+    if distinct >= n_rows:
+        corpus = [f"{t} #{i}" for i, t in enumerate(corpus)]
+    return pd.Series(corpus, dtype=object)
+
+
+def baseline(texts):
+    sia = SentimentIntensityAnalyzer()
+    scores = texts.apply(lambda x: sia.polarity_scores(x)["compound"])
+
+    def vader_sentiment_label(score):
+        if score >= 0.05:
+            return "positive"
+        elif score <= -0.05:
+            return "negative"
+        else:
+            return "neutral"
+
+    return scores.to_numpy(), scores.apply(vader_sentiment_label).to_numpy()
+
+
+def main(n_rows, n_workers):
+    texts = pd.read_csv(TRAINING_FILE)["text"].dropna().astype(str).unique()
+    corpora = {"low duplication": make_corpus(texts, n_rows, n_rows),
+               "high duplication": make_corpus(texts, n_rows, 200)}
+
+    for name, corpus in corpora.items():
+        start = time.perf_counter()
+        ref_scores, ref_labels = baseline(corpus)
+        base_time = time.perf_counter() - start
+
+        engine = SentimentEngine(n_workers=n_workers)
+        start = time.perf_counter()
+        scores = engine.score(corpus)
+        labels = vader_labels(scores)
+        cold_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.score(corpus)
+        warm_time = time.perf_counter() - start
+
+        assert np.array_equal(scores, ref_scores) and np.array_equal(labels, ref_labels)
+        print(f"{name} ({corpus.nunique()} distinct of {n_rows})")
+        print(f"  row-by-row  : {n_rows / base_time:10.0f} rows/sec")
+        print(f"  engine cold : {n_rows / cold_time:10.0f} rows/sec ({base_time / cold_time:.1f}x)")
+        print(f"  engine warm : {n_rows / warm_time:10.0f} rows/sec ({base_time / warm_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    main(args.rows, args.workers)
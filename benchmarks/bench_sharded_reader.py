@@ -0,0 +1,70 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bench_ucsd_sampling import write_synthetic
+from sharded_reader import json_decoder, read_sharded
+from parse_file import read_raw_records
+from schema_inference import standardize_with_schema
+from ucsd_json_standardization import standardize_review
+
+"""
+Records per second when reading + standardizing a large UCSD JSONL file and a Kaggle-style CSV: the serial
+path (json per line / csv.DictReader, as parse_file did) against read_sharded at several worker counts.
+"""
+
+
+def serial_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [standardize_review(json.loads(line)) for line in f if line.strip()], []
+
+
+def serial_csv(path):
+    return standardize_with_schema(read_raw_records(path))
+
+
+def to_csv(jsonl_path, csv_path):
+    with open(jsonl_path, encoding="utf-8") as src, open(csv_path, "w", newline="", encoding="utf-8") as dst:
+        writer = csv.writer(dst)
+        writer.writerow(["author_name", "review_text", "stars", "date"])
+        for line in src:
+            r = json.loads(line)
+            writer.writerow([r["name"], r["text"], r["rating"], r["time"]])
+
+
+def main(n_lines, levels):
+    print(f"JSON decoder in the workers: {json_decoder()[0]}, {os.cpu_count()} cores")
+    with tempfile.TemporaryDirectory() as folder:
+        jsonl_path = os.path.join(folder, "review-synthetic.jsonl")
+        csv_path = os.path.join(folder, "review-synthetic.csv")
+        write_synthetic(jsonl_path, n_lines)
+        to_csv(jsonl_path, csv_path)
+
+        for name, path, serial in (("UCSD JSONL", jsonl_path, serial_jsonl), ("CSV", csv_path, serial_csv)):
+            print(f"{name}: {n_lines} records, {os.path.getsize(path) / 2 ** 20:.0f} MB")
+            start = time.perf_counter()
+            expected, _ = serial(path)
+            base = time.perf_counter() - start
+            print(f"  serial       : {n_lines / base:10.0f} records/sec")
+
+            for workers in levels:
+                start = time.perf_counter()
+                standardized, _ = read_sharded(path, n_workers=workers, shard_bytes=8 * 1024 * 1024)
+                elapsed = time.perf_counter() - start
+                assert standardized == expected
+                print(f"  {workers:2d} workers   : {n_lines / elapsed:10.0f} records/sec ({base / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    main(args.lines, args.levels)
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from preprocess import preprocess_frame
+from storage import FORMATS, artifact_path, save_frame, load_frame
+
+"""
+Save / load time and file size of a _final artifact in every storage format, on a synthetic review set with
+the columns and cardinalities of the standardized schema (texts drawn from the training CSV).
+"""
+
+TRAINING_FILE = os.path.join(ROOT, "training_data", "reviews_with_vader.csv")
+
+
+def synthetic_final(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = pd.read_csv(TRAINING_FILE)["text"].dropna().astype(str).unique()
+    users = np.array([f"1{i:020d}" for i in rng.integers(0, 10 ** 15, size=max(1, n_rows // 5))])
+    places = np.array([f"0x{a:x}:0x{b:x}" for a, b in rng.integers(0, 2 ** 60, size=(max(1, n_rows // 200), 2))])
+    rating = rng.integers(1, 6, size=n_rows)
+    score = rng.uniform(-1, 1, size=n_rows).round(4)
+
+    df = pd.DataFrame({
+        "user_id": rng.choice(users, n_rows),
+        "business_name": "unknown",
+        "rating": rating,
+        "gmap_id": rng.choice(places, n_rows),
+        "text": rng.choice(texts, n_rows),
+        "sentiment_category": np.select([rating >= 4, rating <= 2], ["positive", "negative"], "neutral"),
+        "time": rng.integers(1_400_000_000_000, 1_700_000_000_000, size=n_rows),
+        "user_name": "unknown",
+        "vader_score": score,
+        "vader_category": np.select([score >= 0.05, score <= -0.05], ["positive", "negative"], "neutral"),
+    })
+    return preprocess_frame(df)
+
+
+def main(n_rows):
+    df = synthetic_final(n_rows)
+    print(f"{n_rows} rows, {df.memory_usage(deep=True).sum() / 2 ** 20:.0f} MB in memory")
+    print(f"{'format':10} {'save s':>8} {'load s':>8} {'size MB':>9}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        for fmt in FORMATS:
+            path = artifact_path(folder, "bench_final", fmt)
+            start = time.perf_counter()
+            save_frame(df, path)
+            save_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            loaded = load_frame(path)
+            load_time = time.perf_counter() - start
+
+            assert len(loaded) == n_rows
+            print(f"{fmt:10} {save_time:8.2f} {load_time:8.2f} {os.path.getsize(path) / 2 ** 20:9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.rows)
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from sklearn.model_selection import GroupKFold
+from catboost import CatBoostClassifier
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from inference import build_pool
+from train_catboost import DATA_FOLDER, INPUT_FILE, NUMBEROFKFOLDS, load_training_data, prepare_dataset
+
+"""
+Time spent getting the fold Pools ready in train_catboost.py: a train and a validation Pool built from pandas
+slices for every fold (as before), against the Pool prepared once (train_catboost.prepare_dataset) and sliced
+by row index. With --dense (DENSE_TEXT_FEATURES layout) the prepared Pool is quantized and cached on disk, so
+the cold run (quantize and save) and the warm run (load) are timed, along with the fit of one fold on raw
+against quantized slices, which is where the skipped quantization shows.
+"""
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def fit(train_pool, val_pool, iterations):
+    model = CatBoostClassifier(iterations=iterations, depth=6, random_seed=42, verbose=False, allow_writing_files=False)
+    return model.fit(train_pool, eval_set=val_pool)
+
+
+def main(dense, n_folds, iterations):
+    data = load_training_data(os.path.join(DATA_FOLDER, INPUT_FILE), dense_text_features=dense)
+    X, y, layout = data["X"], data["y"], (data["feature_cols"], data["cat_features"], data["text_features"])
+    splits = list(GroupKFold(n_splits=n_folds).split(X, y, data["groups"]))
+
+    def per_fold():
+        return [(build_pool(X.iloc[tr], *layout, label=y[tr]), build_pool(X.iloc[va], *layout, label=y[va]))
+                for tr, va in splits]
+
+    def sliced(folder):
+        pool = prepare_dataset(data, folder)
+        return [(pool.slice(tr), pool.slice(va)) for tr, va in splits]
+
+    print(f"{len(y)} rows, {n_folds} folds, {'dense text features' if dense else 'raw text'}")
+    old_time, old_pools = timed(per_fold)
+    print(f"{'pools from pandas slices, every fold':40} {old_time:8.3f}s")
+    with tempfile.TemporaryDirectory() as folder:
+        cold_time, _ = timed(lambda: sliced(folder))
+        warm_time, new_pools = timed(lambda: sliced(folder))
+        print(f"{'prepared once, cold':40} {cold_time:8.3f}s")
+        print(f"{'prepared once, warm':40} {warm_time:8.3f}s")
+        if dense:
+            print(f"{'fit fold 1 on pandas slices':40} {timed(lambda: fit(*old_pools[0], iterations))[0]:8.3f}s")
+            print(f"{'fit fold 1 on quantized slices':40} {timed(lambda: fit(*new_pools[0], iterations))[0]:8.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dense", action="store_true", help="DENSE_TEXT_FEATURES layout, cached on disk")
+    parser.add_argument("--folds", type=int, default=NUMBEROFKFOLDS)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+    main(args.dense, args.folds, args.iterations)
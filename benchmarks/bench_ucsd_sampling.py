@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+"""
+UCSD detection + 1000-review sample on a synthetic multi-million-line JSONL file.
+"old" is the previous path (is_ucsd_format loads every record, then handle_ucsd_json reads the file again and
+draws random.randint per line), "new" is sample_ucsd_file (bounded peek, Algorithm L over raw lines, one pass).
+Each variant runs in its own process so its peak RSS can be reported.
+"""
+
+
+def write_synthetic(path, n_lines, seed=0):
+    rng = random.Random(seed)
+    words = "great food friendly staff slow service clean rooms would come back again terrible parking".split()
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n_lines):
+            f.write(json.dumps({
+                "user_id": str(10 ** 20 + rng.randrange(10 ** 15)), "name": f"user {i}",
+                "time": 1_500_000_000_000 + i, "rating": rng.randint(1, 5),
+                "text": " ".join(rng.choices(words, k=rng.randint(3, 30))), "pics": None, "resp": None,
+                "gmap_id": f"0x{rng.getrandbits(60):x}:0x{rng.getrandbits(60):x}",
+            }) + "\n")
+
+
+def old_path(path, sample_size, seed):
+    import jsonlines
+    from ucsd_json_standardization import is_ucsd_records
+
+    with jsonlines.open(path) as reader:
+        data = [obj for obj in reader]
+    assert is_ucsd_records(data)
+    del data
+
+    random.seed(seed)
+    reservoir, n = [], 0
+    with jsonlines.open(path) as reader:
+        for review in reader:
+            n += 1
+            if len(reservoir) < sample_size:
+                reservoir.append(review)
+            else:
+                j = random.randint(0, n - 1)
+                if j < sample_size:
+                    reservoir[j] = review
+    return reservoir
+
+
+def new_path(path, sample_size, seed):
+    from ucsd_json_standardization import sample_ucsd_file
+    return sample_ucsd_file(path, sample_size, seed)
+
+
+def run_variant(variant, path, sample_size):
+    start = time.perf_counter()
+    sample = (old_path if variant == "old" else new_path)(path, sample_size, 1)
+    elapsed = time.perf_counter() - start
+    assert len(sample) == sample_size
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_mb}))
+
+
+def main(n_lines, sample_size):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "review-synthetic.json")
+        write_synthetic(path, n_lines)
+        print(f"{n_lines} lines, {os.path.getsize(path) / 2 ** 20:.0f} MB, sample of {sample_size}")
+
+        results = {}
+        for variant in ("old", "new"):
+            out = subprocess.run([sys.executable, __file__, "--variant", variant, "--path", path,
+                                  "--sample", str(sample_size)], capture_output=True, text=True, check=True)
+            results[variant] = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"  {variant}: {results[variant]['seconds']:7.2f} s, peak RSS {results[variant]['peak_rss_mb']:7.0f} MB")
+        print(f"  speedup {results['old']['seconds'] / results['new']['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=3000000)
+    parser.add_argument("--sample", type=int, default=1000)
+    parser.add_argument("--variant", choices=["old", "new"], default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--path", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant, args.path, args.sample)
+    else:
+        main(args.lines, args.sample)
@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate_reviews, write_input
+from instrumentation import Recorder, set_recorder
+from llm_client import HTTPTransport, StubLLMServer
+from ucsd_json_standardization import categories
+
+"""
+Per-stage and end-to-end benchmark of the pipeline on synthetic reviews (benchmarks/synthetic.py).
+
+For every size: ingest (parse_file on a raw JSONL input, with the free-text records answered by a local stub LLM),
+preprocess, VADER, Pool construction, ensemble scoring, writing the _final artifact as CSV / Parquet / Feather,
+and the streaming pipeline end to end. Timings come from instrumentation.Recorder, so the steps timed inside
+the stage functions are reported too. With --repeats the fastest run of every stage is kept, which
+steadies the figures on a busy machine. Results are saved as JSON and can be compared with a baseline:
+
+    python -m benchmarks.suite --sizes 10000 100000 --save benchmarks/results/baseline.json
+    ... change something ...
+    python -m benchmarks.suite --sizes 10000 100000 --baseline benchmarks/results/baseline.json
+"""
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+RESULTS_FOLDER = os.path.join(ROOT, "benchmarks", "results")
+STUB_LATENCY = 0.05
+REGRESSION_TOLERANCE = 0.2
+# Stages too short to compare reliably
+MIN_COMPARED_SECONDS = 0.05
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "pandas": pd.__version__, "commit": commit, "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def run_size(n_rows, folder, seed=0, free_text_rate=0.001, stub_latency=STUB_LATENCY, end_to_end=True):
+    """
+    Runs every stage once on n_rows synthetic reviews.
+
+    Returns:
+        dict: {stage: timings} as in instrumentation.Recorder.report
+    """
+    from parse_file import parse_file
+    from preprocess import preprocess_frame
+    from sentiment_engine import SentimentEngine, add_vader_columns
+    from inference import load_metadata, load_fold_models, build_pool, ensemble_predict
+    from storage import FORMATS, artifact_path, save_frame
+    from pipeline import run_streaming_pipeline
+
+    recorder = Recorder(verbose=False)
+    previous = set_recorder(recorder)
+    try:
+        input_path = os.path.join(folder, f"reviews_{n_rows}.jsonl")
+        with recorder.stage("generate", rows_out=n_rows):
+            write_input(generate_reviews(n_rows, seed), input_path, free_text_rate, seed)
+
+        with StubLLMServer(latency=stub_latency) as stub:
+            transport = HTTPTransport(stub.url)
+            with recorder.stage("ingest") as t:
+                records = parse_file(input_path, None, transport=transport)
+                t.rows_out = len(records)
+            df = pd.DataFrame.from_records(records, columns=categories)
+
+            with recorder.stage("preprocess", rows_in=len(df)):
+                df = preprocess_frame(df)
+
+            with recorder.stage("vader", rows_in=len(df)):
+                engine = SentimentEngine()
+                df = add_vader_columns(df, engine=engine)
+                engine.close()
+
+            feature_order, cat_features, text_features, _ = load_metadata()
+            models = load_fold_models()
+            with recorder.stage("pool", rows_in=len(df)):
+                pool = build_pool(df, feature_order, cat_features, text_features)
+            with recorder.stage("score", rows_in=len(df)):
+                ensemble_predict(models, pool)
+
+            for fmt in FORMATS:
+                with recorder.stage(f"write_{fmt}", rows_in=len(df)):
+                    save_frame(df, artifact_path(folder, f"final_{n_rows}", fmt))
+
+            if end_to_end:
+                with recorder.stage("end_to_end") as t:
+                    run_streaming_pipeline(input_path, output_path=os.path.join(folder, f"results_{n_rows}.csv"),
+                                           transport=transport)
+                    t.rows_in = n_rows
+    finally:
+        set_recorder(previous)
+    return recorder.report()["stages"]
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Prints wall time against the baseline for every (size, stage) both runs have.
+
+    Returns:
+        list: (size, stage, ratio) of the stages slower than baseline by more than tolerance
+    """
+    regressions = []
+    print(f"{'rows':>9} {'stage':32} {'wall s':>9} {'baseline':>9} {'ratio':>6}")
+    for size, stages in results.items():
+        for name, timing in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            ratio = timing["wall_s"] / base["wall_s"] if base["wall_s"] > 0 else float("inf")
+            slower = ratio > 1 + tolerance and max(timing["wall_s"], base["wall_s"]) >= MIN_COMPARED_SECONDS
+            if slower:
+                regressions.append((size, name, ratio))
+            print(f"{size:>9} {name:32} {timing['wall_s']:9.3f} {base['wall_s']:9.3f} {ratio:6.2f}"
+                  f"{'  <-- slower' if slower else ''}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'rows':>9} {'stage':32} {'wall s':>9} {'cpu s':>9} {'peak MB':>8} {'rows/s':>11}")
+    for size, stages in results.items():
+        for name, t in stages.items():
+            rate = f"{t['rows_per_s']:11,.0f}" if t["rows_per_s"] is not None else f"{'':>11}"
+            print(f"{size:>9} {name:32} {t['wall_s']:9.3f} {t['cpu_s']:9.3f} {t['peak_rss_mb']:8.0f} {rate}")
+
+
+def best_of(runs):
+    # Fastest wall time of every stage over the repeats, the least disturbed by the rest of the machine
+    best = {}
+    for stages in runs:
+        for name, timing in stages.items():
+            if name not in best or timing["wall_s"] < best[name]["wall_s"]:
+                best[name] = timing
+    return best
+
+
+def main(sizes, save=None, baseline=None, tolerance=REGRESSION_TOLERANCE, seed=0, end_to_end=True, repeats=1):
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for n_rows in sizes:
+            print(f"Running {n_rows} rows...")
+            runs = [run_size(n_rows, folder, seed, end_to_end=end_to_end) for _ in range(repeats)]
+            results[str(n_rows)] = best_of(runs)
+    print_results(results)
+
+    save = save or os.path.join(RESULTS_FOLDER, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(save)), exist_ok=True)
+    with open(save, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "seed": seed, "repeats": repeats, "results": results}, f, indent=2)
+    print(f"Results saved to {save}")
+
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], tolerance)
+        if regressions:
+            print(f"⚠️ {len(regressions)} stages slower than the baseline by more than {tolerance:.0%}")
+            return 1
+        print("✅ No stage slower than the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic reviews.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--save", default=None, help="Results file. Defaults to benchmarks/results/<date>.json")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per size, the fastest of each stage is kept")
+    parser.add_argument("--no-end-to-end", action="store_true", help="Skip the streaming pipeline run")
+    args = parser.parse_args()
+    sys.exit(main(args.sizes, args.save, args.baseline, args.tolerance, args.seed, not args.no_end_to_end,
+                  args.repeats))
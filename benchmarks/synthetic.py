@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from ucsd_json_standardization import categories, get_rating_category
+
+"""
+Deterministic synthetic reviews in the standardized schema, for the benchmarks.
+The same arguments always give the same reviews. Texts are drawn from a small vocabulary with sentiment words
+that follow the rating, so VADER has something to score, and the knobs cover what drives the cost of the
+stages: number of rows, words per text, share of repeated texts, and the number of distinct places and users.
+
+write_input turns a frame into a raw JSONL input like the ones parse_file reads (Google-export keys that the
+schema inference maps), where a share of the records are bare text lines that have to go through the LLM.
+"""
+
+POSITIVE_WORDS = ["great", "amazing", "friendly", "delicious", "clean", "love", "excellent", "nice", "good",
+                  "fresh", "perfect", "happy", "recommend", "best", "awesome", "helpful"]
+NEGATIVE_WORDS = ["bad", "terrible", "rude", "dirty", "awful", "slow", "cold", "worst", "disappointed", "horrible",
+                  "overpriced", "bland", "noisy", "wrong", "broken", "sad"]
+NEUTRAL_WORDS = ["the", "food", "service", "staff", "place", "we", "ordered", "table", "price", "room", "was",
+                 "and", "very", "a", "to", "it", "for", "our", "with", "menu", "drinks", "parking", "wait", "time",
+                 "location", "here", "they", "were", "this", "but", "really", "so", "back", "visit", "night",
+                 "lunch", "dinner", "coffee", "pizza", "burger", "salad", "waiter", "manager", "weekend", "family",
+                 "kids", "order", "minutes", "hour", "experience", "atmosphere", "seating", "outside", "inside"]
+SHORT_TEXTS = ["Great food!", "Good", "Nice place", "Terrible service", "Love it", "Not bad", "Awesome staff",
+               "Never again", "Clean and friendly", "Too slow"]
+RATING_CATEGORIES = ["taste", "menu", "indoor_atmosphere", "outdoor_atmosphere", None]
+
+
+def _texts(rng, ratings, text_words):
+    # Share of sentiment words grows with how far the rating is from 3
+    n_rows = len(ratings)
+    lengths = np.clip(rng.poisson(text_words, n_rows), 1, None)
+    width = int(lengths.max())
+    vocab = np.array(NEUTRAL_WORDS + POSITIVE_WORDS + NEGATIVE_WORDS, dtype=object)
+    neutral = rng.integers(0, len(NEUTRAL_WORDS), size=(n_rows, width))
+    positive = len(NEUTRAL_WORDS) + rng.integers(0, len(POSITIVE_WORDS), size=(n_rows, width))
+    negative = len(NEUTRAL_WORDS) + len(POSITIVE_WORDS) + rng.integers(0, len(NEGATIVE_WORDS),
+                                                                      size=(n_rows, width))
+
+    sentiment_share = (np.abs(ratings - 3) * 0.1 + 0.05)[:, None]
+    use_sentiment = rng.random((n_rows, width)) < sentiment_share
+    words = np.where(use_sentiment, np.where((ratings >= 3)[:, None], positive, negative), neutral)
+    return [" ".join(vocab[row[:n]]).capitalize() + "." for row, n in zip(words, lengths)]
+
+
+def generate_reviews(n_rows, seed=0, text_words=20, duplicate_rate=0.2, n_places=None, n_users=None):
+    """
+    Args:
+        n_rows (int): Reviews generated.
+        seed (int): Same seed, same reviews.
+        text_words (int): Mean number of words per text.
+        duplicate_rate (float): Share of reviews whose text repeats another one (short stock phrases or an
+                                earlier review's text).
+        n_places, n_users (int, optional): Distinct gmap_id / user_id values.
+                                           Default to n_rows / 200 and n_rows / 5.
+    Returns:
+        pd.DataFrame: columns of the standardized schema (ucsd_json_standardization.categories)
+    """
+    rng = np.random.default_rng(seed)
+    n_places = n_places or max(1, n_rows // 200)
+    n_users = n_users or max(1, n_rows // 5)
+
+    ratings = rng.choice([1, 2, 3, 4, 5], size=n_rows, p=[0.1, 0.07, 0.1, 0.23, 0.5])
+    texts = np.array(_texts(rng, ratings, text_words), dtype=object)
+    repeated = np.flatnonzero(rng.random(n_rows) < duplicate_rate)
+    if len(repeated):
+        # Half stock phrases, half copies of another review
+        stock = rng.random(len(repeated)) < 0.5
+        phrases = np.array(SHORT_TEXTS, dtype=object)
+        texts[repeated[stock]] = phrases[rng.integers(0, len(phrases), stock.sum())]
+        texts[repeated[~stock]] = texts[rng.integers(0, n_rows, (~stock).sum())]
+
+    place_ids = np.array([f"0x{a:x}:0x{b:x}" for a, b in rng.integers(0, 2 ** 62, size=(n_places, 2))],
+                         dtype=object)
+    user_ids = np.array([f"1{u:020d}" for u in rng.integers(0, 10 ** 15, size=n_users)], dtype=object)
+    user_idx = rng.integers(0, n_users, n_rows)
+
+    df = pd.DataFrame({
+        "user_id": user_ids[user_idx],
+        "user_name": [f"User {i}" for i in user_idx],
+        "business_name": None,
+        "time": np.sort(rng.integers(1_400_000_000_000, 1_700_000_000_000, size=n_rows)),
+        "text": texts,
+        "rating": ratings,
+        "sentiment_category": [get_rating_category(int(r)) for r in ratings],
+        "rating_category": np.array(RATING_CATEGORIES, dtype=object)[rng.integers(0, len(RATING_CATEGORIES),
+                                                                                  n_rows)],
+        "gmap_id": place_ids[rng.integers(0, n_places, n_rows)],
+    })
+    return df[categories]
+
+
+def write_input(df, path, free_text_rate=0.01, seed=0):
+    """
+    Writes the reviews as a raw JSONL input: Google-export keys (name, review_text, stars, date, place_id),
+    and a share of free_text_rate bare text lines that the schema cannot map.
+
+    Returns:
+        int: number of free-text lines (the ones sent to the LLM)
+    """
+    rng = np.random.default_rng(seed)
+    free = rng.random(len(df)) < free_text_rate
+    with open(path, "w", encoding="utf-8") as f:
+        for row, is_free in zip(df.itertuples(index=False), free):
+            if is_free:
+                f.write(json.dumps(f"{row.user_name} gave {row.rating} stars: {row.text}") + "\n")
+                continue
+            f.write(json.dumps({
+                "user_id": row.user_id, "name": row.user_name, "date": int(row.time), "stars": int(row.rating),
+                "review_text": row.text, "category": row.rating_category, "place_id": row.gmap_id,
+            }) + "\n")
+    return int(free.sum())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic raw review input.")
+    parser.add_argument("output", help="JSONL file to write")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--text-words", type=int, default=20)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--places", type=int, default=None)
+    parser.add_argument("--users", type=int, default=None)
+    parser.add_argument("--free-text-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    reviews = generate_reviews(args.rows, args.seed, args.text_words, args.duplicate_rate, args.places, args.users)
+    n_free = write_input(reviews, args.output, args.free_text_rate, args.seed)
+    print(f"{args.rows} reviews written to {args.output} ({n_free} free-text lines)")
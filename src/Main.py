@@ -1,4 +1,180 @@
+import os
+import sys
+import time
+import argparse
+
+"""
+Command line entry point for the pipeline steps, meant for short-lived batch jobs.
+
+    python src/Main.py standardize review-Kaggle.json
+    python src/Main.py preprocess review-Kaggle_standardized
+    python src/Main.py sentiment review-Kaggle_standardized
+    python src/Main.py score review-Kaggle_standardized
+    python src/Main.py run review-Kaggle.json        # all of the above, streamed in chunks
+    python src/Main.py serve --port 8080
+
+Only argparse is imported up front. pandas, catboost, nltk and openai are imported inside the subcommand that
+needs them (the OpenAI clients are built on the first GPT call), so `--help` answers at once and `score` does
+not pay for the LLM or NLTK imports. Steps reuse the outputs of earlier runs through the stage cache unless
+--no-cache is given. --timings prints how long the imports and the step took.
+"""
+
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+
+# Same as storage.FORMATS, inference.EXECUTION_MODES and inference.EARLY_EXIT_RULES, kept here so --help needs no pandas
+FORMATS = ["csv", "parquet", "feather"]
+EXECUTION_MODES = ["serial", "threads", "processes", "catboost-native"]
+PROFILERS = ["cprofile", "pyinstrument"]
+EARLY_EXIT_RULES = ["margin", "bound"]
+
+
 def main():
     print("________________________________________________________________________________________________________________________________\n")
     print("Hello there! Our Program is a machine learning approach dedicated to filtering irrelevant/malicious google review comments!")
-    print("Please also make sure the file of interest is inside the 'input' folder.")
\ No newline at end of file
+    print("Please also make sure the file of interest is inside the 'input' folder.")
+
+
+def _stage_cache(args):
+    if args.no_cache:
+        return None
+    from stage_cache import StageCache
+    return StageCache()
+
+
+# ----------------------------
+# SUBCOMMANDS
+# ----------------------------
+def cmd_standardize(args):
+    from standardization import standardize_file
+    standardize_file(args.input_file, cache=_stage_cache(args))
+
+
+def cmd_preprocess(args):
+    from preprocess import preprocess_file
+    preprocess_file(args.base_name, fmt=args.format, cache=_stage_cache(args), chunk_size=args.chunk_size)
+
+
+def cmd_sentiment(args):
+    from Vader_function import VADER_Sentiment_Score
+    VADER_Sentiment_Score(args.base_name, cache_path=args.vader_cache, backend=args.backend, fmt=args.format,
+                          cache=_stage_cache(args))
+
+
+def cmd_score(args):
+    from inference import EARLY_EXIT_MARGIN, run_inference
+    from text_features import TextFeatureCache
+    # Only read by models trained on the dense text features
+    text_cache = None if args.no_cache else TextFeatureCache()
+    run_inference(args.base_name, use_fused=args.fused, execution_mode=args.execution_mode, n_workers=args.n_workers,
+                  thread_count=args.thread_count, fmt=args.format, cache=_stage_cache(args), text_cache=text_cache,
+                  early_exit=args.early_exit, use_cascade=args.cascade,
+                  early_exit_margin=args.early_exit_margin if args.early_exit_margin is not None else EARLY_EXIT_MARGIN)
+    if text_cache is not None:
+        text_cache.save()
+
+
+def cmd_run(args):
+    from pipeline import CHUNK_SIZE, run_streaming_pipeline
+    llm_cache = None
+    if not args.no_llm_cache:
+        from llm_cache import LLMCache
+        llm_cache = LLMCache()
+    run_streaming_pipeline(args.input_file, args.chunk_size or CHUNK_SIZE, args.dump_intermediates,
+                           output_path=args.output, llm_cache=llm_cache)
+
+
+def cmd_serve(args):
+    from scoring_service import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, serve
+    serve(args.host, args.port, args.unix_socket, max_batch_size=args.max_batch_size or DEFAULT_MAX_BATCH_SIZE,
+          max_wait_ms=args.max_wait_ms if args.max_wait_ms is not None else DEFAULT_MAX_WAIT_MS,
+          execution_mode=args.execution_mode, n_workers=args.n_workers, thread_count=args.thread_count)
+
+
+def build_parser():
+    # Options left at None take the default of the step function, whose module is not imported yet
+    parser = argparse.ArgumentParser(prog="Main.py", description="Filter irrelevant or malicious Google reviews.")
+    parser.add_argument("--report", default=None, help="Write the stage timings to REPORT.json and REPORT.prom")
+    parser.add_argument("--profile", default=None, choices=PROFILERS, help="Profile every stage")
+    parser.add_argument("--timings", action="store_true", help="Print the import and step times")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    cached = argparse.ArgumentParser(add_help=False)
+    cached.add_argument("--no-cache", action="store_true", help="Recompute even if an earlier run has the output")
+    fmt = argparse.ArgumentParser(add_help=False)
+    fmt.add_argument("--format", choices=FORMATS, default="csv", help="Storage format of the artifacts")
+    scoring = argparse.ArgumentParser(add_help=False)
+    scoring.add_argument("--execution-mode", choices=EXECUTION_MODES, default="serial",
+                         help="How the fold models are spread (see inference.py)")
+    scoring.add_argument("--n-workers", type=int, default=None)
+    scoring.add_argument("--thread-count", type=int, default=-1)
+
+    p = commands.add_parser("standardize", parents=[cached], help="Standardize a file of the input folder")
+    p.add_argument("input_file", help="File inside the input folder")
+    p.set_defaults(func=cmd_standardize)
+
+    p = commands.add_parser("preprocess", parents=[cached, fmt], help="Preprocess data/<base_name>.csv")
+    p.add_argument("base_name")
+    p.add_argument("--chunk-size", type=int, default=None, help="Rows per chunk, for inputs larger than memory")
+    p.set_defaults(func=cmd_preprocess)
+
+    p = commands.add_parser("sentiment", parents=[cached, fmt], help="VADER scores of data/<base_name>_preprocessed")
+    p.add_argument("base_name")
+    p.add_argument("--backend", choices=["fast", "nltk"], default="fast")
+    p.add_argument("--vader-cache", default=None, help="SQLite file keeping compound scores between runs")
+    p.set_defaults(func=cmd_sentiment)
+
+    p = commands.add_parser("score", parents=[cached, fmt, scoring], help="Score data/<base_name>_final")
+    p.add_argument("base_name")
+    p.add_argument("--fused", action="store_true", help="Score with the fused ensemble (export_ensemble.py)")
+    p.add_argument("--cascade", action="store_true",
+                   help="Let the first tier (cascade.py) decide the clear reviews, the fold models score the rest")
+    p.add_argument("--early-exit", choices=EARLY_EXIT_RULES, default=None,
+                   help="Stop scoring a review once its decision is settled (see inference.adaptive_predict)")
+    p.add_argument("--early-exit-margin", type=float, default=None, help="Distance to the threshold for 'margin'")
+    p.set_defaults(func=cmd_score)
+
+    p = commands.add_parser("run", help="Standardize, preprocess, score and write an input file in chunks")
+    p.add_argument("input_file", help="File inside the input folder")
+    p.add_argument("--chunk-size", type=int, default=None)
+    p.add_argument("--dump-intermediates", action="store_true")
+    p.add_argument("--output", default=None)
+    p.add_argument("--no-llm-cache", action="store_true", help="Send every review to GPT, even cached ones")
+    p.set_defaults(func=cmd_run)
+
+    p = commands.add_parser("serve", parents=[scoring], help="Serve the fold ensemble over HTTP")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--unix-socket", default=None, help="Listen on a Unix socket instead of TCP")
+    p.add_argument("--max-batch-size", type=int, default=None)
+    p.add_argument("--max-wait-ms", type=float, default=None)
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def cli(argv=None):
+    started = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        main()
+        build_parser().print_help()
+        return 0
+
+    from instrumentation import Recorder, get_recorder, set_recorder
+    if args.profile:
+        set_recorder(Recorder(profile=args.profile, profile_dir=os.path.join(PROJECT_ROOT, "outputs", "profiles")))
+    modules = len(sys.modules)
+    args.func(args)
+    if args.report:
+        get_recorder().write_report(args.report)
+    if args.timings:
+        steps = sum(agg["wall_s"] for name, agg in get_recorder().report()["stages"].items() if "." not in name)
+        print(f"⏱️ {args.command}: {time.perf_counter() - started:.3f} s in total, {steps:.3f} s in the steps, "
+              f"{len(sys.modules) - modules} modules imported")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
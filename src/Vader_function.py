@@ -1,53 +1,66 @@
 import os
-import pandas as pd
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+from sentiment_engine import SentimentEngine, add_vader_columns, vader_version
+from storage import artifact_path, save_frame, load_frame
+from instrumentation import stage, timed
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 DATA_FOLDER = os.path.join(PROJECT_ROOT, "data")
 
-# Download lexicon quietly once
-nltk.download('vader_lexicon', quiet=True)
-
 """
 Run VADER sentiment scoring on a preprocessed CSV.
 
 Args:
     base_name (str): The base filename without extension.
                      Example: "review-Kaggle" reads "data/review-Kaggle_preprocessed.csv"
+    cache_path (str, optional): SQLite file that keeps compound scores between runs.
+    backend (str): "fast" scores with the compiled lexicon index (fast_vader), "nltk" with NLTK's analyzer.
+                   Both give the same scores.
+    fmt (str): Storage format of the _preprocessed input and the _final output, "csv" (default),
+               "parquet" or "feather". See storage.py.
+    cache (StageCache, optional): Reuse the _final output of an earlier run when nothing changed. See stage_cache.py.
 
 Returns:
     df (pd.DataFrame): DataFrame with added VADER columns
     output_path (str): Path to the saved *_final.csv
 """
-def VADER_Sentiment_Score(base_name: str, text_col="text"):
-    input_path = os.path.join(DATA_FOLDER, f"{base_name}_preprocessed.csv")
-    output_path = os.path.join(DATA_FOLDER, f"{base_name}_final.csv")
-
-    df = pd.read_csv(input_path)
+@timed("vader")
+def VADER_Sentiment_Score(base_name: str, text_col="text", cache_path=None, backend="fast", fmt="csv",
+                          cache=None):
+    input_path = artifact_path(DATA_FOLDER, f"{base_name}_preprocessed", fmt)
+    output_path = artifact_path(DATA_FOLDER, f"{base_name}_final", fmt)
 
-    if text_col not in df.columns:
-        raise ValueError(f"Column '{text_col}' not found. Available: {list(df.columns)}")
+    if backend == "nltk":
+        # Only the NLTK analyzer reads the lexicon from nltk_data, download it quietly once
+        import nltk
+        nltk.download('vader_lexicon', quiet=True)
 
-    # Initialize analyzer
-    sia = SentimentIntensityAnalyzer()
-    texts = df[text_col].astype(str).fillna("")
+    entry = None
+    if cache is not None:
+        # vader_version covers the lexicon (and the compiled index of the fast backend)
+        config = {"text_col": text_col, "fmt": fmt, "vader": vader_version(backend)}
+        entry = cache.entry("vader", [input_path], [output_path], config=config,
+                            code=["Vader_function", "sentiment_engine", "fast_vader", "storage"])
+        if entry.restore():
+            return load_frame(output_path), output_path
 
-    # Add compound score + category
-    df["vader_score"] = texts.apply(lambda x: sia.polarity_scores(x)["compound"])
+    with stage("vader.read") as t:
+        df = load_frame(input_path)
+        t.rows_out = len(df)
 
-    def vader_sentiment_label(score):
-        if score >= 0.05:
-            return "positive"
-        elif score <= -0.05:
-            return "negative"
-        else:
-            return "neutral"
+    if text_col not in df.columns:
+        raise ValueError(f"Column '{text_col}' not found. Available: {list(df.columns)}")
 
-    df["vader_category"] = df["vader_score"].apply(vader_sentiment_label)
+    with stage("vader.score", rows_in=len(df)) as t:
+        engine = SentimentEngine(cache_path=cache_path, backend=backend)
+        df = add_vader_columns(df, text_col, engine)
+        engine.close()
+        t.rows_out = len(df)
 
     # Save
-    df.to_csv(output_path, index=False)
+    with stage("vader.write", rows_in=len(df)):
+        save_frame(df, output_path)
+    if entry is not None:
+        entry.store()
     print(f"VADER sentiment scoring complete. Saved to {output_path}")
 
     return df, output_path
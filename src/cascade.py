@@ -0,0 +1,204 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+import joblib
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import GroupKFold
+
+from inference import MODEL_FOLDER, load_metadata, load_fold_models, build_pool, ensemble_predict
+
+"""
+Optional first tier in front of the fold ensemble, trained after train_catboost.py.
+
+A linear model over hashed word n-grams of the text plus rating and vader_score estimates the fold-average
+probability of every review (Ridge on its logit, the targets being the ensemble's own scores of the training
+CSV). Reviews it places below the band are decided ham and reviews above it spam. Only the reviews inside the
+band are escalated to the fold ensemble:
+
+    python src/cascade.py --target-agreement 0.9
+    run_inference("test_standardized", use_cascade=True)
+
+The band edges are tuned on out-of-fold tier-one estimates (GroupKFold by business, as the folds) so that at
+least target_agreement of the reviews the ensemble flags as spam are flagged by the cascade, and at least
+target_agreement of the reviews the cascade flags are flagged by the ensemble. The target is set on the spam
+flags because spam is rare: calling every review ham would already agree with most decisions.
+"""
+
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+
+TRAINING_FILE = os.path.join(PROJECT_ROOT, "training_data", "reviews_with_vader.csv")
+CASCADE_FILE = "cascade.joblib"
+TARGET_AGREEMENT = 0.9
+HASH_FEATURES = 2 ** 18
+# Bigrams cost a third more to hash and did not narrow the band on the training CSV
+NGRAM_RANGE = (1, 1)
+RIDGE_ALPHA = 1.0
+N_FOLDS = 5
+EPSILON = 1e-6
+
+
+def tier_one_features(df):
+    # Stateless hashing, nothing to fit or store besides the settings. Each distinct text is hashed once.
+    vectorizer = HashingVectorizer(ngram_range=NGRAM_RANGE, n_features=HASH_FEATURES, alternate_sign=False)
+    codes, uniques = pd.factorize(df["text"].fillna("unknown").astype(str))
+    text = vectorizer.transform(uniques)[codes]
+    numeric = np.column_stack([pd.to_numeric(df["rating"], errors="coerce").fillna(0).to_numpy() / 5,
+                               pd.to_numeric(df["vader_score"], errors="coerce").fillna(0).to_numpy()])
+    return sp.hstack([text, sp.csr_matrix(numeric)]).tocsr()
+
+
+def _logit(p):
+    p = np.clip(p, EPSILON, 1 - EPSILON)
+    return np.log(p / (1 - p))
+
+
+class CascadeFilter:
+    """
+    Tier one of the cascade: the Ridge model and the band (low, high) of its estimated ensemble probability
+    inside which reviews go on to the fold ensemble.
+    """
+
+    def __init__(self, model, low, high, best_threshold, target_agreement, check):
+        self.model = model
+        self.low = low
+        self.high = high
+        self.best_threshold = best_threshold
+        self.target_agreement = target_agreement
+        self.check = check
+
+    def predict_proba(self, df):
+        return 1 / (1 + np.exp(-self.model.predict(tier_one_features(df))))
+
+    def route(self, df):
+        """
+        Returns:
+            tuple: (estimated spam probability, tier-one decision, escalate mask) per row. The probability of a
+                   settled row is clipped to the side of best_threshold its decision is on.
+        """
+        probabilities = self.predict_proba(df)
+        escalate = (probabilities >= self.low) & (probabilities <= self.high)
+        decisions = (probabilities > self.high).astype(int)
+        # The band is tuned on the decisions, not on the estimate, which can sit on the other side of the threshold
+        ham = ~escalate & (decisions == 0)
+        spam = ~escalate & (decisions == 1)
+        probabilities[ham] = np.minimum(probabilities[ham], np.nextafter(self.best_threshold, 0))
+        probabilities[spam] = np.maximum(probabilities[spam], self.best_threshold)
+        return probabilities, decisions, escalate
+
+
+# ----------------------------
+# BAND TUNING
+# ----------------------------
+def tune_band(estimates, reference_decisions, target_agreement=TARGET_AGREEMENT):
+    """
+    Narrowest band such that at least target_agreement of the rows the reference flags as spam are flagged by
+    the cascade (rows below the band are decided ham), and at least target_agreement of the rows the cascade
+    flags above the band are flagged by the reference too.
+
+    Returns:
+        tuple: (low, high), rows strictly below low are ham, strictly above high spam
+    """
+    reference_decisions = np.asarray(reference_decisions, dtype=bool)
+    spam = np.sort(estimates[reference_decisions])
+    # Reference spam rows allowed below the band
+    low = spam[int(np.floor((1 - target_agreement) * len(spam)))] if len(spam) else np.inf
+
+    # Largest top slice of the estimates that is still precise enough to be flagged directly
+    order = np.argsort(-estimates, kind="stable")
+    precision = np.cumsum(reference_decisions[order]) / np.arange(1, len(order) + 1)
+    flagged = np.flatnonzero(precision >= target_agreement)
+    n_flagged = flagged[-1] + 1 if len(flagged) else 0
+    high = estimates[order[n_flagged]] if n_flagged < len(order) else -np.inf
+    if low > high:
+        # Tier one separates the classes, one cut between them decides every row
+        low = high = (low + high) / 2 if np.isfinite(low + high) else min(low, high)
+    return float(low), float(high)
+
+
+def band_report(estimates, reference_decisions, low, high):
+    """
+    Returns:
+        dict: escalated fraction, overall agreement, spam recall and precision against the reference
+    """
+    reference_decisions = np.asarray(reference_decisions, dtype=bool)
+    escalate = (estimates >= low) & (estimates <= high)
+    decisions = np.where(escalate, reference_decisions, estimates > high)
+    return {
+        "escalated": float(escalate.mean()),
+        "agreement": float((decisions == reference_decisions).mean()),
+        "spam_recall": float(decisions[reference_decisions].mean()) if reference_decisions.any() else 1.0,
+        "spam_precision": float(reference_decisions[decisions].mean()) if decisions.any() else 1.0,
+    }
+
+
+# ----------------------------
+# TRAINING
+# ----------------------------
+def oof_estimates(X, targets, groups, n_folds=N_FOLDS):
+    estimates = np.zeros(len(targets))
+    for train_idx, val_idx in GroupKFold(n_splits=n_folds).split(X, targets, groups):
+        model = Ridge(alpha=RIDGE_ALPHA).fit(X[train_idx], targets[train_idx])
+        estimates[val_idx] = 1 / (1 + np.exp(-model.predict(X[val_idx])))
+    return estimates
+
+
+def build_cascade(model_folder=MODEL_FOLDER, training_file=TRAINING_FILE, target_agreement=TARGET_AGREEMENT,
+                  n_folds=N_FOLDS):
+    """
+    Trains tier one on the fold ensemble's scores of training_file and tunes its band.
+
+    Returns:
+        tuple: (CascadeFilter, out-of-fold estimates, reference decisions)
+    """
+    feature_order, cat_features, text_features, best_threshold = load_metadata(model_folder)
+    models = load_fold_models(model_folder)
+
+    df = pd.read_csv(training_file).drop_duplicates().reset_index(drop=True)
+    reference = ensemble_predict(models, build_pool(df, feature_order, cat_features, text_features))
+    reference_decisions = reference >= best_threshold
+    targets = _logit(reference)
+    groups = df["business_name"].fillna("unknown").astype(str).values
+
+    X = tier_one_features(df)
+    estimates = oof_estimates(X, targets, groups, n_folds)
+    low, high = tune_band(estimates, reference_decisions, target_agreement)
+    check = band_report(estimates, reference_decisions, low, high)
+    print(f"Tier one out of fold on {len(df)} rows: band [{low:.4f}, {high:.4f}], "
+          f"{check['escalated']:.1%} escalated, agreement {check['agreement']:.4%} "
+          f"(spam recall {check['spam_recall']:.2%}, precision {check['spam_precision']:.2%})")
+
+    model = Ridge(alpha=RIDGE_ALPHA).fit(X, targets)
+    return CascadeFilter(model, low, high, best_threshold, target_agreement, check), estimates, reference_decisions
+
+
+def export_cascade(model_folder=MODEL_FOLDER, training_file=TRAINING_FILE, target_agreement=TARGET_AGREEMENT):
+    cascade, _, _ = build_cascade(model_folder, training_file, target_agreement)
+    output_path = os.path.join(model_folder, CASCADE_FILE)
+    joblib.dump(cascade, output_path)
+    print(f"✅ Exported cascade → {output_path}")
+    return output_path
+
+
+def load_cascade(model_folder=MODEL_FOLDER):
+    path = os.path.join(model_folder, CASCADE_FILE)
+    if not os.path.exists(path):
+        raise RuntimeError(f"No cascade at {path}, run cascade.py first")
+    return joblib.load(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the cheap first tier in front of the fold ensemble.")
+    parser.add_argument("--model-folder", default=MODEL_FOLDER)
+    parser.add_argument("--training-file", default=TRAINING_FILE)
+    parser.add_argument("--target-agreement", type=float, default=TARGET_AGREEMENT)
+    args = parser.parse_args()
+
+    # Through the module, so the pickle refers to cascade.CascadeFilter rather than __main__.CascadeFilter
+    import cascade
+    cascade.export_cascade(args.model_folder, args.training_file, args.target_agreement)
@@ -0,0 +1,125 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+import joblib
+from catboost import CatBoostClassifier, CatBoostError, sum_models
+
+from inference import (MODEL_FOLDER, FUSED_MODEL_FILE, FusedEnsemble, load_metadata, load_fold_models,
+                       build_pool, ensemble_predict)
+
+"""
+Optional export step run after train_catboost.py.
+Collapses the fold models into a single model that inference loads with one call (load_fused_model) and
+evaluates in one pass per review instead of ten.
+
+When CatBoost can sum the folds (no text features), the fused model is the fold trees with averaged leaf
+values. CatBoost refuses to sum models with text features, which is the case for the shipped folds, so the
+fallback is a distilled model: one CatBoost model trained with CrossEntropy on the fold-average
+probabilities of the training rows. Either way the fused model is compared with the per-fold average on rows
+it was not fitted on, and nothing is written unless every row agrees within the tolerance.
+"""
+
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+
+VALIDATION_FILE = os.path.join(PROJECT_ROOT, "training_data", "reviews_with_vader.csv")
+TOLERANCE = 0.01
+HOLDOUT_FRACTION = 0.2
+
+DISTIL_ITERS = 1000
+DISTIL_RATE = 0.1
+DISTIL_DEPTH = 6
+RANDOMIZATION = 42
+
+
+def fuse_fold_models(models):
+    # Equal weights turn the sum of raw leaf values into their mean
+    return sum_models(models, weights=[1.0 / len(models)] * len(models))
+
+
+def distil_fold_models(df, targets, feature_order, cat_features, text_features):
+    pool = build_pool(df, feature_order, cat_features, text_features, label=targets)
+    model = CatBoostClassifier(
+        iterations=DISTIL_ITERS,
+        learning_rate=DISTIL_RATE,
+        depth=DISTIL_DEPTH,
+        loss_function="CrossEntropy",
+        random_seed=RANDOMIZATION,
+        verbose=200,
+    )
+    model.fit(pool)
+    return model
+
+
+def compare_predictions(fused, reference, pool, best_threshold):
+    fused_probs = fused.predict_proba(pool)
+    diff = np.abs(fused_probs - reference)
+    return {
+        "max_abs_diff": float(np.max(diff)),
+        "p99_abs_diff": float(np.percentile(diff, 99)),
+        "decision_agreement": float(np.mean((fused_probs >= best_threshold) == (reference >= best_threshold))),
+    }
+
+
+def build_fused_ensemble(model_folder=MODEL_FOLDER, validation_file=VALIDATION_FILE, tolerance=TOLERANCE):
+    """
+    Collapses the fold models in model_folder into a single-pass FusedEnsemble.
+
+    Args:
+        model_folder (str): Folder holding fold_N.cbm and the metadata pickles.
+        validation_file (str): CSV with the training features. The distilled model is fitted on part of it,
+                               and the fused predictions are checked on the rest.
+        tolerance (float): Largest allowed absolute probability difference against the per-fold average.
+
+    Returns:
+        tuple: (FusedEnsemble, check dict), the ensemble is None if the check failed
+    """
+    feature_order, cat_features, text_features, best_threshold = load_metadata(model_folder)
+    models = load_fold_models(model_folder)
+
+    df = pd.read_csv(validation_file).drop_duplicates().reset_index(drop=True)
+    targets = ensemble_predict(models, build_pool(df, feature_order, cat_features, text_features))
+    holdout = np.random.default_rng(RANDOMIZATION).random(len(df)) < HOLDOUT_FRACTION
+
+    try:
+        fused = FusedEnsemble("summed", fuse_fold_models(models), feature_order, cat_features, text_features,
+                              best_threshold)
+    except CatBoostError as e:
+        print(f"Fold models cannot be summed ({e}). Distilling them into one model instead.")
+        model = distil_fold_models(df[~holdout], targets[~holdout], feature_order, cat_features, text_features)
+        fused = FusedEnsemble("distilled", model, feature_order, cat_features, text_features, best_threshold)
+
+    check = compare_predictions(fused, targets[holdout],
+                                build_pool(df[holdout], feature_order, cat_features, text_features), best_threshold)
+    print(f"{fused.kind} model vs per-fold average on {holdout.sum()} held-out rows: "
+          f"max abs diff {check['max_abs_diff']:.6f}, p99 abs diff {check['p99_abs_diff']:.6f}, "
+          f"decision agreement {check['decision_agreement']:.4%}")
+
+    if check["max_abs_diff"] > tolerance:
+        print(f"Difference is above the tolerance ({tolerance}), keep using the fold models.")
+        return None, check
+    return fused, check
+
+
+def export_fused_model(model_folder=MODEL_FOLDER, validation_file=VALIDATION_FILE, tolerance=TOLERANCE):
+    fused, _ = build_fused_ensemble(model_folder, validation_file, tolerance)
+    if fused is None:
+        return None
+
+    output_path = os.path.join(model_folder, FUSED_MODEL_FILE)
+    joblib.dump(fused, output_path)
+    print(f"✅ Exported {fused.kind} model → {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collapse the fold models into one model for inference.")
+    parser.add_argument("--model-folder", default=MODEL_FOLDER)
+    parser.add_argument("--validation-file", default=VALIDATION_FILE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    export_fused_model(args.model_folder, args.validation_file, args.tolerance)
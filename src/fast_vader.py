@@ -0,0 +1,364 @@
+import os
+import json
+import math
+import mmap
+import string
+import struct
+import hashlib
+import argparse
+
+import numpy as np
+
+"""
+In-house VADER scorer.
+NLTK's SentimentIntensityAnalyzer parses the lexicon text file on every start and does a lot of per-token
+string work per review (it builds a punctuation x word dictionary for every text). This module compiles the
+lexicon, the booster words and the negation words once into a compact binary index (vader_index.bin, shipped
+next to this file), maps it into memory at load time, and looks up the distinct tokens of a whole batch at
+once. The scoring rules are NLTK's, step for step, so compound scores are identical.
+
+Index layout (little endian): header, JSON metadata, then n entries sorted by the 64-bit blake2b hash of the
+lowercase word: hashes (uint64), lexicon valence (float64, NaN when absent), booster scalar (float64, NaN when
+absent), flags (uint8, bit 0 = negation word), key offsets (uint32, n + 1) and the UTF-8 keys.
+"""
+
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+
+INDEX_FILE = os.path.join(PROJECT_ROOT, "src", "vader_index.bin")
+NLTK_LEXICON = "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"
+
+MAGIC = b"VADERIX1"
+HEADER = struct.Struct("<8sIII")  # magic, entries, metadata bytes, key bytes
+NEGATION_FLAG = 1
+TOKEN_CACHE_SIZE = 500000
+
+# Same constants as nltk.sentiment.vader.VaderConstants
+B_DECR = -0.293
+C_INCR = 0.733
+N_SCALAR = -0.74
+ALPHA = 15
+PUNC_LIST = {".", "!", "?", ",", ";", ":", "-", "'", '"', "!!", "!!!", "??", "???", "?!?", "!?!", "?!?!", "!?!?"}
+PUNCTUATION = set(string.punctuation)
+NO_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+
+def key_hash(word):
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# ----------------------------
+# COMPILE
+# ----------------------------
+def compile_index(lexicon_text, path=INDEX_FILE):
+    """
+    Writes the binary index for a VADER lexicon.
+
+    Args:
+        lexicon_text (str): Contents of vader_lexicon.txt (word, mean valence, ... per tab-separated line).
+        path (str): Output file.
+    Returns:
+        str: Path to the index
+    """
+    from nltk.sentiment.vader import VaderConstants
+
+    lexicon = {}
+    for line in lexicon_text.split("\n"):
+        (word, measure) = line.strip().split("\t")[0:2]
+        lexicon[word] = float(measure)
+
+    words = set(lexicon) | set(VaderConstants.BOOSTER_DICT) | set(VaderConstants.NEGATE)
+    entries = sorted((key_hash(w), w) for w in words)
+    hashes = np.array([h for h, _ in entries], dtype="<u8")
+    if len(np.unique(hashes)) != len(hashes):
+        raise RuntimeError("Hash collision in the VADER lexicon, change key_hash")
+
+    keys = [w.encode("utf-8") for _, w in entries]
+    offsets = np.zeros(len(keys) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(k) for k in keys])
+    meta = json.dumps({
+        "lexicon_digest": hashlib.blake2b(lexicon_text.encode("utf-8"), digest_size=8).hexdigest(),
+        "idioms": VaderConstants.SPECIAL_CASE_IDIOMS,
+        # Multi-word boosters ("kind of") only show up in the idiom check, which compares raw strings
+        "phrase_boosters": [w for w in VaderConstants.BOOSTER_DICT if " " in w],
+    }).encode("utf-8")
+
+    sections = [
+        hashes,
+        np.array([lexicon.get(w, np.nan) for _, w in entries], dtype="<f8"),
+        np.array([VaderConstants.BOOSTER_DICT.get(w, np.nan) for _, w in entries], dtype="<f8"),
+        np.array([NEGATION_FLAG if w in VaderConstants.NEGATE else 0 for _, w in entries], dtype="u1"),
+        offsets,
+    ]
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries), len(meta), int(offsets[-1])))
+        f.write(meta)
+        for section in sections:
+            f.write(b"\0" * (-f.tell() % 8))  # keep every array 8-byte aligned
+            f.write(section.tobytes())
+        f.write(b"".join(keys))
+    return path
+
+
+# ----------------------------
+# SCORER
+# ----------------------------
+class FastVader:
+    """
+    VADER compound scores from the compiled index.
+
+    Args:
+        index_path (str): Index written by compile_index.
+    """
+
+    def __init__(self, index_path=INDEX_FILE):
+        with open(index_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, meta_len, keys_len = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise RuntimeError(f"{index_path} is not a VADER index")
+
+        pos = HEADER.size
+        meta = json.loads(self._mmap[pos:pos + meta_len])
+        pos += meta_len
+        arrays = []
+        for dtype, count in (("<u8", n), ("<f8", n), ("<f8", n), ("u1", n), ("<u4", n + 1)):
+            pos += -pos % 8
+            arrays.append(np.frombuffer(self._mmap, dtype=dtype, count=count, offset=pos))
+            pos += arrays[-1].nbytes
+        self._hashes, self._valence, self._booster, self._flags, self._offsets = arrays
+        self._keys_at = pos
+
+        self.version = f"fast-vader-{meta['lexicon_digest']}"
+        self.idioms = meta["idioms"]
+        self.phrase_boosters = set(meta["phrase_boosters"])
+        self.least_in_lexicon = self._lookup(["least"])["least"][0] is not None
+        self._tokens = {}
+
+    def _lookup(self, lowered):
+        # One searchsorted call for every distinct word of the batch, keys are compared to rule out collisions
+        hashes = np.array([key_hash(w) for w in lowered], dtype="<u8")
+        idx = np.minimum(np.searchsorted(self._hashes, hashes), len(self._hashes) - 1)
+        found = {}
+        for word, i, h in zip(lowered, idx.tolist(), hashes.tolist()):
+            start, end = self._offsets[i], self._offsets[i + 1]
+            if self._hashes[i] == h and self._mmap[self._keys_at + start:self._keys_at + end] == word.encode("utf-8"):
+                valence, booster = float(self._valence[i]), float(self._booster[i])
+                found[word] = (None if math.isnan(valence) else valence, None if math.isnan(booster) else booster,
+                               bool(self._flags[i] & NEGATION_FLAG))
+            else:
+                found[word] = (None, None, False)
+        return found
+
+    def _load_tokens(self, tokens):
+        if len(self._tokens) > TOKEN_CACHE_SIZE:
+            self._tokens.clear()
+        new = [t for t in tokens if t not in self._tokens]
+        if not new:
+            return
+        lowered = {t: t.lower() for t in new}
+        entries = self._lookup(list(set(lowered.values())))
+        for t, low in lowered.items():
+            valence, booster, negation = entries[low]
+            # (lower, valence, booster, negated, isupper)
+            self._tokens[t] = (low, valence, booster, negation or "n't" in low, t.isupper())
+
+    @staticmethod
+    def tokenize(text):
+        """
+        NLTK's SentiText.words_and_emoticons: whitespace tokens of two or more characters, with one leading or
+        trailing VADER punctuation mark stripped when what is left is a word of the text.
+        """
+        words = {w for w in text.translate(NO_PUNCTUATION).split() if len(w) > 1}
+        tokens = []
+        for we in text.split():
+            if len(we) < 2:
+                continue
+            if we[0] in PUNCTUATION:
+                # A word holds no punctuation, so only the whole leading run can be the stripped mark
+                cut = 1
+                while cut < len(we) and we[cut] in PUNCTUATION:
+                    cut += 1
+                if we[:cut] in PUNC_LIST and we[cut:] in words:
+                    we = we[cut:]
+            elif we[-1] in PUNCTUATION:
+                cut = len(we) - 1
+                while we[cut - 1] in PUNCTUATION:
+                    cut -= 1
+                if we[cut:] in PUNC_LIST and we[:cut] in words:
+                    we = we[:cut]
+            tokens.append(we)
+        return tokens
+
+    def score_batch(self, texts):
+        """
+        Returns the VADER compound score of every text, in order.
+        """
+        token_lists = [self.tokenize(t) for t in texts]
+        self._load_tokens({t for tokens in token_lists for t in tokens})
+        return [self._compound(text, tokens) for text, tokens in zip(texts, token_lists)]
+
+    def polarity_compound(self, text):
+        return self.score_batch([text])[0]
+
+    # ----------------------------
+    # NLTK RULES
+    # ----------------------------
+    def _compound(self, text, words):
+        n = len(words)
+        if n == 0:
+            return 0.0
+        info = [self._tokens[w] for w in words]
+        allcaps = sum(1 for i in info if i[4])
+        cap_diff = 0 < n - allcaps < n
+
+        # NLTK scores every occurrence of a word from its first position, so repeats share one valence.
+        # Words outside the lexicon always score 0.
+        valences = {}
+        sentiments = []
+        for idx, item in enumerate(words):
+            if info[idx][1] is None:
+                sentiments.append(0)
+                continue
+            valence = valences.get(item)
+            if valence is None:
+                valence = self._valence_at(idx, words, info, cap_diff)
+                valences[item] = valence
+            sentiments.append(valence)
+        if not any(sentiments):
+            return 0.0
+
+        lowered = [i[0] for i in info]
+        if "but" in lowered:
+            bi = lowered.index("but")
+            for sidx, sentiment in enumerate(sentiments):
+                if sidx < bi:
+                    sentiments[sidx] = sentiment * 0.5
+                elif sidx > bi:
+                    sentiments[sidx] = sentiment * 1.5
+
+        sum_s = float(sum(sentiments))
+        ep_count = min(text.count("!"), 4)
+        qm_count = text.count("?")
+        qm_amplifier = 0
+        if qm_count > 1:
+            qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+        amplifier = ep_count * 0.292 + qm_amplifier
+        if sum_s > 0:
+            sum_s += amplifier
+        elif sum_s < 0:
+            sum_s -= amplifier
+        return round(sum_s / math.sqrt((sum_s * sum_s) + ALPHA), 4)
+
+    def _valence_at(self, i, words, info, cap_diff):
+        low, valence, booster, _, upper = info[i]
+        if booster is not None or (i < len(words) - 1 and low == "kind" and info[i + 1][0] == "of"):
+            return 0
+        if valence is None:
+            return 0
+
+        if upper and cap_diff:
+            if valence > 0:
+                valence += C_INCR
+            else:
+                valence -= C_INCR
+
+        for start_i in range(0, 3):
+            j = i - (start_i + 1)
+            if i > start_i and info[j][1] is None:
+                s = self._scalar(info[j], valence, cap_diff)
+                if start_i == 1 and s != 0:
+                    s = s * 0.95
+                if start_i == 2 and s != 0:
+                    s = s * 0.9
+                valence = valence + s
+                valence = self._never_check(valence, words, info, start_i, i)
+                if start_i == 2:
+                    valence = self._idioms_check(valence, words, i)
+
+        return self._least_check(valence, info, i)
+
+    @staticmethod
+    def _scalar(token, valence, cap_diff):
+        booster = token[2]
+        if booster is None:
+            return 0.0
+        scalar = booster
+        if valence < 0:
+            scalar *= -1
+        if token[4] and cap_diff:
+            if valence > 0:
+                scalar += C_INCR
+            else:
+                scalar -= C_INCR
+        return scalar
+
+    @staticmethod
+    def _never_check(valence, words, info, start_i, i):
+        if start_i == 0:
+            if info[i - 1][3]:
+                valence = valence * N_SCALAR
+        if start_i == 1:
+            if words[i - 2] == "never" and (words[i - 1] == "so" or words[i - 1] == "this"):
+                valence = valence * 1.5
+            elif info[i - 2][3]:
+                valence = valence * N_SCALAR
+        if start_i == 2:
+            if (words[i - 3] == "never" and (words[i - 2] == "so" or words[i - 2] == "this")
+                    or (words[i - 1] == "so" or words[i - 1] == "this")):
+                valence = valence * 1.25
+            elif info[i - 3][3]:
+                valence = valence * N_SCALAR
+        return valence
+
+    def _idioms_check(self, valence, words, i):
+        onezero = f"{words[i - 1]} {words[i]}"
+        twoonezero = f"{words[i - 2]} {words[i - 1]} {words[i]}"
+        twoone = f"{words[i - 2]} {words[i - 1]}"
+        threetwoone = f"{words[i - 3]} {words[i - 2]} {words[i - 1]}"
+        threetwo = f"{words[i - 3]} {words[i - 2]}"
+
+        for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+            if seq in self.idioms:
+                valence = self.idioms[seq]
+                break
+
+        if len(words) - 1 > i:
+            zeroone = f"{words[i]} {words[i + 1]}"
+            if zeroone in self.idioms:
+                valence = self.idioms[zeroone]
+        if len(words) - 1 > i + 1:
+            zeroonetwo = f"{words[i]} {words[i + 1]} {words[i + 2]}"
+            if zeroonetwo in self.idioms:
+                valence = self.idioms[zeroonetwo]
+
+        if threetwo in self.phrase_boosters or twoone in self.phrase_boosters:
+            valence = valence + B_DECR
+        return valence
+
+    def _least_check(self, valence, info, i):
+        if self.least_in_lexicon:
+            return valence
+        if i > 1 and info[i - 1][0] == "least":
+            if info[i - 2][0] != "at" and info[i - 2][0] != "very":
+                valence = valence * N_SCALAR
+        elif i > 0 and info[i - 1][0] == "least":
+            valence = valence * N_SCALAR
+        return valence
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the VADER lexicon into the binary index.")
+    parser.add_argument("--lexicon", default=None, help="vader_lexicon.txt, defaults to the NLTK data copy")
+    parser.add_argument("--output", default=INDEX_FILE)
+    args = parser.parse_args()
+
+    if args.lexicon:
+        with open(args.lexicon, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        import nltk.data
+        text = nltk.data.load(NLTK_LEXICON)
+    print(f"Index written to {compile_index(text, args.output)}")
@@ -68,4 +68,102 @@ def json_to_csv_from_data(json_path, csv_path=None):
         writer.writerows(data)
 
     print(f"Converted {len(data)} rows into {csv_path}")
-    return csv_path
\ No newline at end of file
+    return csv_path
+
+
+# -------------------------
+# Streaming readers
+# -------------------------
+def iter_json_array(path, block_size=1 << 16):
+    """
+    Yields the objects of a JSON array file one at a time without loading the whole file.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, eof = "", False
+
+        def read_more():
+            nonlocal buf, eof
+            more = f.read(block_size)
+            eof = not more
+            buf += more
+
+        # Skip leading whitespace, however long
+        while not buf.lstrip() and not eof:
+            buf = ""
+            read_more()
+        buf = buf.lstrip()
+        if not buf.startswith("["):
+            raise ValueError(f"{path} does not contain a JSON array")
+        buf = buf[1:]
+
+        while True:
+            buf = buf.lstrip()
+            if not buf:
+                if eof:
+                    raise ValueError(f"{path} ends before the JSON array is closed")
+                read_more()
+                continue
+            if buf[0] == "]":
+                return
+            if buf[0] == ",":
+                buf = buf[1:]
+                continue
+
+            try:
+                obj, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                # Object cut off at the block boundary, read more
+                if eof:
+                    raise
+                read_more()
+                continue
+            # A number cut off at the block boundary still decodes ("1234" -> "12"), so a value is
+            # only complete once a delimiter follows it
+            if end == len(buf) or buf[end] not in " \t\r\n,]":
+                if not eof:
+                    read_more()
+                    continue
+                if end < len(buf):
+                    raise ValueError(f"Unexpected {buf[end]!r} after a value in {path}")
+            yield obj
+            buf = buf[end:]
+
+
+def iter_records(path):
+    """
+    Yields the records of a JSON / JSONL / CSV / TXT input one at a time.
+    JSON and CSV rows come out as dicts, TXT lines as raw strings.
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext in [".json", ".jsonl"]:
+        with open(path, "r", encoding="utf-8") as f:
+            first = ""
+            while not first:
+                block = f.read(1 << 10)
+                if not block:
+                    break
+                first = block.lstrip()[:1]
+        if first == "[":
+            yield from iter_json_array(path)
+        else:
+            # JSON lines saved with a .json extension (UCSD dumps)
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    elif ext == ".csv":
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+    elif ext == ".txt":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import random
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from sklearn.metrics import average_precision_score, roc_auc_score
+from train_catboost import (CHANCES, DATA_FOLDER, DATASETS_FOLDER, DENSE_TEXT_FEATURES, INPUT_FILE, MAXITERS,
+                            MAXTREEDEPTH, NUMBEROFKFOLDS, PROJECT_ROOT, RATE, load_training_data, prepare_dataset,
+                            quantization_params, train_folds)
+
+"""
+Hyperparameter search for train_catboost.py with successive halving.
+
+    python src/hyperparameter_search.py --trials 27 --workers 4
+
+Trials are drawn from SEARCH_SPACE (the whole grid when it is no larger than --trials, a random sample of it
+otherwise). Every trial is first trained on a few folds with a small iteration budget; only the best 1/eta of
+them by OOF average precision go on to the next rung, which trains more folds for more iterations, up to the
+full GroupKFold with MAXITERS on the last rung. Trials of a rung run side by side in worker processes, each
+with cores // workers CatBoost threads.
+
+Trials are trained with train_catboost.train_folds, so their folds are checkpointed like any training run:
+a promoted trial whose iteration budget does not change keeps the folds it already trained, an interrupted
+search resumes where it stopped, and train_catboost.train(params=best) reuses the folds of the winner.
+
+Every trial and rung is appended to a JSONL log with its OOF AP / ROC-AUC, the training and wall time, and
+the trees kept per fold (the scoring cost of the ensemble).
+"""
+
+# ----------------------------
+# CONSTANTS
+# ----------------------------
+SEARCH_FOLDER = os.path.join(PROJECT_ROOT, "outputs", "search")
+
+# Around the constants of train_catboost.py
+SEARCH_SPACE = {
+    "learning_rate": [0.03, 0.1, RATE],
+    "depth": [4, 6, MAXTREEDEPTH],
+    "l2_leaf_reg": [1, 3, 10],
+    "early_stopping_rounds": [50, CHANCES],
+}
+# (folds, iterations) per rung, the last one is the full training
+RUNGS = [(2, MAXITERS // 4), (5, MAXITERS), (NUMBEROFKFOLDS, MAXITERS)]
+ETA = 3
+
+
+def sample_trials(space=None, n_trials=27, seed=0):
+    """
+    Returns:
+        list: parameter dicts, the full grid when it has at most n_trials points
+    """
+    space = space or SEARCH_SPACE
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if len(grid) <= n_trials:
+        return grid
+    return random.Random(seed).sample(grid, n_trials)
+
+
+# ----------------------------
+# TRIALS
+# ----------------------------
+# Filled before a rung's workers fork, they read the data and the prepared Pool from here
+_SHARED_SEARCH = {}
+
+
+def run_trial(trial, params, folds, n_folds, thread_count):
+    """
+    Trains one trial on the given folds, reusing the ones already checkpointed.
+
+    Returns:
+        dict: the log record of the trial at this rung
+    """
+    started = time.perf_counter()
+    data = _SHARED_SEARCH["data"]
+    oof, results, run_dir = train_folds(data, params, n_folds, n_workers=1, thread_count=thread_count, folds=folds,
+                                        verbose=0)
+    seen = ~np.isnan(oof)
+    y = data["y"][seen]
+    return {
+        "trial": trial,
+        "params": params,
+        "folds": len(folds),
+        "oof_ap": float(average_precision_score(y, oof[seen])),
+        "oof_auc": float(roc_auc_score(y, oof[seen])),
+        # Fold seconds are kept in the checkpoints, so reused folds still count what they cost
+        "train_s": float(sum(r["seconds"] for r in results)),
+        "wall_s": time.perf_counter() - started,
+        "trees_per_fold": float(np.mean([r["best_iteration"] + 1 for r in results])),
+        "run_dir": run_dir,
+    }
+
+
+def _run_rung(trials, folds, n_folds, n_workers, thread_count):
+    if n_workers <= 1 or len(trials) <= 1:
+        return [run_trial(trial, params, folds, n_folds, thread_count) for trial, params in trials]
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise RuntimeError("Parallel trials need the fork start method, use n_workers=1")
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(trials)), mp_context=context) as executor:
+        futures = [executor.submit(run_trial, trial, params, folds, n_folds, thread_count) for trial, params in trials]
+        return [future.result() for future in as_completed(futures)]
+
+
+# ----------------------------
+# SUCCESSIVE HALVING
+# ----------------------------
+def successive_halving(data, trials, rungs=None, eta=ETA, n_folds=NUMBEROFKFOLDS, n_workers=1, thread_count=None,
+                       log_path=None, dataset_folder=DATASETS_FOLDER):
+    """
+    Args:
+        data (dict): train_catboost.load_training_data output.
+        trials (list): Parameter dicts (sample_trials).
+        rungs (list, optional): (folds, iterations) per rung. Defaults to RUNGS.
+        eta (int): 1/eta of the trials of a rung are promoted to the next one.
+        n_workers (int): Trials trained at the same time.
+        thread_count (int, optional): CatBoost threads per trial. Defaults to cores // n_workers.
+        log_path (str, optional): JSONL log. Defaults to outputs/search/<date>.jsonl.
+    Returns:
+        tuple: (best record of the last rung, all records)
+    """
+    rungs = rungs or RUNGS
+    thread_count = thread_count or max(1, (os.cpu_count() or 1) // n_workers)
+    log_path = log_path or os.path.join(SEARCH_FOLDER, time.strftime("%Y%m%d-%H%M%S") + ".jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+
+    # Prepared once for every trial and rung, so the trials have to share its borders
+    quantization = {json.dumps(quantization_params(params), sort_keys=True) for params in trials}
+    if len(quantization) > 1:
+        raise ValueError("Trials with different quantization parameters cannot share the training pool, "
+                         "search them separately")
+    data = dict(data, pool=prepare_dataset(data, dataset_folder, trials[0] if trials else None))
+    _SHARED_SEARCH["data"] = data
+    alive = list(enumerate(trials))
+    records = []
+    try:
+        for rung, (rung_folds, iterations) in enumerate(rungs):
+            folds = list(range(1, min(rung_folds, n_folds) + 1))
+            started = time.perf_counter()
+            rung_trials = [(trial, dict(params, iterations=iterations)) for trial, params in alive]
+            results = sorted(_run_rung(rung_trials, folds, n_folds, n_workers, thread_count),
+                             key=lambda r: r["oof_ap"], reverse=True)
+            with open(log_path, "a", encoding="utf-8") as f:
+                for record in results:
+                    record["rung"] = rung
+                    f.write(json.dumps(record) + "\n")
+            records.extend(results)
+            print(f"⏱️ Rung {rung}: {len(results)} trials on {len(folds)} folds x {iterations} iterations "
+                  f"in {time.perf_counter() - started:.1f}s, best OOF AP {results[0]['oof_ap']:.4f}")
+
+            if rung < len(rungs) - 1:
+                keep = {r["trial"] for r in results[:max(1, len(results) // eta)]}
+                alive = [(trial, params) for trial, params in alive if trial in keep]
+    finally:
+        _SHARED_SEARCH.clear()
+
+    print(f"✅ Search log saved to {log_path}")
+    return results[0], records
+
+
+def print_records(records):
+    print(f"{'rung':>4} {'trial':>5} {'folds':>5} {'OOF AP':>7} {'AUC':>6} {'train s':>8} {'wall s':>7} "
+          f"{'trees':>6}  params")
+    for r in records:
+        params = {k: v for k, v in r["params"].items() if k != "iterations"}
+        print(f"{r['rung']:>4} {r['trial']:>5} {r['folds']:>5} {r['oof_ap']:7.4f} {r['oof_auc']:6.3f} "
+              f"{r['train_s']:8.1f} {r['wall_s']:7.1f} {r['trees_per_fold']:6.0f}  {params}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving search over the CatBoost fold parameters.")
+    parser.add_argument("--input", default=os.path.join(DATA_FOLDER, INPUT_FILE))
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=ETA)
+    parser.add_argument("--rungs", nargs="+", default=None, metavar="FOLDSxITERATIONS",
+                        help="e.g. 2x500 5x2000 10x2000, defaults to RUNGS")
+    parser.add_argument("--workers", type=int, default=1, help="Trials trained at the same time")
+    parser.add_argument("--thread-count", type=int, default=None, help="CatBoost threads per trial")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", default=None, help="JSONL log. Defaults to outputs/search/<date>.jsonl")
+    parser.add_argument("--dense-text-features", action="store_true", default=DENSE_TEXT_FEATURES)
+    args = parser.parse_args()
+
+    training = load_training_data(args.input, args.dense_text_features)
+    rung_budgets = [tuple(int(v) for v in rung.split("x")) for rung in args.rungs] if args.rungs else None
+    best, all_records = successive_halving(training, sample_trials(n_trials=args.trials, seed=args.seed),
+                                           rung_budgets, args.eta, n_workers=args.workers,
+                                           thread_count=args.thread_count, log_path=args.log)
+    print_records(all_records)
+    print(f"\nBest: {json.dumps(best['params'])}")
+    print(f"Train it with: python src/train_catboost.py --params '{json.dumps(best['params'])}'")
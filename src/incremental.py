@@ -0,0 +1,387 @@
+import os
+import sys
+import io
+import csv
+import json
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from itertools import chain, islice
+
+import pandas as pd
+
+from helpers import iter_records
+from ucsd_json_standardization import categories, is_ucsd_records, standardize_review
+from schema_inference import SAMPLE_SIZE, infer_schema, apply_schema, describe_schema, fill_unmapped
+from llm_cache import normalize_review
+from pipeline import CHUNK_SIZE, GPT_BATCH_SIZE, INPUT_FOLDER, OUTPUT_FOLDER, iter_chunks
+from inference import KEEP_COLS, MODEL_FOLDER
+from storage import artifact_path, save_frame, load_frame
+
+"""
+Incremental scoring of an append-only review feed.
+run_inference and run_streaming_pipeline rescore the whole input on every run. run_incremental keeps a results
+store next to the outputs and, on each run, only standardizes, enriches and scores the reviews it has not seen:
+
+- Raw records are recognised by a hash of their content. A watermark (the latest review time seen, with the hash
+  of that review) lets records newer than it skip the lookup, and for line-based inputs (JSONL / CSV / TXT) the
+  byte offset reached last time lets the next run start reading where the previous one stopped. A record whose
+  GPT request failed is not marked as seen, and the offset stops before it, so the next run tries it again.
+- Scored reviews are identified by user_id + gmap_id + time (or their content when those are missing), so a
+  review that comes back edited replaces its earlier result instead of being counted twice.
+- Results are partitioned by month of the review time. A run rewrites only the partitions it touches and
+  updates their spam / ham counts, and the summary is the sum of the per-partition counts.
+"""
+
+STATE_FILE = "state.sqlite"
+TAIL_BYTES = 4096
+LINE_EXTENSIONS = [".jsonl", ".json", ".csv", ".txt"]
+RESULT_COLS = KEEP_COLS + ["record_key"]
+
+
+def content_hash(record):
+    return hashlib.blake2b(normalize_review(record).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def record_key(entry):
+    # A review keeps its key when its text or rating is edited
+    if entry.get("user_id") is not None and entry.get("time") is not None:
+        identity = f"{entry['user_id']}|{entry.get('gmap_id')}|{entry['time']}"
+    else:
+        identity = normalize_review({k: entry.get(k) for k in ("user_id", "user_name", "gmap_id", "time", "text")})
+    return hashlib.blake2b(identity.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def partition_of(time_ms):
+    try:
+        return datetime.fromtimestamp(int(time_ms) / 1000, tz=timezone.utc).strftime("%Y-%m")
+    except (TypeError, ValueError, OverflowError, OSError):
+        return "unknown"
+
+
+# ----------------------------
+# RESULTS STORE
+# ----------------------------
+class ResultsStore:
+    """
+    Scored reviews partitioned by month, with the state of the feed.
+
+    Args:
+        folder (str): Store directory (state.sqlite and one results file per partition).
+        fmt (str): Storage format of the partitions, see storage.py.
+    """
+
+    def __init__(self, folder, fmt="csv"):
+        self.folder = folder
+        self.fmt = fmt
+        os.makedirs(os.path.join(folder, "partitions"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(folder, STATE_FILE))
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS seen (hash TEXT PRIMARY KEY)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS records (record_key TEXT PRIMARY KEY, partition TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS aggregates "
+                            "(partition TEXT PRIMARY KEY, n_rows INTEGER NOT NULL, n_spam INTEGER NOT NULL)")
+
+    def get(self, key, default=None):
+        row = self.db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def set(self, key, value):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO state VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _select(self, table, column, values, extra=""):
+        values = list(values)
+        rows = []
+        for i in range(0, len(values), 500):
+            batch = values[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            rows.extend(self.db.execute(f"SELECT {column}{extra} FROM {table} WHERE {column} IN ({marks})", batch))
+        return rows
+
+    def seen(self, hashes):
+        return {row[0] for row in self._select("seen", "hash", set(hashes))}
+
+    def mark_seen(self, hashes):
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO seen VALUES (?)", [(h,) for h in hashes])
+
+    def partition_path(self, partition):
+        return artifact_path(os.path.join(self.folder, "partitions"), partition, self.fmt)
+
+    def merge(self, df):
+        """
+        Adds scored reviews (RESULT_COLS + "partition"), replacing earlier results with the same record_key.
+        """
+        df = df.drop_duplicates("record_key", keep="last")
+        previous = dict(self._select("records", "record_key", df["record_key"], ", partition"))
+        touched = set(df["partition"]) | set(previous.values())
+        keys = set(df["record_key"])
+
+        for partition in sorted(touched):
+            path = self.partition_path(partition)
+            frames = [df.loc[df["partition"] == partition, RESULT_COLS]]
+            if os.path.exists(path):
+                old = load_frame(path)
+                frames.insert(0, old[~old["record_key"].isin(keys)])
+            frames = [f for f in frames if len(f)]
+            merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RESULT_COLS)
+            save_frame(merged, path)
+            n_spam = int((merged["decision"] == 1).sum())
+            with self.db:
+                self.db.execute("INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?)", (partition, len(merged), n_spam))
+
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO records VALUES (?, ?)",
+                                list(zip(df["record_key"], df["partition"])))
+        return len(previous)
+
+    def summary(self):
+        n_rows, n_spam = self.db.execute("SELECT COALESCE(SUM(n_rows), 0), COALESCE(SUM(n_spam), 0) "
+                                         "FROM aggregates").fetchone()
+        return {"reviews": n_rows, "spam": n_spam, "ham": n_rows - n_spam}
+
+    def load(self):
+        # Every stored result, oldest partition first
+        partitions = [p for (p,) in self.db.execute("SELECT partition FROM aggregates ORDER BY partition")]
+        frames = [load_frame(self.partition_path(p)) for p in partitions]
+        frames = [f for f in frames if len(f)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RESULT_COLS)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ----------------------------
+# READING THE NEW PART OF THE FEED
+# ----------------------------
+def _tail_digest(path, offset):
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - TAIL_BYTES))
+        return hashlib.blake2b(f.read(offset - max(0, offset - TAIL_BYTES)), digest_size=16).hexdigest()
+
+
+def _is_line_based(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in LINE_EXTENSIONS:
+        return False
+    if ext == ".json":
+        # A JSON array cannot be resumed from an offset, JSON lines can
+        with open(path, "rb") as f:
+            return f.read(1 << 10).lstrip()[:1] not in (b"[", b"")
+    return True
+
+
+def iter_lines_from(path, offset, progress):
+    """
+    Yields the records of a line-based input from a byte offset, only up to the last complete line.
+    progress["offset"] follows the end of the last line read.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        header = None
+        if ext == ".csv":
+            first = f.readline()
+            header = next(csv.reader([first.decode("utf-8-sig")]), [])
+            offset = max(offset, len(first))
+        progress["offset"] = offset
+        f.seek(offset)
+        pending = b""
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # still being written
+            if ext == ".csv" and (pending + line).count(b'"') % 2:
+                pending += line  # a quoted field goes on over the next line
+                continue
+            line, pending = pending + line, b""
+            offset += len(line)
+            progress["offset"] = offset
+            text = line.decode("utf-8").strip()
+            if not text:
+                continue
+            if ext == ".csv":
+                yield dict(zip(header, next(csv.reader(io.StringIO(text)))))
+            elif ext == ".txt":
+                yield text
+            else:
+                yield json.loads(text)
+
+
+def _open_feed(path, store, full_scan):
+    # Returns (records, progress). Resumes from the last offset when the file only grew since then
+    progress = {"offset": 0}
+    if not _is_line_based(path):
+        return iter_records(path), progress
+
+    last = store.get("input", {})
+    offset = 0
+    if (not full_scan and last.get("path") == os.path.abspath(path) and 0 < last.get("offset", 0)
+            <= os.path.getsize(path) and _tail_digest(path, last["offset"]) == last.get("tail")):
+        offset = last["offset"]
+    progress["offset"] = offset
+    return iter_lines_from(path, offset, progress), progress
+
+
+# ----------------------------
+# DRIVER
+# ----------------------------
+def _standardize(record, layout):
+    # Without GPT: UCSD records and records the inferred schema maps. None for the others
+    if layout["ucsd"] and isinstance(record, dict):
+        return standardize_review(record)
+    return apply_schema(record, layout["mapping"])
+
+
+def _with_offsets(records, progress):
+    # (record, byte offset its line starts at) pairs, the offset stays 0 for inputs that are not line-based
+    start = progress["offset"]
+    for record in records:
+        yield record, start
+        start = progress["offset"]
+
+
+def _standardize_new(records, entries, llm_cache, transport):
+    """
+    Returns:
+        tuple: (standardized records in input order, positions of the records whose GPT request failed)
+    """
+    leftover_at = [i for i, entry in enumerate(entries) if entry is None]
+    if not leftover_at:
+        return list(entries), []
+    from parse_file import gpt_extract_by_review
+    raw = [records[i] if isinstance(records[i], str) else json.dumps(records[i]) for i in leftover_at]
+    answers = gpt_extract_by_review(raw, GPT_BATCH_SIZE, transport=transport, cache=llm_cache)
+    failed = [i for i, answer in zip(leftover_at, answers) if answer is None]
+    return fill_unmapped(entries, answers), failed
+
+
+def run_incremental(input_file, store_folder=None, chunk_size=CHUNK_SIZE, model_folder=MODEL_FOLDER, llm_cache=None,
+                    full_scan=False, fmt="csv", transport=None):
+    """
+    Scores the reviews of an input that were not scored by an earlier run and merges them into the results store.
+
+    Args:
+        input_file (str): File name inside the input folder (or a full path).
+        store_folder (str, optional): Results store. Defaults to outputs/<base>_incremental.
+        chunk_size (int): Records held in memory at once.
+        model_folder (str): Folder holding the fold models.
+        llm_cache (LLMCache, optional): Reviews GPT standardized before are not sent again.
+        full_scan (bool): Read the whole input instead of resuming from the last offset (records already
+                          scored are still skipped).
+        fmt (str): Storage format of the partitions, see storage.py.
+        transport (callable, optional): async prompt -> output text for GPT, see llm_client.py.
+    Returns:
+        dict: reviews / spam / ham over the whole store, and the new / changed / skipped / failed counts of this
+              run. Records whose GPT request failed are not marked as seen, and the next run reads them again.
+    """
+    full_input_path = input_file if os.path.isabs(input_file) else os.path.join(INPUT_FOLDER, input_file)
+    if not os.path.exists(full_input_path):
+        print(f"Error: {input_file} not found in {INPUT_FOLDER}")
+        sys.exit(1)
+    base_name = os.path.splitext(os.path.basename(full_input_path))[0]
+    store = ResultsStore(store_folder or os.path.join(OUTPUT_FOLDER, f"{base_name}_incremental"), fmt)
+
+    records, progress = _open_feed(full_input_path, store, full_scan)
+    records = _with_offsets(iter(records), progress)
+    layout = store.get("layout")
+    if layout is None:
+        # Decided once from the head of the feed, later runs may only see its tail
+        head = list(islice(records, SAMPLE_SIZE))
+        ucsd = is_ucsd_records([r for r, _ in head])
+        layout = {"ucsd": ucsd, "mapping": {} if ucsd else infer_schema([r for r, _ in head])}
+        if not ucsd:
+            print(f"Schema: {describe_schema(layout['mapping'])}")
+        records = chain(head, records)
+
+    watermark = store.get("watermark", {"time": None, "hash": None})
+    scorer = None
+    run = {"new": 0, "changed": 0, "skipped": 0, "failed": 0}
+    # Line offset of the first record whose GPT request failed, the next run starts reading there again
+    retry_offset = None
+
+    for pairs in iter_chunks(records, chunk_size):
+        chunk = [r for r, _ in pairs]
+        hashes = [content_hash(r) for r in chunk]
+        entries = [_standardize(r, layout) for r in chunk]
+        times = [e["time"] if e is not None and isinstance(e["time"], int) else None for e in entries]
+
+        # Records newer than the watermark cannot have been seen, only the others are looked up
+        wm_time = watermark["time"]
+        lookup = [h for h, t in zip(hashes, times)
+                  if (wm_time is None or t is None or t <= wm_time) and h != watermark["hash"]]
+        known = store.seen(lookup) | {watermark["hash"]}
+
+        new, new_entries, new_hashes, new_offsets = [], [], {}, []
+        for (record, offset), entry, h in zip(pairs, entries, hashes):
+            if h in known or h in new_hashes:
+                run["skipped"] += 1
+                continue
+            new.append(record)
+            new_entries.append(entry)
+            new_hashes[h] = None
+            new_offsets.append(offset)
+
+        failed = set()
+        if new:
+            standardized, failed_at = _standardize_new(new, new_entries, llm_cache, transport)
+            failed = {list(new_hashes)[i] for i in failed_at}
+            if failed_at:
+                run["failed"] += len(failed_at)
+                first = min(new_offsets[i] for i in failed_at)
+                retry_offset = first if retry_offset is None else min(retry_offset, first)
+            if standardized:
+                if scorer is None:
+                    from scoring_service import ReviewScorer
+                    scorer = ReviewScorer(model_folder)  # only loaded when there is something to score
+                df = pd.DataFrame.from_records(standardized, columns=categories)
+                df = scorer.score_prepared(scorer.prepare(df))
+                df["record_key"] = [record_key(e) for e in standardized]
+                df["partition"] = [partition_of(t) for t in df["time"]]
+                replaced = store.merge(df)
+                run["changed"] += replaced
+                run["new"] += len(df) - replaced
+            store.mark_seen(h for h in new_hashes if h not in failed)
+
+        for h, t in zip(hashes, times):
+            if h in failed:
+                continue
+            if t is not None and (watermark["time"] is None or t > watermark["time"]):
+                watermark = {"time": t, "hash": h}
+        store.set("watermark", watermark)
+
+    store.set("layout", layout)
+    if _is_line_based(full_input_path):
+        offset = progress["offset"] if retry_offset is None else retry_offset
+        store.set("input", {"path": os.path.abspath(full_input_path), "offset": offset,
+                            "tail": _tail_digest(full_input_path, offset)})
+
+    summary = store.summary()
+    store.close()
+    print(f"{run['new']} new and {run['changed']} changed reviews scored, {run['skipped']} already scored.")
+    if run["failed"]:
+        print(f"⚠️ {run['failed']} reviews not standardized (GPT request failed), retried on the next run.")
+    print(f"Summary: {summary['spam']} likely spam, {summary['ham']} likely ham out of {summary['reviews']} reviews.")
+    return {**summary, **run}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score only the reviews added to a feed since the last run.")
+    parser.add_argument("input_file", help="File inside the input folder")
+    parser.add_argument("--store", default=None, help="Results store folder")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--full-scan", action="store_true", help="Re-read the whole input")
+    parser.add_argument("--fmt", default="csv", choices=["csv", "parquet", "feather"])
+    args = parser.parse_args()
+
+    from llm_cache import LLMCache
+    with LLMCache() as llm_cache:
+        run_incremental(args.input_file, args.store, args.chunk_size, llm_cache=llm_cache, full_scan=args.full_scan,
+                        fmt=args.fmt)
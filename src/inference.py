@@ -2,8 +2,13 @@ import os
 import numpy as np
 import pandas as pd
 import joblib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from catboost import CatBoostClassifier, Pool
 import os
+from storage import artifact_path, save_frame, load_frame
+from instrumentation import stage, timed
+from text_features import add_text_features, check_model_version, uses_text_features
 
 try:
     PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
@@ -14,31 +19,34 @@ DATA_FOLDER = os.path.join(PROJECT_ROOT, "data")
 MODEL_FOLDER = os.path.join(PROJECT_ROOT, "model")
 OUTPUT_FOLDER = os.path.join(PROJECT_ROOT, "outputs")
 
-def run_inference(base_name: str):
-    
-    input_path = os.path.join(DATA_FOLDER, f"{base_name}_final.csv")
-    output_path = os.path.join(OUTPUT_FOLDER, f"{base_name}_results.csv")
+NUMBEROFKFOLDS = 10
+EXECUTION_MODES = ["serial", "threads", "processes", "catboost-native"]
+FUSED_MODEL_FILE = "ensemble_fused.joblib"
+EARLY_EXIT_RULES = ["margin", "bound"]
+EARLY_EXIT_MARGIN = 0.15
+EARLY_EXIT_MIN_FOLDS = 2
+KEEP_COLS = ["vader_category", "time", "rating", "text", "user_name", "probability", "decision", "verdict"]
 
-    # Make sure output folder exists
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-    # Load input data
-    df = pd.read_csv(input_path)
+def load_metadata(model_folder=MODEL_FOLDER):
+    """
+    Loads the feature metadata saved by train_catboost.py.
 
-    # Load metadata
-    feature_order = joblib.load(os.path.join(MODEL_FOLDER, "features.pkl"))
-    cat_features = joblib.load(os.path.join(MODEL_FOLDER, "cat_features.pkl"))
-    text_features = joblib.load(os.path.join(MODEL_FOLDER, "text_features.pkl"))
-    best_threshold = joblib.load(os.path.join(MODEL_FOLDER, "threshold.pkl"))
+    Returns:
+        tuple: (feature_order, cat_features, text_features, best_threshold)
+    """
+    check_model_version(model_folder)
+    feature_order = joblib.load(os.path.join(model_folder, "features.pkl"))
+    cat_features = joblib.load(os.path.join(model_folder, "cat_features.pkl"))
+    text_features = joblib.load(os.path.join(model_folder, "text_features.pkl"))
+    best_threshold = joblib.load(os.path.join(model_folder, "threshold.pkl"))
+    return feature_order, cat_features, text_features, best_threshold
 
-    # Match training feature order
-    X = df[feature_order]
-    pool = Pool(X, cat_features=cat_features, text_features=text_features)
 
-    # Load fold models
+def load_fold_models(model_folder=MODEL_FOLDER, n_folds=NUMBEROFKFOLDS):
     models = []
-    for i in range(1, 11):
-        fold_path = os.path.join(MODEL_FOLDER, f"fold_{i}.cbm")
+    for i in range(1, n_folds + 1):
+        fold_path = os.path.join(model_folder, f"fold_{i}.cbm")
         if os.path.exists(fold_path):
             m = CatBoostClassifier()
             m.load_model(fold_path)
@@ -46,24 +54,287 @@ def run_inference(base_name: str):
 
     if not models:
         raise RuntimeError("No fold models found in model folder!")
+    return models
 
-    # Ensemble predictions
-    fold_predictions = [m.predict_proba(pool)[:, 1] for m in models]
-    probabilities = np.mean(fold_predictions, axis=0)
-    decisions = (probabilities >= best_threshold).astype(int)
 
-    # Add results
+def build_pool(df, feature_order, cat_features, text_features, label=None, text_cache=None):
+    # Models trained on dense text features get them here, from text_cache when given (text_features.py)
+    if uses_text_features(feature_order) and not set(feature_order) <= set(df.columns):
+        df = add_text_features(df, cache=text_cache)
+
+    # Match training feature order
+    X = df[feature_order].copy()
+
+    # CSV round-trips turn long numeric ids back into Python ints, CatBoost wants strings
+    for i in cat_features + text_features:
+        col = feature_order[i]
+        values = X[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Columnar artifacts keep categoricals, which cannot be filled with a new category
+            values = values.astype(object)
+        X[col] = values.fillna("unknown").astype(str)
+
+    return Pool(X, label=label, cat_features=cat_features, text_features=text_features)
+
+
+# Forked workers inherit the models and the Pool through this instead of pickling them
+_SHARED_FOLDS = {}
+
+
+def _predict_shared_fold(i, thread_count):
+    return _SHARED_FOLDS["models"][i].predict_proba(_SHARED_FOLDS["pool"], thread_count=thread_count)[:, 1]
+
+
+def ensemble_predict(models, pool, mode="serial", n_workers=None, thread_count=-1):
+    """
+    Averages the fold probabilities for every row of the pool.
+
+    Args:
+        models (list): Fold models.
+        pool (Pool): Features built once and shared by every fold.
+        mode (str): "serial" scores the folds one after another,
+                    "threads" scores them concurrently in a thread pool (CatBoost releases the GIL),
+                    "processes" scores them in forked worker processes that share the parent's Pool,
+                    "catboost-native" scores them one after another with CatBoost's own threading,
+                    every core per model unless thread_count says otherwise.
+        n_workers (int, optional): Folds scored at the same time. Defaults to min(folds, cores).
+        thread_count (int): CatBoost threads per model. -1 keeps CatBoost's default, except for the
+                            concurrent modes where it defaults to cores // n_workers.
+    Returns:
+        np.ndarray: Mean spam probability per row
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode '{mode}'. Choose from {EXECUTION_MODES}")
+
+    cores = os.cpu_count() or 1
+    if n_workers is None:
+        n_workers = min(len(models), cores)
+    if thread_count == -1 and mode in ("threads", "processes"):
+        thread_count = max(1, cores // n_workers)
+
+    if mode == "serial":
+        fold_predictions = [m.predict_proba(pool, thread_count=thread_count)[:, 1] for m in models]
+
+    elif mode == "catboost-native":
+        native_threads = cores if thread_count == -1 else thread_count
+        fold_predictions = [m.predict_proba(pool, thread_count=native_threads)[:, 1] for m in models]
+
+    elif mode == "threads":
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            fold_predictions = list(executor.map(lambda m: m.predict_proba(pool, thread_count=thread_count)[:, 1], models))
+
+    else:
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("'processes' mode needs the fork start method, use 'threads' on this platform")
+        _SHARED_FOLDS["models"], _SHARED_FOLDS["pool"] = models, pool
+        try:
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("fork")) as executor:
+                fold_predictions = list(executor.map(_predict_shared_fold, range(len(models)), [thread_count] * len(models)))
+        finally:
+            _SHARED_FOLDS.clear()
+
+    return np.mean(fold_predictions, axis=0)
+
+
+def adaptive_predict(models, pool, best_threshold, rule="margin", margin=EARLY_EXIT_MARGIN,
+                     min_folds=EARLY_EXIT_MIN_FOLDS, thread_count=-1):
+    """
+    Scores the folds one after another, each only on the rows still undecided. A row leaves once its
+    decision is settled, its probability is then the mean of the folds it went through.
+
+    Args:
+        models (list): Fold models, scored in this order.
+        pool (Pool): Features of every row.
+        best_threshold (float): Decision threshold (threshold.pkl).
+        rule (str): "margin" settles a row once its running mean is more than margin away from the threshold,
+                    so the remaining folds could still flip it, rarely.
+                    "bound" settles it once the remaining folds cannot flip it whatever they predict
+                    (each adds between 0 and 1), so the decisions always match the full ensemble.
+        margin (float): Distance to the threshold for the "margin" rule.
+        min_folds (int): Folds every row goes through before it can leave.
+        thread_count (int): CatBoost threads per model.
+    Returns:
+        tuple: (spam probability per row, folds evaluated per row)
+    """
+    if rule not in EARLY_EXIT_RULES:
+        raise ValueError(f"Unknown early exit rule '{rule}'. Choose from {EARLY_EXIT_RULES}")
+
+    n_rows, n_folds = pool.num_row(), len(models)
+    sums = np.zeros(n_rows)
+    folds_used = np.zeros(n_rows, dtype=np.int32)
+    active = np.arange(n_rows)
+    for k, model in enumerate(models, start=1):
+        rows = pool if len(active) == n_rows else pool.slice(active)
+        sums[active] += model.predict_proba(rows, thread_count=thread_count)[:, 1]
+        folds_used[active] = k
+        if k < min_folds or k == n_folds:
+            continue
+
+        partial = sums[active]
+        if rule == "margin":
+            settled = np.abs(partial / k - best_threshold) > margin
+        else:
+            settled = (partial >= best_threshold * n_folds) | (partial + (n_folds - k) < best_threshold * n_folds)
+        active = active[~settled]
+        if not len(active):
+            break
+
+    return sums / np.maximum(folds_used, 1), folds_used
+
+
+class FusedEnsemble:
+    """
+    Single model standing in for the fold ensemble, written by export_ensemble.py. One pass per review.
+
+    kind == "summed": the fold trees in one CatBoost model with their leaf values averaged.
+    kind == "distilled": one CatBoost model trained to reproduce the fold-average probabilities,
+                         used when CatBoost cannot sum the folds (text features).
+    """
+
+    def __init__(self, kind, model, feature_order, cat_features, text_features, best_threshold):
+        self.kind = kind
+        self.model = model
+        self.feature_order = feature_order
+        self.cat_features = cat_features
+        self.text_features = text_features
+        self.best_threshold = best_threshold
+
+    def predict_proba(self, pool, thread_count=-1):
+        return self.model.predict(pool, prediction_type="Probability", thread_count=thread_count)[:, 1]
+
+
+def load_fused_model(model_folder=MODEL_FOLDER):
+    path = os.path.join(model_folder, FUSED_MODEL_FILE)
+    if not os.path.exists(path):
+        raise RuntimeError(f"No fused model at {path}, run export_ensemble.py first")
+    return joblib.load(path)
+
+
+def add_verdicts(df, probabilities, best_threshold, decisions=None):
+    # decisions (optional): already taken, e.g. by the cascade's first tier for the reviews it settled
+    if decisions is None:
+        decisions = (probabilities >= best_threshold).astype(int)
+
     df["probability"] = probabilities
     df["decision"] = decisions
     df["verdict"] = df["decision"].map({1: "likely spam", 0: "likely ham"})
+    return df
+
+
+@timed("inference")
+def run_inference(base_name: str, use_fused=False, execution_mode="serial", n_workers=None, thread_count=-1,
+                  fmt="csv", cache=None, text_cache=None, early_exit=None, early_exit_margin=EARLY_EXIT_MARGIN,
+                  use_cascade=False):
+    # text_cache (TextFeatureCache, optional): text features computed in earlier runs, for models trained on them
+    # early_exit ("margin" or "bound", optional): stop scoring a review once its decision is settled,
+    # see adaptive_predict
+    # use_cascade: let the first tier (cascade.py) decide the clear reviews, the fold ensemble scores the rest
+
+    # fmt picks the storage format of both the _final input and the _results output, see storage.py
+    input_path = artifact_path(DATA_FOLDER, f"{base_name}_final", fmt)
+    output_path = artifact_path(OUTPUT_FOLDER, f"{base_name}_results", fmt)
+
+    # Make sure output folder exists
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+
+    entry = None
+    if cache is not None:
+        # Keyed on the model files too: retraining or re-exporting invalidates the results.
+        # The execution mode only changes how the folds are spread, not the probabilities.
+        # Early exit changes the probabilities of the settled reviews, so it is part of the key
+        config = {"use_fused": use_fused, "fmt": fmt}
+        if early_exit:
+            config.update(early_exit=early_exit, early_exit_margin=early_exit_margin)
+        if use_cascade:
+            config.update(use_cascade=True)
+        entry = cache.entry("inference", [input_path], [output_path], config=config,
+                            code=["inference", "cascade", "text_features", "storage"],
+                            artifacts=[MODEL_FOLDER])
+        if entry.restore():
+            return load_frame(output_path), output_path
+
+    # Load input data
+    with stage("inference.read") as t:
+        df = load_frame(input_path)
+        t.rows_out = len(df)
+
+    if early_exit and (use_fused or execution_mode != "serial" or n_workers is not None):
+        raise ValueError("early_exit scores the folds one after another on the fold models, "
+                         "pass thread_count instead of an execution mode")
+    if use_cascade and use_fused:
+        raise ValueError("The cascade escalates to the fold models, it cannot be combined with use_fused")
+
+    decisions = None
+    if use_fused:
+        # A single model has no folds to spread over workers, only its thread count applies
+        if execution_mode != "serial" or n_workers is not None:
+            raise ValueError("use_fused scores a single model, pass thread_count instead of an execution mode")
+
+        # One call loads the models and the metadata
+        with stage("inference.load_models"):
+            fused = load_fused_model()
+        best_threshold = fused.best_threshold
+        with stage("inference.build_pool", rows_in=len(df)):
+            pool = build_pool(df, fused.feature_order, fused.cat_features, fused.text_features,
+                              text_cache=text_cache)
+        with stage("inference.predict", rows_in=len(df)):
+            probabilities = fused.predict_proba(pool, thread_count)
+    else:
+        # Load metadata
+        feature_order, cat_features, text_features, best_threshold = load_metadata()
+
+        scored = df
+        if use_cascade:
+            # Imported here, scikit-learn is only needed by the cascade
+            from cascade import load_cascade
+            with stage("inference.cascade", rows_in=len(df)) as t:
+                tier_one = load_cascade()
+                if tier_one.best_threshold != best_threshold:
+                    raise RuntimeError("The cascade was tuned on other fold models, rerun cascade.py")
+                probabilities, decisions, escalate = tier_one.route(df)
+                t.rows_out = int(escalate.sum())
+            scored = df[escalate]
+
+        with stage("inference.build_pool", rows_in=len(scored)):
+            # Nothing to score when the cascade settled every review
+            pool = build_pool(scored, feature_order, cat_features, text_features,
+                              text_cache=text_cache) if len(scored) else None
+
+        # Load fold models
+        with stage("inference.load_models"):
+            models = load_fold_models()
+
+        # Ensemble predictions
+        with stage("inference.predict", rows_in=len(scored)):
+            if not len(scored):
+                fold_probabilities = np.zeros(0)
+            elif early_exit:
+                fold_probabilities, folds_used = adaptive_predict(models, pool, best_threshold, early_exit,
+                                                                  early_exit_margin, thread_count=thread_count)
+            else:
+                fold_probabilities = ensemble_predict(models, pool, execution_mode, n_workers, thread_count)
+        if early_exit and len(scored):
+            print(f"Early exit ({early_exit}): {folds_used.mean():.2f} of {len(models)} folds per review on average, "
+                  f"{(folds_used == len(models)).mean():.1%} of the reviews went through every fold")
+
+        if use_cascade:
+            probabilities[escalate] = fold_probabilities
+            decisions[escalate] = (fold_probabilities >= best_threshold).astype(int)
+            print(f"Cascade: {escalate.mean() if len(df) else 0:.1%} of the reviews escalated to the fold ensemble")
+        else:
+            probabilities = fold_probabilities
+
+    # Add results
+    df = add_verdicts(df, probabilities, best_threshold, decisions)
 
     # Keep only requested columns
-    keep_cols = ["vader_category", "time", "rating", "text", "user_name", "probability", "decision", "verdict"]
-    result_df = df[keep_cols]
-    
-    output_path = os.path.join(OUTPUT_FOLDER, f"{base_name}_results.csv")
+    result_df = df[KEEP_COLS]
+
     # Save
-    result_df.to_csv(output_path, index=False)
+    with stage("inference.write", rows_in=len(result_df)):
+        save_frame(result_df, output_path)
+    if entry is not None:
+        entry.store()
     print(f"Inference complete. Results saved to {output_path}")
 
     # Quick summary
@@ -0,0 +1,307 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import functools
+import resource
+import threading
+from collections import deque
+
+"""
+Per-stage timings for the pipeline.
+The stage functions (standardize_file, parse_file, preprocess_file, VADER_Sentiment_Score, run_inference) and
+their costly steps (CSV I/O, Pool construction, the fold predictions, ...) run inside stage() timers, which record
+wall time, CPU time, peak RSS and rows in / out. Every stage function prints one line when it ends (steps, named
+"stage.step", are only recorded); report() aggregates the run, which write_report saves as JSON and in the
+Prometheus text format.
+
+    from instrumentation import get_recorder
+    ... run the pipeline ...
+    get_recorder().write_report("outputs/run_report")  # run_report.json + run_report.prom
+
+Peak RSS is the high-water mark of this process during the stage (reset between stages on Linux, the process
+peak elsewhere). Pool workers are not included. With profile="cprofile" (or "pyinstrument" when installed) each
+top-level stage is profiled into profile_dir.
+"""
+
+PROFILERS = [None, "cprofile", "pyinstrument"]
+METRIC_PREFIX = "review_pipeline_stage"
+# Calls kept one by one for the JSON report, a long-lived process (scoring_service.py) only keeps the latest
+MAX_CALLS = 10000
+
+
+def _peak_rss_bytes():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def _reset_peak_rss():
+    # Linux only: writing 5 to clear_refs resets VmHWM to the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class StageTimer:
+    """
+    One timed stage. Set rows_in / rows_out inside the with block when they are only known there.
+    """
+
+    def __init__(self, recorder, name, rows_in=None, rows_out=None):
+        self.recorder = recorder
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = rows_out
+        self.peak_rss = 0
+        self.profiler = None
+
+    def __enter__(self):
+        self.recorder._enter(self)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall_start
+        self.cpu = time.process_time() - self.cpu_start
+        self.recorder._exit(self)
+
+    def as_dict(self):
+        rows = self.rows_out if self.rows_out is not None else self.rows_in
+        return {
+            "stage": self.name,
+            "wall_s": self.wall,
+            "cpu_s": self.cpu,
+            "peak_rss_mb": self.peak_rss / 1e6,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rows_per_s": rows / self.wall if rows is not None and self.wall > 0 else None,
+        }
+
+
+class Recorder:
+    """
+    Collects the stage timings of a run.
+
+    Args:
+        verbose (bool): Print a line at the end of every stage.
+        profile (str, optional): "cprofile" or "pyinstrument", to profile the top-level stages.
+        profile_dir (str): Where the profiles are written.
+        max_calls (int): Latest calls kept in stages. report() sums every call since the start or the last reset.
+    """
+
+    def __init__(self, verbose=True, profile=None, profile_dir="profiles", max_calls=MAX_CALLS):
+        if profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{profile}'. Choose from {PROFILERS}")
+        self.verbose = verbose
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.max_calls = max_calls
+        self.stages = deque(maxlen=max_calls)
+        self.started = time.time()
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def stage(self, name, rows_in=None, rows_out=None):
+        return StageTimer(self, name, rows_in, rows_out)
+
+    def _enter(self, timer):
+        stack = self._stack()
+        # The enclosing stages keep the peak reached so far before it is reset for this one
+        peak = _peak_rss_bytes()
+        for outer in stack:
+            outer.peak_rss = max(outer.peak_rss, peak)
+        _reset_peak_rss()
+        if not stack and self.profile:
+            timer.profiler = self._start_profiler()
+        stack.append(timer)
+
+    def _exit(self, timer):
+        stack = self._stack()
+        stack.remove(timer)
+        timer.peak_rss = max(timer.peak_rss, _peak_rss_bytes())
+        for outer in stack:
+            outer.peak_rss = max(outer.peak_rss, timer.peak_rss)
+        if timer.profiler is not None:
+            self._stop_profiler(timer)
+        record = timer.as_dict()
+        self._add(record)
+
+        # Steps ("inference.predict") only go to the report, whole stages are printed too
+        if self.verbose and "." not in timer.name:
+            line = (f"⏱️ {timer.name}: {timer.wall:.3f} s wall, {timer.cpu:.3f} s CPU, "
+                    f"{timer.peak_rss / 1e6:.0f} MB peak RSS")
+            if record["rows_per_s"] is not None:
+                rows = " -> ".join(str(n) for n in (record["rows_in"], record["rows_out"]) if n is not None)
+                line += f", {rows} rows ({record['rows_per_s']:,.0f} rows/s)"
+            print(line)
+
+    # ----------------------------
+    # PROFILING
+    # ----------------------------
+    def _start_profiler(self):
+        if self.profile == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("⚠️ pyinstrument is not installed, profiling with cProfile")
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, timer):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = timer.name.replace("/", "_")
+        if isinstance(timer.profiler, cProfile.Profile):
+            timer.profiler.disable()
+            path = os.path.join(self.profile_dir, f"{name}.prof")
+            timer.profiler.dump_stats(path)
+            if self.verbose:
+                pstats.Stats(path).sort_stats("cumulative").print_stats(10)
+        else:
+            timer.profiler.stop()
+            path = os.path.join(self.profile_dir, f"{name}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(timer.profiler.output_html())
+        print(f"Profile of {timer.name} saved to {path}")
+
+    # ----------------------------
+    # REPORTS
+    # ----------------------------
+    def _add(self, record):
+        with self._lock:
+            self.stages.append(record)
+            agg = self._totals.setdefault(record["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                                            "peak_rss_mb": 0.0, "rows_in": None, "rows_out": None})
+            agg["calls"] += 1
+            agg["wall_s"] += record["wall_s"]
+            agg["cpu_s"] += record["cpu_s"]
+            agg["peak_rss_mb"] = max(agg["peak_rss_mb"], record["peak_rss_mb"])
+            for key in ("rows_in", "rows_out"):
+                if record[key] is not None:
+                    agg[key] = (agg[key] or 0) + record[key]
+
+    def report(self):
+        """
+        Returns:
+            dict: started (epoch s) and one entry per stage name, summed over its calls (peak RSS is the max)
+        """
+        with self._lock:
+            stages = {name: dict(agg, rows_per_s=None) for name, agg in self._totals.items()}
+        for agg in stages.values():
+            rows = agg["rows_out"] if agg["rows_out"] is not None else agg["rows_in"]
+            if rows is not None and agg["wall_s"] > 0:
+                agg["rows_per_s"] = rows / agg["wall_s"]
+        return {"started": self.started, "stages": stages}
+
+    def prometheus(self):
+        report = self.report()["stages"]
+        metrics = [
+            ("calls_total", "counter", "Calls of the stage", "calls"),
+            ("wall_seconds_total", "counter", "Wall time spent in the stage", "wall_s"),
+            ("cpu_seconds_total", "counter", "CPU time of this process in the stage", "cpu_s"),
+            ("peak_rss_bytes", "gauge", "Peak resident memory of this process during the stage", "peak_rss_mb"),
+            ("rows_in_total", "counter", "Rows handed to the stage", "rows_in"),
+            ("rows_out_total", "counter", "Rows produced by the stage", "rows_out"),
+            ("rows_per_second", "gauge", "Rows out (or in) per wall second", "rows_per_s"),
+        ]
+        lines = []
+        for metric, kind, help_text, key in metrics:
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for stage, agg in report.items():
+                value = agg[key]
+                if value is None:
+                    continue
+                if key == "peak_rss_mb":
+                    value = int(value * 1e6)
+                lines.append(f'{name}{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path_prefix):
+        """
+        Writes <path_prefix>.json and <path_prefix>.prom.
+
+        Returns:
+            tuple: (json path, prometheus path)
+        """
+        folder = os.path.dirname(os.path.abspath(path_prefix))
+        os.makedirs(folder, exist_ok=True)
+        json_path, prom_path = f"{path_prefix}.json", f"{path_prefix}.prom"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({**self.report(), "calls": list(self.stages)}, f, indent=2)
+        with open(prom_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        print(f"Run report saved to {json_path} and {prom_path}")
+        return json_path, prom_path
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self._totals = {}
+        self.started = time.time()
+
+
+_recorder = Recorder()
+
+
+def get_recorder():
+    return _recorder
+
+
+def set_recorder(recorder):
+    # Replaces the recorder used by the stage functions, e.g. Recorder(profile="cprofile"). Returns the old one
+    global _recorder
+    previous, _recorder = _recorder, recorder
+    return previous
+
+
+def stage(name, rows_in=None, rows_out=None):
+    """
+    Times a block with the current recorder.
+
+        with stage("preprocess.read_csv") as t:
+            df = pd.read_csv(path)
+            t.rows_out = len(df)
+    """
+    return _recorder.stage(name, rows_in, rows_out)
+
+
+def timed(name):
+    """
+    Decorator timing every call of a stage function. Rows out are taken from a returned DataFrame or list, or
+    from the first item of a returned tuple.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as timer:
+                result = func(*args, **kwargs)
+                first = result[0] if isinstance(result, tuple) and result else result
+                if hasattr(first, "__len__") and not isinstance(first, (str, bytes, dict)):
+                    timer.rows_out = len(first)
+            return result
+        return wrapper
+    return decorator
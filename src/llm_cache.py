@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, ".cache", "llm_records.sqlite")
+
+"""
+Per-record cache of LLM answers for GPT standardization (parse_file) and pseudo-labelling.
+A review is keyed by a hash of its normalized content, the prompt version and the model, so a review seen in an
+earlier run (or earlier in the same file) is not sent again, and editing the prompt or switching models starts
+afresh. Only the misses are batched and sent; the answers are merged back in the order of the input.
+
+An answer can only be cached per record when the model returned one object per review of its batch. Batches
+answered with another count are passed through as they are and sent again on the next run.
+"""
+
+DEFAULT_MAX_ROWS = 5000000
+LOOKUP_BATCH = 500
+
+
+def normalize_review(review):
+    # Whitespace and key order do not change what the model sees
+    if isinstance(review, str):
+        return " ".join(review.split())
+    return json.dumps(review, ensure_ascii=False, sort_keys=True)
+
+
+def prompt_version(template):
+    return hashlib.blake2b(template.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class LLMCache:
+    """
+    Args:
+        path (str): SQLite file. Defaults to .cache/llm_records.sqlite in the project.
+        max_rows (int): Records kept, the least recently used are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_rows=DEFAULT_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "uncached": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS llm_records "
+                            "(hash BLOB PRIMARY KEY, answer TEXT NOT NULL, last_used REAL NOT NULL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS llm_records_last_used ON llm_records (last_used)")
+
+    def key(self, review, model, version):
+        return hashlib.blake2b(f"{model}\0{version}\0{normalize_review(review)}".encode("utf-8"),
+                               digest_size=16).digest()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(set(keys))
+        now = time.time()
+        with self.db:
+            for i in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[i:i + LOOKUP_BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self.db.execute(f"SELECT hash, answer FROM llm_records WHERE hash IN ({marks})", batch)
+                found.update((k, json.loads(answer)) for k, answer in rows)
+                self.db.execute(f"UPDATE llm_records SET last_used = ? WHERE hash IN ({marks})", [now, *batch])
+        return found
+
+    def put_many(self, items):
+        now = time.time()
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO llm_records VALUES (?, ?, ?)",
+                                [(k, json.dumps(answer, ensure_ascii=False), now) for k, answer in items])
+            excess = self.db.execute("SELECT COUNT(*) FROM llm_records").fetchone()[0] - self.max_rows
+            if excess > 0:
+                self.db.execute("DELETE FROM llm_records WHERE hash IN "
+                                "(SELECT hash FROM llm_records ORDER BY last_used LIMIT ?)", (excess,))
+        self.stats["stored"] += len(items)
+
+    def hit_rate(self):
+        looked_up = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / looked_up if looked_up else 0.0
+
+    def report(self):
+        print(f"LLM cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+              f"({self.hit_rate():.1%} hit rate), {self.stats['stored']} answers stored, "
+              f"{self.stats['uncached']} records in batches that could not be cached")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def complete_by_review(reviews, batch_size, call_batches, cache=None, model="", version=""):
+    """
+    Sends reviews to the LLM in batches, skipping the ones already in the cache.
+
+    Args:
+        reviews (list): Raw reviews (strings or JSON objects).
+        batch_size (int): Reviews per request.
+        call_batches (callable): list of batches -> list of answers (a list of records, or None when the request
+                                 failed), one per batch.
+        cache (LLMCache, optional): Without a cache every review is sent.
+        model, version (str): Model name and prompt version, part of the cache key.
+    Returns:
+        list: One list of answer records per review, None where its request failed. An answer that does not
+              have one record per review of its batch is given whole to the first review of the batch.
+    """
+    if cache is None:
+        # Every review is sent, under its own position
+        keys, found = list(range(len(reviews))), {}
+    else:
+        keys = [cache.key(review, model, version) for review in reviews]
+        found = cache.get_many(keys)
+        n_found = sum(key in found for key in keys)
+        cache.stats["hits"] += n_found
+        cache.stats["misses"] += len(keys) - n_found
+
+    # Each distinct missing review is sent once, even when the input repeats it
+    to_send = {}
+    for review, key in zip(reviews, keys):
+        if key not in found and key not in to_send:
+            to_send[key] = review
+
+    pending = list(to_send.items())
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    answers = call_batches([[review for _, review in batch] for batch in batches]) if batches else []
+
+    fresh, unmatched, failed = {}, {}, set()
+    for batch, answer in zip(batches, answers):
+        if not answer:
+            failed.update(key for key, _ in batch)
+        elif len(answer) == len(batch):
+            fresh.update((key, record) for (key, _), record in zip(batch, answer))
+        else:
+            # Cannot tell which record belongs to which review: keep the answer, in place of its first review
+            unmatched.update((key, []) for key, _ in batch)
+            unmatched[batch[0][0]] = answer
+            if cache is not None:
+                cache.stats["uncached"] += len(batch)
+    if fresh and cache is not None:
+        cache.put_many(list(fresh.items()))
+    found.update(fresh)
+
+    by_review, done = [], set()
+    for key in keys:
+        if key in found:
+            by_review.append([found[key]])
+        elif key in failed:
+            by_review.append(None)
+        else:
+            by_review.append(unmatched[key] if key not in done else [])
+            done.add(key)
+    return by_review
+
+
+def complete_records(reviews, batch_size, call_batches, cache=None, model="", version=""):
+    """
+    complete_by_review flattened, the records of failed requests are left out.
+
+    Returns:
+        list: Answer records in the order of the reviews
+    """
+    return [record for answer in complete_by_review(reviews, batch_size, call_batches, cache, model, version)
+            if answer for record in answer]
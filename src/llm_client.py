@@ -0,0 +1,253 @@
+import json
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+Concurrent, rate-limited calls to the LLM.
+gpt_extract / gpt_label send one batch of reviews per request and wait for the answer before sending the
+next, so a file takes (number of batches x round trip). AsyncLLMClient keeps up to `concurrency` requests in
+flight, paces them with token buckets (requests and prompt tokens per minute), retries transient failures
+with exponential backoff and jitter, and returns the answers in the order of the prompts.
+
+The transport (how one prompt becomes one answer) is pluggable: OpenAITransport talks to the API,
+HTTPTransport to any endpoint with the same JSON shape, such as StubLLMServer, which runs locally for tests
+and benchmarks.
+"""
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# OpenAI SDK errors worth retrying, matched by name so the SDK is only imported by OpenAITransport
+TRANSIENT_ERRORS = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError"}
+
+
+def estimate_tokens(prompt):
+    # About four characters per token for English text
+    return max(1, len(prompt) // 4)
+
+
+def is_transient(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in TRANSIENT_STATUS
+    if isinstance(error, (ConnectionError, TimeoutError, urllib.error.URLError)):
+        return True
+    return type(error).__name__ in TRANSIENT_ERRORS
+
+
+# ----------------------------
+# RATE LIMITING
+# ----------------------------
+class TokenBucket:
+    """
+    Allows `rate` units per second on average, with bursts of up to `capacity` units.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1.0):
+        # A request bigger than the bucket waits for a full bucket rather than forever
+        amount = min(float(amount), self.capacity)
+        async with self.lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+# ----------------------------
+# TRANSPORTS
+# ----------------------------
+class OpenAITransport:
+    """
+    Sends a prompt to the OpenAI Responses API and returns its output text.
+    """
+
+    def __init__(self, model, api_key=None, **create_kwargs):
+        self.model = model
+        self.api_key = api_key
+        self.create_kwargs = create_kwargs
+        self._client = None
+
+    async def __call__(self, prompt):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.api_key)
+        response = await self._client.responses.create(model=self.model, input=prompt, **self.create_kwargs)
+        return response.output_text
+
+
+class HTTPTransport:
+    """
+    POSTs {"model": ..., "input": prompt} as JSON to `url` and returns the "output_text" of the JSON answer.
+    Requests block in their own threads (the default executor only has a handful), up to max_connections.
+    """
+
+    def __init__(self, url, model="stub", timeout=60, max_connections=64):
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="llm-http")
+
+    def _post(self, prompt):
+        body = json.dumps({"model": self.model, "input": prompt}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())["output_text"]
+
+    async def __call__(self, prompt):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._post, prompt)
+
+
+# ----------------------------
+# CLIENT
+# ----------------------------
+class AsyncLLMClient:
+    """
+    Args:
+        transport (callable): async prompt -> output text.
+        concurrency (int): Requests in flight at once.
+        requests_per_minute (float, optional): Request rate limit.
+        tokens_per_minute (float, optional): Prompt token rate limit (estimated from the prompt length).
+        max_retries (int): Retries of a transient failure before giving up on a prompt.
+        backoff_base, backoff_max (float): Retry n waits about backoff_base * 2**n seconds, capped.
+    """
+
+    def __init__(self, transport, concurrency=DEFAULT_CONCURRENCY, requests_per_minute=None, tokens_per_minute=None,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        self.transport = transport
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    async def _call(self, prompt, semaphore, buckets):
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                if "requests" in buckets:
+                    await buckets["requests"].acquire()
+                if "tokens" in buckets:
+                    await buckets["tokens"].acquire(estimate_tokens(prompt))
+                self.stats["requests"] += 1
+                try:
+                    return await self.transport(prompt)
+                except Exception as e:
+                    if not is_transient(e) or attempt == self.max_retries:
+                        self.stats["failures"] += 1
+                        raise
+            # Back off outside the semaphore so other prompts keep the slots busy
+            self.stats["retries"] += 1
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def complete_all(self, prompts):
+        """
+        Returns the output text of every prompt, in order. A prompt that failed for good gives its exception.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        buckets = {}
+        if self.requests_per_minute:
+            buckets["requests"] = TokenBucket(self.requests_per_minute / 60.0, max(1.0, self.concurrency))
+        if self.tokens_per_minute:
+            buckets["tokens"] = TokenBucket(self.tokens_per_minute / 60.0, self.tokens_per_minute / 60.0)
+        return await asyncio.gather(*(self._call(p, semaphore, buckets) for p in prompts), return_exceptions=True)
+
+    def run(self, prompts):
+        # Synchronous entry point for scripts and notebooks without a running event loop
+        return asyncio.run(self.complete_all(list(prompts)))
+
+
+# ----------------------------
+# LOCAL STUB SERVER
+# ----------------------------
+def echo_records(prompt):
+    # Answers like the parser would: one object per review found in the JSON array at the end of the prompt
+    items, _ = json.JSONDecoder().raw_decode(prompt[prompt.index("["):])
+    records = []
+    for item in items:
+        try:
+            record = json.loads(item) if isinstance(item, str) else item
+        except ValueError:
+            record = None
+        records.append(record if isinstance(record, dict) else {"text": item})
+    return json.dumps(records)
+
+
+class StubLLMServer:
+    """
+    Local stand-in for the API, for tests and benchmarks. Every request sleeps `latency` seconds and every
+    `fail_every`-th request is answered with HTTP 503.
+
+    with StubLLMServer(latency=0.05) as stub:
+        client = AsyncLLMClient(HTTPTransport(stub.url))
+    """
+
+    def __init__(self, latency=0.0, fail_every=0, respond=echo_records, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.respond = respond
+        self.requests = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with stub.lock:
+                    stub.requests += 1
+                    fail = stub.fail_every and stub.requests % stub.fail_every == 0
+                time.sleep(stub.latency)
+                if fail:
+                    status, body = 503, {"error": "overloaded"}
+                else:
+                    status, body = 200, {"output_text": stub.respond(payload["input"])}
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_port}/v1/responses"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
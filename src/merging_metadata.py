@@ -1,11 +1,18 @@
 import json
 import os
 import jsonlines
+from itertools import islice
+
+from helpers import iter_json_array
+from metadata_index import MetadataIndex
 
     
 """
 This is file is used for our training dataset. We incorporate the metadata from the 3 locations we chose: Alaska, California, New York into our training data.
 With additional information from gmap_id and business name, our model can be more expressive and accurate.
+
+The metadata goes through an on-disk index (metadata_index.py, built once and reused) and the reviews are
+streamed through the join in chunks, so memory does not grow with either file.
 """
 
 data_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
@@ -25,20 +32,29 @@ def save_json(data, path):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
-def merge_with_metadata(reviews_file, metadata_file, output_file):
-    reviews = load_json(reviews_file)
-    metadata = load_jsonl(metadata_file)
-
-    metadata_map = {m["gmap_id"]: m for m in metadata if "gmap_id" in m}
-
-    for review in reviews:
-        gmap_id = review.get("gmap_id")
-        if gmap_id in metadata_map:
-            review["business_name"] = metadata_map[gmap_id].get("name")
-        else:
-            review["business_name"] = None
+def _write_json_item(f, item, first):
+    # Same layout as json.dump(reviews, f, ensure_ascii=False, indent=2), one review at a time
+    body = json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+    f.write(("[\n  " if first else ",\n  ") + body)
+
+
+def merge_with_metadata(reviews_file, metadata_file, output_file, chunk_size=10000, index_path=None):
+    with MetadataIndex(metadata_file, columns=("name",), index_path=index_path) as index:
+        reviews = iter_json_array(reviews_file)
+        n = 0
+        with open(output_file, "w", encoding="utf-8") as f:
+            while True:
+                chunk = list(islice(reviews, chunk_size))
+                if not chunk:
+                    break
+                found = index.lookup(review.get("gmap_id") for review in chunk)
+                for review in chunk:
+                    meta = found.get(review.get("gmap_id"))
+                    review["business_name"] = meta["name"] if meta is not None else None
+                    _write_json_item(f, review, n == 0)
+                    n += 1
+            f.write("\n]" if n else "[]")
 
-    save_json(reviews, output_file)
     print(f"✅ Dataset is now populated with metadata!")
 
 if __name__ == "__main__":
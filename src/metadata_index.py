@@ -0,0 +1,110 @@
+import os
+import json
+import sqlite3
+
+"""
+On-disk gmap_id -> attributes index for the Google Local metadata dumps (meta-<State>.json, JSONL).
+merge_with_metadata used to load the whole metadata file into a dict of full objects to copy one field. The
+index keeps only the projected columns in a SQLite file next to the metadata, is built in one streaming pass,
+and is reused until the metadata file changes (size / mtime) or other columns are asked for.
+"""
+
+DEFAULT_COLUMNS = ("name",)
+INSERT_BATCH = 10000
+LOOKUP_BATCH = 500
+
+
+def default_index_path(metadata_file):
+    return metadata_file + ".idx.sqlite"
+
+
+def _source_signature(metadata_file):
+    stat = os.stat(metadata_file)
+    return f"{os.path.abspath(metadata_file)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def _encode(value):
+    # Scalars are stored as they are, lists / dicts (hours, categories, ...) as JSON text
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+class MetadataIndex:
+    """
+    Args:
+        metadata_file (str): JSONL metadata, one business per line with a gmap_id.
+        columns (tuple): Attributes kept per business.
+        index_path (str, optional): SQLite file. Defaults to <metadata_file>.idx.sqlite.
+    """
+
+    def __init__(self, metadata_file, columns=DEFAULT_COLUMNS, index_path=None):
+        self.metadata_file = metadata_file
+        self.columns = tuple(columns)
+        self.index_path = index_path or default_index_path(metadata_file)
+        self.db = sqlite3.connect(self.index_path)
+        self.built = False  # True when this instance (re)built the index
+        if not self._is_current():
+            self._build()
+
+    def _is_current(self):
+        try:
+            info = dict(self.db.execute("SELECT key, value FROM index_info"))
+        except sqlite3.OperationalError:
+            return False
+        return (info.get("source") == _source_signature(self.metadata_file)
+                and info.get("columns") == json.dumps(self.columns))
+
+    def _build(self):
+        col_defs = ", ".join(f'"{c}"' for c in self.columns)
+        marks = ", ".join("?" * (len(self.columns) + 1))
+        with self.db:
+            self.db.execute("DROP TABLE IF EXISTS metadata")
+            self.db.execute("DROP TABLE IF EXISTS index_info")
+            self.db.execute(f"CREATE TABLE metadata (gmap_id TEXT PRIMARY KEY, {col_defs})")
+            self.db.execute("CREATE TABLE index_info (key TEXT PRIMARY KEY, value TEXT)")
+
+            batch = []
+            with open(self.metadata_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    meta = json.loads(line)
+                    if "gmap_id" not in meta:
+                        continue
+                    batch.append((meta["gmap_id"], *(_encode(meta.get(c)) for c in self.columns)))
+                    if len(batch) >= INSERT_BATCH:
+                        # A later line for the same gmap_id wins, as with the dict it replaces
+                        self.db.executemany(f"INSERT OR REPLACE INTO metadata VALUES ({marks})", batch)
+                        batch = []
+            self.db.executemany(f"INSERT OR REPLACE INTO metadata VALUES ({marks})", batch)
+            self.db.executemany("INSERT INTO index_info VALUES (?, ?)",
+                                [("source", _source_signature(self.metadata_file)),
+                                 ("columns", json.dumps(self.columns))])
+        self.built = True
+
+    def lookup(self, gmap_ids):
+        """
+        Returns {gmap_id: {column: value}} for the ids found in the metadata.
+        """
+        ids = list({g for g in gmap_ids if g is not None})
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        found = {}
+        for i in range(0, len(ids), LOOKUP_BATCH):
+            batch = ids[i:i + LOOKUP_BATCH]
+            marks = ",".join("?" * len(batch))
+            for row in self.db.execute(f"SELECT gmap_id, {cols} FROM metadata WHERE gmap_id IN ({marks})", batch):
+                found[row[0]] = dict(zip(self.columns, row[1:]))
+        return found
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -2,19 +2,32 @@ import os
 import csv
 import json
 import argparse
-from openai import OpenAI
+from llm_client import DEFAULT_CONCURRENCY, AsyncLLMClient, OpenAITransport
+from llm_cache import complete_by_review, complete_records, prompt_version
+from schema_inference import infer_schema, map_records, fill_unmapped, describe_schema
+from sharded_reader import can_shard, read_sharded_entries
+from instrumentation import stage, timed
 
-# Initialize client
 gpt_api_key = "Your Key!"
-client = OpenAI(api_key=gpt_api_key)
+GPT_MODEL = "gpt-3.5-turbo"
+_client = None
+
+
+def get_client():
+    # The OpenAI client is built on the first GPT call, so importing this module stays cheap
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=gpt_api_key)
+    return _client
 
 categories = [
     "user_id", "user_name", "business_name", "time", "text",
     "rating", "sentiment_category", "rating_category", "gmap_id"
 ]
 
-def gpt_extract(reviews: list[str]):
-    prompt = f"""
+def build_extract_prompt(reviews: list[str]):
+    return f"""
     You are a data parser. You are given information about reviews for restaurants. 
     Prioritize runtime.
     Normalize the following reviews into the schema:
@@ -44,19 +57,83 @@ def gpt_extract(reviews: list[str]):
     {json.dumps(reviews, ensure_ascii=False)}
     """
 
-    response = client.responses.create(
-        model="gpt-3.5-turbo",
-        input=prompt,
-        store=True
-    )
 
+# Changes whenever the prompt text does, so cached answers to an older prompt are not reused
+EXTRACT_PROMPT_VERSION = prompt_version(build_extract_prompt([]))
+
+
+def parse_extract_output(output_text: str):
     try:
-        return safe_json_loads(response.output_text)
+        return safe_json_loads(output_text)
     except Exception as e:
         print("⚠️ Failed to parse GPT output:", e)
-        print("Raw output:", response.output_text)
+        print("Raw output:", output_text)
         return None
-    
+
+
+def gpt_extract(reviews: list[str], cache=None):
+    # cache (LLMCache, optional): only the reviews without a cached answer are sent (llm_cache.py)
+    if cache is not None:
+        return complete_records(reviews, max(1, len(reviews)), lambda batches: [gpt_extract(b) for b in batches],
+                                cache, GPT_MODEL, EXTRACT_PROMPT_VERSION)
+    response = get_client().responses.create(
+        model=GPT_MODEL,
+        input=build_extract_prompt(reviews),
+        store=True
+    )
+    return parse_extract_output(response.output_text)
+
+
+def gpt_extract_batches(batches, concurrency=DEFAULT_CONCURRENCY, transport=None, requests_per_minute=None,
+                        tokens_per_minute=None):
+    """
+    gpt_extract for many batches, with up to `concurrency` requests in flight (see llm_client.py).
+
+    Args:
+        batches (list[list[str]]): Raw reviews, one list per request.
+        transport (callable, optional): async prompt -> output text. Defaults to the OpenAI API.
+        requests_per_minute, tokens_per_minute (float, optional): Rate limits of the account.
+    Returns:
+        list: Parsed records of every batch, in input order (None where the request or the parsing failed)
+    """
+    if transport is None:
+        transport = OpenAITransport(GPT_MODEL, api_key=gpt_api_key, store=True)
+    llm = AsyncLLMClient(transport, concurrency=concurrency, requests_per_minute=requests_per_minute,
+                         tokens_per_minute=tokens_per_minute)
+
+    results = []
+    for output in llm.run(build_extract_prompt(batch) for batch in batches):
+        if isinstance(output, Exception):
+            print("⚠️ GPT request failed:", output)
+            results.append(None)
+        else:
+            results.append(parse_extract_output(output))
+    return results
+
+
+def gpt_extract_by_review(reviews, batch_size=10, concurrency=DEFAULT_CONCURRENCY, transport=None, cache=None):
+    """
+    gpt_extract_batches over a flat list of raw reviews.
+
+    Args:
+        cache (LLMCache, optional): Reviews answered in an earlier run are not sent again.
+    Returns:
+        list: One list of parsed records per review, None where its batch failed (llm_cache.complete_by_review)
+    """
+    return complete_by_review(reviews, batch_size,
+                              lambda batches: gpt_extract_batches(batches, concurrency, transport),
+                              cache, GPT_MODEL, EXTRACT_PROMPT_VERSION)
+
+
+def gpt_extract_records(reviews, batch_size=10, concurrency=DEFAULT_CONCURRENCY, transport=None, cache=None):
+    """
+    Returns:
+        list: Parsed records in the order of the reviews (failed batches are left out)
+    """
+    return [record for answer in gpt_extract_by_review(reviews, batch_size, concurrency, transport, cache)
+            if answer for record in answer]
+
+
 def safe_json_loads(output_text: str):
     raw = output_text.strip()
 
@@ -73,33 +150,69 @@ def chunk_list(lst, chunk_size):
     for i in range(0, len(lst), chunk_size):
         yield lst[i:i+chunk_size]
 
-# Parses File for GPT Cleaning
-def parse_file(input_file, output_file, batch_size=10):
+def read_raw_records(input_file):
+    # JSON objects and CSV rows come out as dicts, text lines as strings (or dicts when a line is a JSON object)
     ext = os.path.splitext(input_file)[1].lower()
-    raw_reviews = []
 
     if ext == ".json":  
         with open(input_file, "r", encoding="utf-8") as f:
-            data = json.load(f) 
-            raw_reviews = [json.dumps(obj) for obj in data]
+            return list(json.load(f))
 
     elif ext == ".csv":
         with open(input_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            raw_reviews = [json.dumps(row) for row in reader]
+            return list(csv.DictReader(f))
 
     elif ext in [".txt", ".jsonl"]:  
+        records = []
         with open(input_file, "r", encoding="utf-8") as f:
-            raw_reviews = [line.strip() for line in f if line.strip()]
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    obj = None
+                records.append(obj if isinstance(obj, dict) else line)
+        return records
 
     else:
         raise ValueError(f"❌ Unsupported file type: {ext}")
 
-    # Process in batches
-    parsed_reviews = []
-    for chunk in chunk_list(raw_reviews, batch_size):
-        batch_result = gpt_extract(chunk)
-        if batch_result:
-            parsed_reviews.extend(batch_result)
-
-    return parsed_reviews
+# Parses File for GPT Cleaning
+@timed("parse_file")
+def parse_file(input_file, output_file, batch_size=10, concurrency=DEFAULT_CONCURRENCY, transport=None,
+               use_schema=True, n_workers=None, llm_cache=None):
+    # Records whose columns map onto the schema skip GPT (schema_inference.py). entries keeps one slot per input
+    # record, None for the ones GPT standardizes, so the output follows the input order
+    if use_schema and can_shard(input_file):
+        # Large JSONL / CSV files are read and mapped by several processes (sharded_reader.py)
+        with stage("parse_file.read_sharded") as t:
+            entries, records = read_sharded_entries(input_file, n_workers)
+            t.rows_out = len(entries)
+        print(f"{len(entries) - len(records)} records mapped in parallel, {len(records)} left for GPT.")
+    else:
+        with stage("parse_file.read") as t:
+            records = read_raw_records(input_file)
+            t.rows_out = len(records)
+        entries = [None] * len(records)
+        if use_schema:
+            with stage("parse_file.schema", rows_in=len(records)) as t:
+                mapping = infer_schema(records)
+                entries, records = map_records(records, mapping)
+                t.rows_out = len(entries) - len(records)
+            print(f"Schema: {describe_schema(mapping)}. {len(entries) - len(records)} records mapped, "
+                  f"{len(records)} left for GPT.")
+
+    raw_reviews = [r if isinstance(r, str) else json.dumps(r) for r in records]
+
+    # Process in batches, several requests in flight at once. With llm_cache, only reviews never answered before
+    answers = []
+    if raw_reviews:
+        with stage("parse_file.gpt", rows_in=len(raw_reviews)) as t:
+            answers = gpt_extract_by_review(raw_reviews, batch_size, concurrency, transport, llm_cache)
+            t.rows_out = sum(len(answer) for answer in answers if answer)
+        if llm_cache is not None:
+            llm_cache.report()
+
+    return fill_unmapped(entries, answers)
@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import argparse
+from itertools import chain, islice
+
+import pandas as pd
+
+from helpers import iter_records
+from ucsd_json_standardization import categories, is_ucsd_records, standardize_review
+from schema_inference import SAMPLE_SIZE, infer_schema, map_records, fill_unmapped, describe_schema
+from inference import KEEP_COLS, MODEL_FOLDER
+from instrumentation import stage, get_recorder, set_recorder, Recorder, PROFILERS
+
+"""
+Streaming end-to-end pipeline.
+The notebook pipeline loads the whole dataset at every stage and writes a full intermediate file for the next
+one (standardized JSON -> CSV -> _preprocessed.csv -> _final.csv -> _results.csv). This driver moves fixed-size
+chunks through standardize -> preprocess -> VADER -> score -> write instead, so memory stays bounded by the
+chunk size whatever the input size. Intermediate files are only written when asked for, for debugging.
+"""
+
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+
+INPUT_FOLDER = os.path.join(PROJECT_ROOT, "input")
+DATA_FOLDER = os.path.join(PROJECT_ROOT, "data")
+OUTPUT_FOLDER = os.path.join(PROJECT_ROOT, "outputs")
+
+CHUNK_SIZE = 10000
+GPT_BATCH_SIZE = 10
+
+
+def iter_chunks(iterable, chunk_size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def standardize_chunk(records, ucsd, mapping=None, llm_cache=None, transport=None):
+    if ucsd:
+        return [standardize_review(r) for r in records]
+
+    # Records the inferred schema can map skip GPT
+    entries, records = map_records(records, mapping or {})
+    if not records:
+        return entries
+
+    # The rest still go through GPT, only imported when needed, and their answers go back in input order
+    from parse_file import gpt_extract_by_review
+    raw = [r if isinstance(r, str) else json.dumps(r) for r in records]
+    return fill_unmapped(entries, gpt_extract_by_review(raw, GPT_BATCH_SIZE, transport=transport, cache=llm_cache))
+
+
+def append_csv(df, path, first):
+    df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def run_streaming_pipeline(input_file, chunk_size=CHUNK_SIZE, dump_intermediates=False, model_folder=MODEL_FOLDER,
+                           output_path=None, llm_cache=None, transport=None):
+    """
+    Standardizes, preprocesses, scores and writes an input file chunk by chunk.
+
+    Args:
+        input_file (str): File name inside the input folder (or a full path).
+        chunk_size (int): Records held in memory at once.
+        dump_intermediates (bool): Also append every chunk to data/<base>_standardized.csv,
+                                   _standardized_preprocessed.csv and _standardized_final.csv.
+        model_folder (str): Folder holding the fold models.
+        output_path (str, optional): Results CSV. Defaults to outputs/<base>_results.csv.
+        llm_cache (LLMCache, optional): Reviews GPT standardized in an earlier run are not sent again.
+        transport (callable, optional): async prompt -> output text for GPT, see llm_client.py.
+    Returns:
+        str: Path to the results CSV
+    """
+    from scoring_service import ReviewScorer
+
+    full_input_path = input_file if os.path.isabs(input_file) else os.path.join(INPUT_FOLDER, input_file)
+    if not os.path.exists(full_input_path):
+        print(f"Error: {input_file} not found in {INPUT_FOLDER}")
+        sys.exit(1)
+
+    base_name = os.path.splitext(os.path.basename(full_input_path))[0]
+    if output_path is None:
+        os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+        output_path = os.path.join(OUTPUT_FOLDER, f"{base_name}_results.csv")
+    # Same names the notebook pipeline produces, so the dumps can be diffed against it
+    intermediate_paths = {
+        "standardized": os.path.join(DATA_FOLDER, f"{base_name}_standardized.csv"),
+        "preprocessed": os.path.join(DATA_FOLDER, f"{base_name}_standardized_preprocessed.csv"),
+        "final": os.path.join(DATA_FOLDER, f"{base_name}_standardized_final.csv"),
+    }
+
+    # Peek at the first records to pick the UCSD fast path or infer the column mapping,
+    # then put them back in front of the stream
+    records = iter_records(full_input_path)
+    head = list(islice(records, SAMPLE_SIZE))
+    ucsd = is_ucsd_records(head)
+    mapping = {} if ucsd else infer_schema(head)
+    if not ucsd:
+        print(f"Schema: {describe_schema(mapping)}")
+    records = chain(head, records)
+
+    scorer = ReviewScorer(model_folder)
+    n_rows = n_spam = 0
+
+    for i, chunk in enumerate(iter_chunks(records, chunk_size)):
+        first = i == 0
+        with stage("pipeline.standardize", rows_in=len(chunk)) as t:
+            standardized = standardize_chunk(chunk, ucsd, mapping, llm_cache, transport)
+            df = pd.DataFrame.from_records(standardized, columns=categories)
+            t.rows_out = len(df)
+        if dump_intermediates:
+            append_csv(df, intermediate_paths["standardized"], first)
+
+        # ReviewScorer.prepare split in its two steps, so each is timed (and dumped) once
+        with stage("pipeline.preprocess", rows_in=len(df)):
+            df = scorer.preprocess(df)
+        if dump_intermediates:
+            append_csv(df, intermediate_paths["preprocessed"], first)
+
+        with stage("pipeline.vader", rows_in=len(df)):
+            df = scorer.add_sentiment(df)
+        if dump_intermediates:
+            append_csv(df, intermediate_paths["final"], first)
+
+        with stage("pipeline.score", rows_in=len(df)):
+            df = scorer.score_prepared(df)
+        with stage("pipeline.write", rows_in=len(df)):
+            append_csv(df[KEEP_COLS], output_path, first)
+
+        n_rows += len(df)
+        n_spam += int((df["decision"] == 1).sum())
+        print(f"Chunk {i + 1}: {n_rows} reviews scored")
+
+    if n_rows == 0:
+        # Still leave a results file behind, with the header only
+        pd.DataFrame(columns=KEEP_COLS).to_csv(output_path, index=False)
+        print(f"No records found in {full_input_path}")
+
+    print(f"Pipeline complete. Results saved to {output_path}")
+    print(f"Summary: {n_spam} likely spam, {n_rows - n_spam} likely ham out of {n_rows} reviews.")
+    if llm_cache is not None:
+        llm_cache.report()
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run standardize -> preprocess -> VADER -> score in chunks.")
+    parser.add_argument("input_file", help="File inside the input folder")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dump-intermediates", action="store_true")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--no-llm-cache", action="store_true", help="Send every review to GPT, even cached ones")
+    parser.add_argument("--report", default=None, help="Write the stage timings to REPORT.json and REPORT.prom")
+    parser.add_argument("--profile", default=None, choices=PROFILERS[1:], help="Profile every stage")
+    args = parser.parse_args()
+
+    if args.profile:
+        set_recorder(Recorder(profile=args.profile, profile_dir=os.path.join(OUTPUT_FOLDER, "profiles")))
+
+    from llm_cache import LLMCache
+    llm_cache = None if args.no_llm_cache else LLMCache()
+    run_streaming_pipeline(args.input_file, args.chunk_size, args.dump_intermediates, output_path=args.output,
+                           llm_cache=llm_cache)
+    if args.report:
+        get_recorder().write_report(args.report)
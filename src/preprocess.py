@@ -1,54 +1,140 @@
 import os
+import numpy as np
 import pandas as pd
+from instrumentation import stage, timed
+from storage import CATEGORICAL_COLS, ChunkWriter, artifact_path, save_frame, load_frame
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 DATA_FOLDER = os.path.join(PROJECT_ROOT, "data")
 
+NUMERIC_COLS = ["rating", "time"]
+TEXT_COLS = ["text"]
+DROPPED_COLS = ["rating_category"]
 
-"""
-Preprocess a standardized CSV file from the data folder.
-    
-Args:
-    base_name (str): The base filename (without .csv extension).
-    Example: "combined" reads "data/combined.csv"
-    
-Returns:
-df (pd.DataFrame): Preprocessed DataFrame
-output_path (str): Path to the saved preprocessed CSV
-"""
-def preprocess_file(base_name: str):
+# Ids and texts are read as strings, so long numeric ids stay exact and nothing is re-inferred per chunk
+READ_DTYPES = {col: str for col in CATEGORICAL_COLS + TEXT_COLS}
 
-    input_path = os.path.join(DATA_FOLDER, f"{base_name}.csv")
-    output_path = os.path.join(DATA_FOLDER, f"{base_name}_preprocessed.csv")
 
-    df = pd.read_csv(input_path)
+def read_standardized(path, chunk_size=None):
+    # The sparse column is never parsed. With chunk_size, an iterator of frames
+    return pd.read_csv(path, dtype=READ_DTYPES, usecols=lambda col: col not in DROPPED_COLS, chunksize=chunk_size)
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
 
-    categorical_cols = ["sentiment_category", "gmap_id", "user_name", "business_name", "user_id"]
-    numeric_cols = ["rating", "time"]
-    text_cols = ["text"]
+def _to_category(values):
+    # Factorizes once and fills the missing values through the codes, no per-row string is built
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, labels = pd.factorize(values)
+    labels = pd.Index(labels).astype(str)
+    if not labels.is_unique:
+        # Mixed values with the same text (1 and "1"), merge them the slow way
+        return values.astype(object).fillna("unknown").astype(str).astype("category")
 
+    missing = codes < 0
+    if missing.any():
+        if "unknown" not in labels:
+            labels = labels.append(pd.Index(["unknown"]))
+        codes = np.where(missing, labels.get_loc("unknown"), codes)
+    return pd.Series(pd.Categorical.from_codes(codes, labels), index=values.index, name=values.name)
+
+
+def preprocess_frame(df, categorical=True):
+    """
+    Fills and types the standardized columns. df itself is modified (columns dropped and replaced) and returned,
+    not a copy; pass df.copy() to keep the caller's frame as it was.
+
+    Args:
+        df (pd.DataFrame): Standardized reviews.
+        categorical (bool): Keep the categorical columns as category dtype (an integer code per row, every
+                            distinct value stored once) instead of one string per row. inference.build_pool
+                            gives the same Pool for both.
+    Returns:
+        pd.DataFrame: df
+    """
     # Drop sparse column
-    df = df.drop(columns=["rating_category"], errors="ignore")
+    for col in DROPPED_COLS:
+        if col in df.columns:
+            del df[col]
 
     # Fix categoricals
-    for col in categorical_cols:
+    for col in CATEGORICAL_COLS:
         if col in df.columns:
-            df[col] = df[col].fillna("unknown").astype(str)
+            df[col] = _to_category(df[col]) if categorical else df[col].fillna("unknown").astype(str)
 
     # Fix numerics
-    for col in numeric_cols:
+    for col in NUMERIC_COLS:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(-999)
+            values = df[col] if pd.api.types.is_numeric_dtype(df[col]) else pd.to_numeric(df[col], errors="coerce")
+            df[col] = values.fillna(-999)
 
     # Fix text
-    for col in text_cols:
+    for col in TEXT_COLS:
         if col in df.columns:
-            df[col] = df[col].fillna("unknown").astype(str)
+            values = df[col].fillna("unknown")
+            df[col] = values if pd.api.types.is_string_dtype(values) else values.astype(str)
 
-    # Save processed file
-    df.to_csv(output_path, index=False)
+    return df
+
+
+"""
+Preprocess a standardized CSV file from the data folder.
+    
+Args:
+    base_name (str): The base filename (without .csv extension).
+    Example: "combined" reads "data/combined.csv"
+    fmt (str): Storage format of the output, "csv" (default), "parquet" or "feather". See storage.py.
+    cache (StageCache, optional): Reuse the output of an earlier run when nothing changed. See stage_cache.py.
+    chunk_size (int, optional): Preprocess chunk_size rows at a time, for inputs larger than memory.
+                                The output is the same; csv and parquet only.
+    
+Returns:
+df (pd.DataFrame): Preprocessed DataFrame (None in chunked mode)
+output_path (str): Path to the saved preprocessed file
+"""
+@timed("preprocess")
+def preprocess_file(base_name: str, fmt="csv", cache=None, chunk_size=None):
+    input_path = os.path.join(DATA_FOLDER, f"{base_name}.csv")
+    output_path = artifact_path(DATA_FOLDER, f"{base_name}_preprocessed", fmt)
+
+    entry = None
+    if cache is not None:
+        entry = cache.entry("preprocess", [input_path], [output_path], config={"fmt": fmt},
+                            code=["preprocess", "storage"])
+        if entry.restore():
+            return (None if chunk_size else load_frame(output_path)), output_path
+
+    if chunk_size:
+        df, largest, columns = None, 0.0, []
+        with stage("preprocess.chunks") as t, ChunkWriter(output_path) as writer:
+            for chunk in read_standardized(input_path, chunk_size):
+                chunk = preprocess_frame(chunk)
+                largest = max(largest, frame_memory_mb(chunk))
+                columns = chunk.columns.tolist()
+                writer.write(chunk)
+            t.rows_out = writer.rows
+        print(f"Memory: {largest:.1f} MB for the largest chunk of {chunk_size} rows")
+    else:
+        with stage("preprocess.read") as t:
+            df = read_standardized(input_path)
+            t.rows_out = len(df)
+        before = frame_memory_mb(df)
+        with stage("preprocess.transform", rows_in=len(df)) as t:
+            df = preprocess_frame(df)
+            t.rows_out = len(df)
+        print(f"Memory: {before:.1f} MB read -> {frame_memory_mb(df):.1f} MB preprocessed")
+        columns = df.columns.tolist()
+
+        # Save processed file
+        with stage("preprocess.write", rows_in=len(df)):
+            save_frame(df, output_path)
+    if entry is not None:
+        entry.store()
     print(f"Preprocessing complete. Saved to {output_path}")
-    print("Final columns:", df.columns.tolist())
+    print("Final columns:", columns)
 
     return df, output_path
-
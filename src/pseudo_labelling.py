@@ -1,15 +1,23 @@
 import os
 import json
-from openai import OpenAI
 import time
+from llm_cache import LLMCache, complete_records, prompt_version
 
-client = OpenAI(api_key="secret!!!")
+_client = None
+
+
+def get_client():
+    # Built on the first labelling call, not at import
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key="secret!!!")
+    return _client
 
 # Directories
 root = os.path.dirname(os.path.dirname(__file__))
 data_folder = os.path.join(root, "data")
 training_folder = os.path.join(root, "training_data")
-os.makedirs(training_folder, exist_ok=True)
 
 prompt = """
 You are a simple Spam detector for pseudo labelling.
@@ -40,9 +48,13 @@ Rules:
 5. Always return valid JSON with exactly the above keys, no extra commentary.
 """
 
+LABEL_MODEL = "gpt-4.1-mini-2025-04-14"
+LABEL_PROMPT_VERSION = prompt_version(prompt)
+
+
 def gpt_label(reviews_batch):
-    response = client.responses.create(
-        model="gpt-4.1-mini-2025-04-14",
+    response = get_client().responses.create(
+        model=LABEL_MODEL,
         input=prompt + "\n\nReviews:\n" + json.dumps(reviews_batch, ensure_ascii=False),
     )
     try:
@@ -59,13 +71,15 @@ def chunk_list(lst, size=27):
     for i in range(0, len(lst), size):
         yield lst[i:i+size]
 
-def pseudo_label_file(input_path, output_path):
+def pseudo_label_file(input_path, output_path, cache=None):
+    # cache (LLMCache, optional): reviews labelled in an earlier run are not sent again
     with open(input_path, "r", encoding="utf-8") as f:
         reviews = json.load(f)
 
-    labeled_reviews = []
-    for chunk in chunk_list(reviews, size=50):
-        labeled_reviews.extend(gpt_label(chunk))
+    labeled_reviews = complete_records(reviews, 50, lambda batches: [gpt_label(chunk) for chunk in batches],
+                                       cache, LABEL_MODEL, LABEL_PROMPT_VERSION)
+    if cache is not None:
+        cache.report()
     time.sleep(20)
 
     with open(output_path, "w", encoding="utf-8") as f:
@@ -74,8 +88,10 @@ def pseudo_label_file(input_path, output_path):
     print("Done.")
 
 if __name__ == "__main__":
-    for filename in os.listdir(data_folder):
-        if "Kaggle" in filename:
-            input_path = os.path.join(data_folder, filename)
-            output_path = os.path.join(training_folder, filename.replace("_meta", "_pseudo"))
-            pseudo_label_file(input_path, output_path)
+    os.makedirs(training_folder, exist_ok=True)
+    with LLMCache() as cache:
+        for filename in os.listdir(data_folder):
+            if "Kaggle" in filename:
+                input_path = os.path.join(data_folder, filename)
+                output_path = os.path.join(training_folder, filename.replace("_meta", "_pseudo"))
+                pseudo_label_file(input_path, output_path, cache)
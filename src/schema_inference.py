@@ -0,0 +1,248 @@
+import re
+import math
+from datetime import datetime, timezone
+
+from ucsd_json_standardization import categories, get_rating_category
+
+"""
+Rule-based standardization for inputs whose columns can be recognised.
+Only UCSD JSONL used to skip GPT. infer_schema profiles the keys of the first records (CSV header, JSON keys),
+matches them to the project schema by name (synonyms) and checks that the sampled values fit the field (a
+rating is a number from 0 to 5, a time parses as a date or an epoch, a text is free text, ...).
+standardize_with_schema maps every record it can and hands back the rest (free-text lines, objects with other
+keys), which still go to GPT. map_records keeps the position of every record, so fill_unmapped can put the GPT
+answers back in input order. A record with an empty text is mapped too: GPT cannot recover it either.
+
+sentiment_category is always derived from the rating with get_rating_category, as for UCSD data.
+rating_category is copied when the input has it and left null otherwise (GPT would infer it from the text).
+"""
+
+SAMPLE_SIZE = 200
+MIN_VALID_FRACTION = 0.8
+MIN_TEXT_LENGTH = 15
+
+# Normalized column name -> schema field, the field's own name always matches
+SYNONYMS = {
+    "user_id": ["userid", "reviewer_id", "reviewerid", "author_id", "customer_id", "uid", "profile_id"],
+    "user_name": ["username", "name", "reviewer", "reviewer_name", "reviewername", "author", "author_name",
+                  "customer_name", "user"],
+    "business_name": ["business", "restaurant", "restaurant_name", "place", "place_name", "store", "store_name",
+                      "location_name"],
+    "time": ["timestamp", "date", "review_date", "created_at", "published_at", "datetime", "review_time",
+             "unixreviewtime", "unix_time", "published_at_date"],
+    "text": ["review", "review_text", "reviewtext", "content", "comment", "comments", "body", "review_body",
+             "message", "snippet"],
+    "rating": ["stars", "star", "score", "star_rating", "review_rating", "overall", "rating_value", "rate"],
+    "rating_category": ["category", "theme", "aspect", "review_category"],
+    "gmap_id": ["gmapid", "place_id", "google_place_id", "location_id", "business_id", "businessid"],
+}
+REQUIRED_FIELDS = ["text"]
+
+
+def normalize_key(key):
+    return re.sub(r"[^0-9a-z]+", "_", str(key).strip().lower()).strip("_")
+
+
+def _is_missing(value):
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+# ----------------------------
+# VALUE PARSERS (None = does not fit)
+# ----------------------------
+def parse_rating(value):
+    try:
+        rating = float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    if not 0 <= rating <= 5:
+        return None
+    return int(rating) if rating.is_integer() else rating
+
+
+def parse_time(value):
+    # Project times are epoch milliseconds, like the UCSD dumps
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(str(value).strip())
+    except (TypeError, ValueError):
+        number = None
+    if number is not None:
+        if 1e8 <= number < 1e11:   # epoch seconds
+            return int(number * 1000)
+        if 1e11 <= number < 1e14:  # epoch milliseconds
+            return int(number)
+        return None
+
+    text = str(value).strip()
+    for fmt in (None, "%Y-%m-%d %H:%M:%S", "%Y/%m/%d", "%m/%d/%Y", "%d/%m/%Y", "%B %d, %Y", "%b %d, %Y"):
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00")) if fmt is None else datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() * 1000)
+    return None
+
+
+def parse_text(value):
+    return value if isinstance(value, str) and value.strip() else None
+
+
+def parse_identifier(value):
+    if isinstance(value, (dict, list, bool, float)):
+        return None
+    value = str(value).strip()
+    return value if value and " " not in value else None
+
+
+def parse_label(value):
+    if isinstance(value, (dict, list)):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+PARSERS = {
+    "user_id": parse_identifier,
+    "user_name": parse_label,
+    "business_name": parse_label,
+    "time": parse_time,
+    "text": parse_text,
+    "rating": parse_rating,
+    "rating_category": parse_label,
+    "gmap_id": parse_identifier,
+}
+
+
+# ----------------------------
+# INFERENCE
+# ----------------------------
+def _fits(field, values):
+    present = [v for v in values if not _is_missing(v)]
+    if not present:
+        return True  # an all-empty column still names the field, its values become null
+    parsed = [PARSERS[field](v) for v in present]
+    if sum(p is not None for p in parsed) < MIN_VALID_FRACTION * len(present):
+        return False
+    if field == "text":
+        # Free text rather than a short label
+        texts = [p for p in parsed if p is not None]
+        return sum(len(t) for t in texts) / len(texts) >= MIN_TEXT_LENGTH or any(" " in t for t in texts)
+    return True
+
+
+def infer_schema(records, sample_size=SAMPLE_SIZE):
+    """
+    Maps input keys to schema fields from the first records.
+
+    Args:
+        records (list[dict]): Records of the input (CSV rows, JSON objects). Non-dict records are ignored.
+        sample_size (int): Records profiled.
+    Returns:
+        dict: {schema field: input key}, empty when the required fields (text) cannot be found
+    """
+    sample = [r for r in records[:sample_size] if isinstance(r, dict)]
+    if not sample:
+        return {}
+    keys = list(dict.fromkeys(k for r in sample for k in r))
+
+    lookup = {}
+    for field in PARSERS:
+        for name in [field] + SYNONYMS[field]:
+            lookup.setdefault(normalize_key(name), field)
+
+    mapping = {}
+    for key in keys:
+        field = lookup.get(normalize_key(key))
+        # First matching column wins, and only if its values look like the field
+        if field and field not in mapping and _fits(field, [r.get(key) for r in sample]):
+            mapping[field] = key
+
+    if "text" not in mapping:
+        # No text-like header: take the longest free-text column nobody claimed
+        taken = set(mapping.values())
+        candidates = []
+        for key in keys:
+            values = [r.get(key) for r in sample if isinstance(r.get(key), str)]
+            if key not in taken and values and _fits("text", values):
+                candidates.append((sum(len(v) for v in values) / len(values), key))
+        if candidates:
+            mapping["text"] = max(candidates)[1]
+
+    if not all(f in mapping for f in REQUIRED_FIELDS):
+        return {}
+    return mapping
+
+
+def apply_schema(record, mapping):
+    """
+    Standardizes one record with a mapping from infer_schema. Returns None if the record cannot be mapped
+    (not a dict, or none of the mapped keys has a value).
+    """
+    if not isinstance(record, dict) or not mapping:
+        return None
+    if all(_is_missing(record.get(key)) for key in mapping.values()):
+        return None
+
+    entry = {}
+    for field in categories:
+        if field == "sentiment_category":
+            continue
+        key = mapping.get(field)
+        value = record.get(key) if key is not None else None
+        entry[field] = None if _is_missing(value) else PARSERS[field](value)
+
+    entry["sentiment_category"] = get_rating_category(entry["rating"])
+    return {field: entry[field] for field in categories}
+
+
+def map_records(records, mapping=None):
+    """
+    Returns:
+        tuple: (one entry per record, None where the schema cannot map it, records left for GPT), both in input
+               order
+    """
+    if mapping is None:
+        mapping = infer_schema(records)
+    entries = [apply_schema(record, mapping) for record in records]
+    return entries, [record for record, entry in zip(records, entries) if entry is None]
+
+
+def standardize_with_schema(records, mapping=None):
+    """
+    Standardizes every record the schema can map.
+
+    Returns:
+        tuple: (standardized records, records left for GPT), both in input order
+    """
+    entries, unmapped = map_records(records, mapping)
+    return [entry for entry in entries if entry is not None], unmapped
+
+
+def fill_unmapped(entries, answers):
+    """
+    Puts the GPT answers of the records the schema could not map back in their place.
+
+    Args:
+        entries (list): map_records entries, None for the records sent to GPT.
+        answers (list): One list of records per None entry, in the same order (None where the request failed).
+    Returns:
+        list: Standardized records in input order, without the records of failed requests
+    """
+    answers = iter(answers)
+    standardized = []
+    for entry in entries:
+        if entry is not None:
+            standardized.append(entry)
+        else:
+            standardized.extend(next(answers) or [])
+    return standardized
+
+
+def describe_schema(mapping):
+    if not mapping:
+        return "no schema recognised, every record goes to GPT"
+    return ", ".join(f"{key} -> {field}" for field, key in mapping.items())
@@ -0,0 +1,326 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+import socketserver
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from inference import MODEL_FOLDER, EXECUTION_MODES, load_metadata, load_fold_models, build_pool, ensemble_predict, add_verdicts
+from preprocess import preprocess_frame
+from sentiment_engine import SentimentEngine, add_vader_columns
+from text_features import FEATURE_NAMES, TextFeatureCache
+
+"""
+Resident scoring engine.
+run_inference reloads the pickled metadata and all ten fold models every time it is called, which is fine for
+one CSV but not for a continuous feed. ReviewScorer loads the ensemble once, groups incoming reviews into
+micro-batches (capped by size and by how long the first review in the batch has been waiting) and keeps
+p50/p99 latency and throughput figures. serve() exposes it over local HTTP or a Unix socket.
+"""
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 10
+SERVICE_TEXT_CACHE_ROWS = 1000000
+RESULT_COLS = ["probability", "decision", "verdict"]
+
+
+# ----------------------------
+# LATENCY / THROUGHPUT STATS
+# ----------------------------
+class LatencyStats:
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.started = time.perf_counter()
+        self.reviews = 0
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def record_batch(self, latencies):
+        with self.lock:
+            self.latencies.extend(latencies)
+            self.reviews += len(latencies)
+            self.batches += 1
+
+    def snapshot(self):
+        with self.lock:
+            lat = np.array(self.latencies, dtype=float)
+            reviews, batches = self.reviews, self.batches
+        elapsed = time.perf_counter() - self.started
+
+        return {
+            "reviews": reviews,
+            "batches": batches,
+            "mean_batch_size": reviews / batches if batches else 0.0,
+            "p50_ms": float(np.percentile(lat, 50) * 1000) if len(lat) else None,
+            "p99_ms": float(np.percentile(lat, 99) * 1000) if len(lat) else None,
+            "throughput_rps": reviews / elapsed if elapsed > 0 else 0.0,
+            "uptime_s": elapsed,
+        }
+
+
+# ----------------------------
+# SCORER
+# ----------------------------
+class ReviewScorer:
+    """
+    Keeps the fold ensemble in memory and scores reviews in micro-batches.
+
+    Args:
+        model_folder (str): Folder holding fold_N.cbm and the metadata pickles.
+        max_batch_size (int): Largest number of reviews sent to predict_proba at once.
+        max_wait_ms (float): Longest time a review waits for its batch to fill up.
+        execution_mode, n_workers, thread_count: How the folds are scored, see inference.ensemble_predict.
+    """
+
+    def __init__(self, model_folder=MODEL_FOLDER, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, execution_mode="serial", n_workers=None, thread_count=-1):
+        self.feature_order, self.cat_features, self.text_features, self.best_threshold = load_metadata(model_folder)
+        self.models = load_fold_models(model_folder)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.execution_mode = execution_mode
+        self.n_workers = n_workers
+        self.thread_count = thread_count
+        self.stats = LatencyStats()
+
+        # Load the VADER lexicon now rather than on the first request
+        self._sentiment = SentimentEngine()
+        # Text features of the texts already scored, for models trained on them (memory only)
+        self._text_cache = TextFeatureCache(folder=None, max_rows=SERVICE_TEXT_CACHE_ROWS)
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._stopping = threading.Event()
+
+    # Raw standardized reviews may not have gone through the preprocess / VADER stages yet
+    def prepare(self, df):
+        return self.add_sentiment(self.preprocess(df))
+
+    def preprocess(self, df):
+        missing = [c for c in self.feature_order
+                   if c not in df.columns and not c.startswith("vader_") and c not in FEATURE_NAMES]
+        if missing:
+            df = df.assign(**{c: None for c in missing})
+        return preprocess_frame(df)
+
+    def add_sentiment(self, df):
+        if "vader_score" not in df.columns or "vader_category" not in df.columns:
+            df = add_vader_columns(df, engine=self._sentiment)
+        return df
+
+    def score_frame(self, df):
+        return self.score_prepared(self.prepare(df))
+
+    def score_prepared(self, df):
+        pool = build_pool(df, self.feature_order, self.cat_features, self.text_features, text_cache=self._text_cache)
+        probabilities = ensemble_predict(self.models, pool, self.execution_mode, self.n_workers, self.thread_count)
+        return add_verdicts(df, probabilities, self.best_threshold)
+
+    # ----------------------------
+    # MICRO-BATCHING
+    # ----------------------------
+    def start(self):
+        if self._worker is None:
+            self._stopping.clear()
+            self._worker = threading.Thread(target=self._batch_loop, name="review-scorer", daemon=True)
+            self._worker.start()
+        return self
+
+    def close(self):
+        if self._worker is not None:
+            self._stopping.set()
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, review: dict):
+        if self._worker is None:
+            self.start()
+        future = Future()
+        self._queue.put((review, future, time.perf_counter()))
+        return future
+
+    def score(self, reviews: list[dict], timeout=None):
+        futures = [self.submit(r) for r in reviews]
+        return [f.result(timeout=timeout) for f in futures]
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopping.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._run_batch(batch)
+            if self._stopping.is_set() and self._queue.empty():
+                return
+
+    def _run_batch(self, batch):
+        reviews = [item[0] for item in batch]
+        try:
+            # An explicit index keeps one row per review, even for reviews with no fields ({})
+            scored = self.score_frame(pd.DataFrame(reviews, index=range(len(reviews))))
+            results = scored[RESULT_COLS].to_dict("records")
+            if len(results) != len(batch):
+                raise RuntimeError(f"Scored {len(results)} rows for a batch of {len(batch)} reviews")
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        done = time.perf_counter()
+        for (_, future, submitted), result in zip(batch, results):
+            result["probability"] = float(result["probability"])
+            result["decision"] = int(result["decision"])
+            future.set_result(result)
+        self.stats.record_batch([done - submitted for _, _, submitted in batch])
+
+
+# ----------------------------
+# HTTP / UNIX SOCKET SERVER
+# ----------------------------
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    scorer = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.scorer.stats.snapshot())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok", "models": len(self.scorer.models)})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/score":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+
+        # Accept a single review, a list of reviews, or {"reviews": [...]}
+        if isinstance(payload, dict) and "reviews" in payload:
+            reviews = payload["reviews"]
+        elif isinstance(payload, dict):
+            reviews = [payload]
+        else:
+            reviews = payload
+        if not isinstance(reviews, list) or not all(isinstance(r, dict) for r in reviews):
+            self._send_json(400, {"error": "Expected a review object or a list of review objects"})
+            return
+
+        try:
+            results = self.scorer.score(reviews)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"results": results})
+
+    # Unix sockets have no (host, port) client address
+    def address_string(self):
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def make_server(scorer, host="127.0.0.1", port=8080, unix_socket=None):
+    handler = type("BoundScoringRequestHandler", (ScoringRequestHandler,), {"scorer": scorer})
+
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return UnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(host="127.0.0.1", port=8080, unix_socket=None, model_folder=MODEL_FOLDER,
+          max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, execution_mode="serial",
+          n_workers=None, thread_count=-1):
+    scorer = ReviewScorer(model_folder, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                          execution_mode=execution_mode, n_workers=n_workers, thread_count=thread_count).start()
+    server = make_server(scorer, host, port, unix_socket)
+
+    where = unix_socket if unix_socket else f"http://{host}:{port}"
+    print(f"Scoring service ready on {where} ({len(scorer.models)} fold models loaded)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        scorer.close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        print("Final stats:", json.dumps(scorer.stats.snapshot()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the CatBoost fold ensemble over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix-socket", default=None, help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--model-folder", default=MODEL_FOLDER)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--execution-mode", choices=EXECUTION_MODES, default="serial")
+    parser.add_argument("--n-workers", type=int, default=None)
+    parser.add_argument("--thread-count", type=int, default=-1)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.unix_socket, args.model_folder, args.max_batch_size, args.max_wait_ms,
+          args.execution_mode, args.n_workers, args.thread_count)
@@ -0,0 +1,208 @@
+import os
+import time
+import sqlite3
+import hashlib
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+"""
+Deduplicating, cached VADER scoring.
+Review corpora repeat the same short texts a lot ("Great food!", "Good"), so every distinct text is scored once
+per call, and compound scores are remembered in a bounded in-memory LRU (and optionally a bounded SQLite file
+shared between runs) keyed by a hash of the text and of the VADER version and lexicon, so a lexicon change
+invalidates old scores. Large batches of unseen texts are spread over a process pool.
+Texts are scored by fast_vader (same compound scores as NLTK from a precompiled lexicon index) unless the
+"nltk" backend is asked for.
+"""
+
+DEFAULT_CACHE_SIZE = 200000
+DEFAULT_DISK_CACHE_SIZE = 2000000
+PARALLEL_THRESHOLD = 20000
+BACKENDS = ["fast", "nltk"]
+
+_worker_analyzers = {}
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def vader_labels(scores):
+    scores = np.asarray(scores)
+    return np.select([scores >= 0.05, scores <= -0.05], ["positive", "negative"], default="neutral")
+
+
+def _get_analyzer(backend="fast"):
+    # One analyzer per process (the main one and every pool worker)
+    if backend not in _worker_analyzers:
+        if backend == "fast":
+            from fast_vader import FastVader
+            _worker_analyzers[backend] = FastVader()
+        else:
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            _worker_analyzers[backend] = SentimentIntensityAnalyzer()
+    return _worker_analyzers[backend]
+
+
+def _score_texts(texts, backend="fast"):
+    analyzer = _get_analyzer(backend)
+    if backend == "fast":
+        return analyzer.score_batch(texts)
+    return [analyzer.polarity_scores(t)["compound"] for t in texts]
+
+
+def vader_version(backend="fast"):
+    if backend == "fast":
+        return _get_analyzer(backend).version
+    import nltk
+    lexicon = _get_analyzer(backend).lexicon_file
+    return f"nltk-{nltk.__version__}-{hashlib.blake2b(lexicon.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+def add_vader_columns(df, text_col="text", engine=None):
+    # Duplicate texts are scored once
+    if engine is None:
+        engine = SentimentEngine()
+    texts = df[text_col].astype(str).fillna("")
+
+    # Add compound score + category
+    df["vader_score"] = engine.score(texts)
+    df["vader_category"] = vader_labels(df["vader_score"].to_numpy())
+    return df
+
+
+class SentimentEngine:
+    """
+    Scores texts with VADER, skipping duplicates and texts it has seen before.
+
+    Args:
+        cache_size (int): Compound scores kept in the in-memory LRU.
+        cache_path (str, optional): SQLite file that keeps scores between runs.
+        disk_cache_size (int): Rows kept in the SQLite file, least recently used rows are evicted.
+        n_workers (int, optional): Processes used for large batches. Defaults to the number of cores.
+        parallel_threshold (int): Smallest number of unseen texts worth sending to the process pool.
+        backend (str): "fast" (fast_vader) or "nltk" (SentimentIntensityAnalyzer). Scores are the same.
+    """
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE, cache_path=None, n_workers=None,
+                 parallel_threshold=PARALLEL_THRESHOLD, disk_cache_size=DEFAULT_DISK_CACHE_SIZE, backend="fast"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown VADER backend '{backend}'. Choose from {BACKENDS}")
+        self.backend = backend
+        self.cache_size = cache_size
+        self.disk_cache_size = disk_cache_size
+        self.version = vader_version(backend)
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.cache = OrderedDict()
+        self.stats = {"texts": 0, "unique": 0, "memory_hits": 0, "disk_hits": 0, "scored": 0}
+
+        self.db = None
+        if cache_path:
+            self.db = sqlite3.connect(cache_path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS vader_scores "
+                            "(hash BLOB PRIMARY KEY, compound REAL NOT NULL, last_used REAL NOT NULL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS vader_scores_last_used ON vader_scores (last_used)")
+
+    # ----------------------------
+    # CACHE
+    # ----------------------------
+    def _remember(self, key, score):
+        self.cache[key] = score
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _key(self, text):
+        return text_hash(f"{self.version}\0{text}")
+
+    def _lookup_disk(self, keys):
+        found = {}
+        now = time.time()
+        with self.db:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                marks = ",".join("?" * len(batch))
+                found.update(self.db.execute(f"SELECT hash, compound FROM vader_scores WHERE hash IN ({marks})", batch))
+                self.db.execute(f"UPDATE vader_scores SET last_used = ? WHERE hash IN ({marks})", [now, *batch])
+        return found
+
+    def _store_disk(self, rows):
+        now = time.time()
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO vader_scores VALUES (?, ?, ?)",
+                                [(key, score, now) for key, score in rows])
+            excess = self.db.execute("SELECT COUNT(*) FROM vader_scores").fetchone()[0] - self.disk_cache_size
+            if excess > 0:
+                self.db.execute("DELETE FROM vader_scores WHERE hash IN "
+                                "(SELECT hash FROM vader_scores ORDER BY last_used LIMIT ?)", (excess,))
+
+    # ----------------------------
+    # SCORING
+    # ----------------------------
+    def _score_misses(self, texts):
+        if len(texts) < self.parallel_threshold or self.n_workers == 1:
+            return _score_texts(texts, self.backend)
+
+        chunk = -(-len(texts) // (self.n_workers * 4))
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            parts = executor.map(partial(_score_texts, backend=self.backend),
+                                 [texts[i:i + chunk] for i in range(0, len(texts), chunk)])
+            return [score for part in parts for score in part]
+
+    def score(self, texts):
+        """
+        Returns the VADER compound score of every text, in order.
+        """
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+        uniques = [t if isinstance(t, str) else str(t) for t in uniques]
+        keys = [self._key(t) for t in uniques]
+        scores = np.empty(len(uniques), dtype=float)
+
+        missing = []
+        for i, key in enumerate(keys):
+            score = self.cache.get(key)
+            if score is None:
+                missing.append(i)
+            else:
+                self.cache.move_to_end(key)
+                scores[i] = score
+        self.stats["memory_hits"] += len(uniques) - len(missing)
+
+        if missing and self.db is not None:
+            found = self._lookup_disk([keys[i] for i in missing])
+            still_missing = []
+            for i in missing:
+                if keys[i] in found:
+                    scores[i] = found[keys[i]]
+                    self._remember(keys[i], scores[i])
+                else:
+                    still_missing.append(i)
+            self.stats["disk_hits"] += len(missing) - len(still_missing)
+            missing = still_missing
+
+        if missing:
+            new_scores = self._score_misses([uniques[i] for i in missing])
+            for i, score in zip(missing, new_scores):
+                scores[i] = score
+                self._remember(keys[i], score)
+            if self.db is not None:
+                self._store_disk([(keys[i], s) for i, s in zip(missing, new_scores)])
+        self.stats["scored"] += len(missing)
+        self.stats["texts"] += len(codes)
+        self.stats["unique"] += len(uniques)
+
+        return scores[codes]
+
+    def hit_rate(self):
+        unique = self.stats["unique"]
+        return (self.stats["memory_hits"] + self.stats["disk_hits"]) / unique if unique else 0.0
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,205 @@
+import io
+import os
+import csv
+import json
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+from ucsd_json_standardization import is_ucsd_records, standardize_review
+from schema_inference import SAMPLE_SIZE, infer_schema, apply_schema
+
+"""
+Parallel ingestion of large JSONL / CSV inputs.
+The file is cut into byte ranges whose edges are moved to the next newline, each range is decoded and
+standardized in a worker process (orjson or msgspec when installed, the json module otherwise), and the
+ranges are concatenated in file order, so the output order is the same as a single-threaded read.
+
+CSV ranges assume one record per line. A quoted field holding a newline leaves an odd number of quotes on
+its lines (or a row of the wrong width), and the file is then read serially instead.
+"""
+
+SHARD_BYTES = 32 * 1024 * 1024
+MIN_SHARDED_BYTES = 64 * 1024 * 1024
+SHARDABLE_EXTENSIONS = [".jsonl", ".json", ".txt", ".csv"]
+
+
+def json_decoder():
+    """
+    Returns (name, loads) of the fastest JSON decoder installed.
+    """
+    try:
+        import orjson
+        return "orjson", orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        return "msgspec", msgspec.json.decode
+    except ImportError:
+        return "json", json.loads
+
+
+class ShardAlignmentError(ValueError):
+    pass
+
+
+# ----------------------------
+# SHARDING
+# ----------------------------
+def shard_offsets(path, shard_bytes=SHARD_BYTES, start=0):
+    """
+    Byte ranges [(start, end), ...] covering the file from `start`, every edge just after a newline.
+    """
+    size = os.path.getsize(path)
+    offsets = []
+    with open(path, "rb") as f:
+        while start < size:
+            end = start + shard_bytes
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                f.readline()  # move the edge to the end of the line it falls in
+                end = f.tell()
+            offsets.append((start, end))
+            start = end
+    return offsets
+
+
+def _read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start).decode("utf-8")
+
+
+def detect_layout(path, n=SAMPLE_SIZE):
+    """
+    Looks at the head of the file only.
+
+    Returns:
+        dict: kind ("jsonl" / "csv" / "text"), header (CSV), body_start (byte offset after a CSV header),
+              ucsd (bool) and mapping (schema_inference mapping, empty for UCSD)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    _, loads = json_decoder()
+
+    with open(path, "rb") as f:
+        if ext == ".csv":
+            header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+            body_start = f.tell()
+            head = list(csv.DictReader(io.StringIO(b"".join(islice(f, n)).decode("utf-8")), fieldnames=header))
+            kind = "csv"
+        else:
+            header, body_start, kind = None, 0, "jsonl"
+            head = []
+            for line in islice((line for line in f if line.strip()), n):
+                try:
+                    obj = loads(line)
+                except ValueError:
+                    obj = None
+                if not isinstance(obj, dict):
+                    kind = "text"  # plain lines, or a JSON array
+                    break
+                head.append(obj)
+
+    ucsd = kind == "jsonl" and bool(head) and is_ucsd_records(head)
+    mapping = infer_schema(head) if kind != "text" and not ucsd else {}
+    return {"kind": kind, "header": header, "body_start": body_start, "ucsd": ucsd, "mapping": mapping}
+
+
+# ----------------------------
+# WORKER
+# ----------------------------
+def _standardize_shard(path, start, end, layout):
+    # Returns (one entry per record, None where the schema could not map it, those records), both in file order
+    text = _read_range(path, start, end)
+
+    if layout["kind"] == "csv":
+        if '"' in text and any(line.count('"') % 2 for line in text.splitlines()):
+            raise ShardAlignmentError(f"Quoted newline in bytes {start}-{end}")
+        width = len(layout["header"])
+        records = []
+        for row in csv.reader(io.StringIO(text)):
+            if not row:
+                continue
+            if len(row) != width:
+                raise ShardAlignmentError(f"CSV row with {len(row)} fields instead of {width} in bytes {start}-{end}")
+            records.append(dict(zip(layout["header"], row)))
+    else:
+        _, loads = json_decoder()
+        records = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            if layout["kind"] == "text":
+                records.append(line.strip())
+                continue
+            try:
+                obj = loads(line)
+            except ValueError:
+                obj = None
+            records.append(obj if isinstance(obj, dict) else line.strip())
+
+    return _map_shard(records, layout)
+
+
+def _map_shard(records, layout):
+    entries = [standardize_review(record) if layout["ucsd"] and isinstance(record, dict)
+               else apply_schema(record, layout["mapping"]) for record in records]
+    return entries, [record for record, entry in zip(records, entries) if entry is None]
+
+
+# ----------------------------
+# READER
+# ----------------------------
+def can_shard(path, min_bytes=MIN_SHARDED_BYTES):
+    return (os.path.splitext(path)[1].lower() in SHARDABLE_EXTENSIONS
+            and os.path.getsize(path) >= min_bytes
+            and detect_layout(path)["kind"] != "text")
+
+
+def read_sharded_entries(path, n_workers=None, shard_bytes=SHARD_BYTES):
+    """
+    Reads and standardizes a JSONL / CSV file in parallel.
+
+    Args:
+        path (str): Input file.
+        n_workers (int, optional): Worker processes. Defaults to the number of cores.
+        shard_bytes (int): Approximate size of a range handed to one worker.
+    Returns:
+        tuple: (one entry per record, None where the schema could not map it, records left for GPT), in file
+               order, see schema_inference.fill_unmapped
+    """
+    layout = detect_layout(path)
+    offsets = shard_offsets(path, shard_bytes, layout["body_start"])
+    n_workers = n_workers or os.cpu_count() or 1
+
+    try:
+        if n_workers == 1 or len(offsets) == 1:
+            parts = [_standardize_shard(path, start, end, layout) for start, end in offsets]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                parts = list(executor.map(_standardize_shard, [path] * len(offsets), [s for s, _ in offsets],
+                                          [e for _, e in offsets], [layout] * len(offsets)))
+    except ShardAlignmentError as e:
+        # Multi-line CSV records, read the file as one range
+        print(f"⚠️ {e}, reading {path} serially")
+        parts = [_standardize_shard_serial_csv(path, layout)]
+
+    entries = [r for part, _ in parts for r in part]
+    unmapped = [r for _, part in parts for r in part]
+    return entries, unmapped
+
+
+def read_sharded(path, n_workers=None, shard_bytes=SHARD_BYTES):
+    """
+    Returns:
+        tuple: (standardized records, records left for GPT), in file order
+    """
+    entries, unmapped = read_sharded_entries(path, n_workers, shard_bytes)
+    return [entry for entry in entries if entry is not None], unmapped
+
+
+def _standardize_shard_serial_csv(path, layout):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return _map_shard(list(csv.DictReader(f)), layout)
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import importlib.util
+
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+CACHE_FOLDER = os.path.join(PROJECT_ROOT, ".cache", "stages")
+
+"""
+Content-addressed cache for the pipeline stages (standardize_file, preprocess_file, VADER_Sentiment_Score,
+run_inference), so a rerun on unchanged input skips the work, GPT calls included.
+A stage run is keyed by a hash of its input files' contents, its config (format, backend, model name, ...),
+the source of the modules that implement it and the model artifacts it reads. On a hit the stage's output
+files are copied back from the cache instead of being recomputed. Entries are evicted least recently used
+first once the cache holds more than max_bytes.
+
+File hashes are remembered by (path, size, mtime), so an unchanged multi-GB input is only read once.
+
+    cache = StageCache()
+    _, path = preprocess_file(base_name, cache=cache)
+    cache.report()
+"""
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+HASH_BLOCK = 1 << 20
+
+
+def module_source(name):
+    # Source file of a src/ module, found without importing it
+    spec = importlib.util.find_spec(name)
+    if spec is None or not spec.origin:
+        raise ValueError(f"Module '{name}' not found")
+    return spec.origin
+
+
+def _expand(paths):
+    # Folders stand for every file inside them, in a stable order
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, n) for n in sorted(names))
+        else:
+            files.append(path)
+    return files
+
+
+class StageCache:
+    """
+    Args:
+        folder (str): Cache directory. Defaults to .cache/stages in the project.
+        max_bytes (int): Size of the cached outputs above which the least recently used entries are evicted.
+    """
+
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.stats = {}
+        os.makedirs(folder, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(folder, "index.sqlite"))
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS entries "
+                            "(key TEXT PRIMARY KEY, stage TEXT NOT NULL, size INTEGER NOT NULL, "
+                            "files TEXT NOT NULL, last_used REAL NOT NULL)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS file_digests "
+                            "(path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                            "digest TEXT NOT NULL)")
+
+    # ----------------------------
+    # KEYS
+    # ----------------------------
+    def file_digest(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.db.execute("SELECT size, mtime_ns, digest FROM file_digests WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO file_digests VALUES (?, ?, ?, ?)",
+                            (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def key(self, stage, inputs=(), config=None, code=(), artifacts=()):
+        """
+        Args:
+            stage (str): Stage name.
+            inputs (list[str]): Files the stage reads.
+            config (dict, optional): Settings that change the output. Must be JSON serializable.
+            code (list[str]): Modules implementing the stage (names, e.g. "preprocess").
+            artifacts (list[str]): Model files or folders the stage reads.
+        Returns:
+            str: hex key
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(stage.encode("utf-8"))
+        h.update(json.dumps(config or {}, sort_keys=True).encode("utf-8"))
+        # Inputs count by content only, artifacts and code by name and content
+        for path in inputs:
+            h.update(b"\0input\0" + self.file_digest(path).encode("ascii"))
+        for name in code:
+            h.update(f"\0code\0{name}\0{self.file_digest(module_source(name))}".encode("utf-8"))
+        for path in _expand(artifacts):
+            h.update(f"\0artifact\0{os.path.basename(path)}\0{self.file_digest(path)}".encode("utf-8"))
+        return h.hexdigest()
+
+    def entry(self, stage, inputs, outputs, config=None, code=(), artifacts=()):
+        return CacheEntry(self, stage, self.key(stage, inputs, config, code, artifacts), list(outputs))
+
+    # ----------------------------
+    # ENTRIES
+    # ----------------------------
+    def _count(self, stage, outcome):
+        self.stats.setdefault(stage, {"hits": 0, "misses": 0})[outcome] += 1
+
+    def _entry_folder(self, key):
+        return os.path.join(self.folder, key[:2], key)
+
+    def restore(self, stage, key, outputs):
+        row = self.db.execute("SELECT files FROM entries WHERE key = ?", (key,)).fetchone()
+        files = json.loads(row[0]) if row is not None else None
+        if files is None or len(files) != len(outputs) or not all(
+                os.path.exists(os.path.join(self._entry_folder(key), f)) for f in files):
+            self._count(stage, "misses")
+            return False
+
+        for name, output in zip(files, outputs):
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            # copy2 keeps the mtime, so the next stage finds this file's hash in file_digests
+            shutil.copy2(os.path.join(self._entry_folder(key), name), output)
+        with self.db:
+            self.db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._count(stage, "hits")
+        return True
+
+    def store(self, stage, key, outputs):
+        size = sum(os.path.getsize(p) for p in outputs)
+        if size > self.max_bytes:
+            print(f"⚠️ {stage} output ({size} bytes) is larger than the cache, not cached")
+            return False
+
+        folder = self._entry_folder(key)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder)
+        files = []
+        for i, output in enumerate(outputs):
+            name = f"{i}_{os.path.basename(output)}"
+            shutil.copy2(output, os.path.join(folder, name))
+            files.append(name)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                            (key, stage, size, json.dumps(files), time.time()))
+        self._evict()
+        return True
+
+    def _evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.db.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_folder(key), ignore_errors=True)
+            with self.db:
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def size(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def report(self):
+        for stage, counts in self.stats.items():
+            print(f"{stage}: {counts['hits']} cache hits, {counts['misses']} misses")
+        print(f"Stage cache: {self.size() / 1e6:.1f} MB of {self.max_bytes / 1e6:.0f} MB in {self.folder}")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CacheEntry:
+    """
+    One stage run, returned by StageCache.entry. restore() copies the outputs back from the cache and returns
+    True on a hit; after a miss, the stage writes its outputs and calls store().
+    """
+
+    def __init__(self, cache, stage, key, outputs):
+        self.cache = cache
+        self.stage = stage
+        self.key = key
+        self.outputs = outputs
+
+    def restore(self):
+        hit = self.cache.restore(self.stage, self.key, self.outputs)
+        if hit:
+            print(f"♻️ {self.stage}: nothing changed, reusing the cached output")
+        return hit
+
+    def store(self):
+        return self.cache.store(self.stage, self.key, self.outputs)
@@ -4,6 +4,8 @@ import json
 import random
 from ucsd_json_standardization import *
 from parse_file import *
+from llm_cache import LLMCache
+from instrumentation import stage, timed
 
 try:
     PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
@@ -12,7 +14,15 @@ except NameError:
 INPUT_FOLDER = os.path.join(PROJECT_ROOT, "input")
 DATA_FOLDER = os.path.join(PROJECT_ROOT, "data")
 
-def standardize_file(input_file):
+# Modules whose code decides the standardized output, for the stage cache
+STANDARDIZE_CODE = ["standardization", "ucsd_json_standardization", "parse_file", "schema_inference",
+                    "sharded_reader", "llm_client"]
+
+
+@timed("standardize")
+def standardize_file(input_file, cache=None):
+    # cache (StageCache, optional): reuse the output of an earlier run on the same file instead of
+    # standardizing (and calling GPT) again. See stage_cache.py.
     # get basename without extension
     base_name = os.path.splitext(os.path.basename(input_file))[0]
     ext = os.path.splitext(input_file)[1].lower()
@@ -25,16 +35,32 @@ def standardize_file(input_file):
         print(f"Error: {base_name+ext} not found in {INPUT_FOLDER}")
         sys.exit(1)
 
-    if ext == ".json" and is_ucsd_format:
-        handle_ucsd_json(full_input_path, output_path, 1000, random.randint(1, 1000))
+    entry = None
+    if cache is not None:
+        entry = cache.entry("standardize", [full_input_path], [output_path],
+                            config={"sample_size": 1000, "gpt_model": GPT_MODEL}, code=STANDARDIZE_CODE)
+        if entry.restore():
+            return output_path
+
+    # One pass over the file: detection peeks at the first records, sampling streams the rest
+    with stage("standardize.ucsd_sample") as t:
+        reservoir = sample_ucsd_file(full_input_path, 1000, random.randint(1, 1000)) if ext == ".json" else None
+        t.rows_out = len(reservoir) if reservoir is not None else None
+    if reservoir is not None:
+        with stage("standardize.ucsd_write", rows_in=len(reservoir)):
+            handle_ucsd_json(full_input_path, output_path, 1000, None, reservoir=reservoir)
     else:
         try:
-            result = parse_file(full_input_path, output_path)
+            # Reviews answered by GPT in an earlier run come from the LLM cache (llm_cache.py)
+            with LLMCache() as llm_cache:
+                result = parse_file(full_input_path, output_path, llm_cache=llm_cache)
             with open(output_path, "w", encoding="utf-8") as f:
                 json.dump(result, f, ensure_ascii=False, indent=2)
         except Exception as e:
             print(f"Error parsing file: {e}")
             sys.exit(1)
 
+    if entry is not None:
+        entry.store()
     print("File is successfully standardized!")
     return output_path
\ No newline at end of file
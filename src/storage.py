@@ -0,0 +1,126 @@
+import os
+import pandas as pd
+
+"""
+Storage for the stage hand-off artifacts (_preprocessed, _final, _results).
+CSV stays the default. "parquet" and "feather" keep the dtypes between stages instead of re-parsing text and
+re-inferring them: low-cardinality string columns are written as dictionary-encoded categoricals and the
+review timestamp as int64 milliseconds, and both come back with the same dtypes on load.
+"""
+
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+# The id and label columns preprocess.py turns into categoricals
+CATEGORICAL_COLS = ["sentiment_category", "gmap_id", "user_name", "business_name", "user_id"]
+DICTIONARY_COLS = CATEGORICAL_COLS + ["vader_category", "verdict"]
+TIMESTAMP_COLS = ["time"]
+
+
+def artifact_path(folder, name, fmt="csv"):
+    """
+    Path of a stage artifact, e.g. artifact_path(DATA_FOLDER, "test_final", "parquet") -> data/test_final.parquet
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown storage format '{fmt}'. Choose from {list(FORMATS)}")
+    return os.path.join(folder, f"{name}{FORMATS[fmt]}")
+
+
+def format_of(path):
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in FORMATS.items():
+        if ext == fmt_ext:
+            return fmt
+    raise ValueError(f"Cannot tell the storage format of {path}. Expected one of {list(FORMATS.values())}")
+
+
+def to_columnar(df):
+    # Only the columns that change are replaced, the caller's frame is left alone
+    converted = {}
+    for col in DICTIONARY_COLS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            converted[col] = df[col].astype("category")
+    for col in TIMESTAMP_COLS:
+        if col in df.columns and df[col].dtype != "int64" and df[col].notna().all():
+            values = pd.to_numeric(df[col], errors="coerce")
+            if values.notna().all() and (values == values.round()).all():
+                converted[col] = values.astype("int64")
+    return df.assign(**converted) if converted else df
+
+
+def save_frame(df, path, fmt=None):
+    """
+    Writes a stage artifact. The format comes from the file extension unless fmt is given.
+
+    Returns:
+        str: path
+    """
+    fmt = fmt or format_of(path)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        to_columnar(df).to_parquet(path, engine="pyarrow", index=False)
+    elif fmt == "feather":
+        to_columnar(df).reset_index(drop=True).to_feather(path)
+    else:
+        raise ValueError(f"Unknown storage format '{fmt}'. Choose from {list(FORMATS)}")
+    return path
+
+
+def _chunk_schema(schema):
+    # Chunks with more distinct values get wider dictionary indices, fix them all to int32
+    import pyarrow as pa
+    fields = [pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type)) if pa.types.is_dictionary(f.type)
+              else f for f in schema]
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+class ChunkWriter:
+    """
+    Appends frames to one CSV or Parquet artifact, for stages that never hold the whole frame.
+    Every chunk takes the column types of the first one. Feather files can only be written in one go.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.fmt = fmt or format_of(path)
+        if self.fmt not in ("csv", "parquet"):
+            raise ValueError(f"'{self.fmt}' artifacts cannot be written in chunks, use csv or parquet")
+        self.rows = 0
+        self._writer = None
+
+    def write(self, df):
+        if self.fmt == "csv":
+            first = self._writer is None
+            df.to_csv(self.path, mode="w" if first else "a", header=first, index=False)
+            self._writer = True
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(to_columnar(df), preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, _chunk_schema(table.schema))
+            self._writer.write_table(table.cast(self._writer.schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self.fmt == "parquet" and self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_frame(path, fmt=None, columns=None):
+    """
+    Reads a stage artifact written by save_frame (or any CSV). columns limits the columns read.
+    """
+    fmt = fmt or format_of(path)
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns)
+    if fmt == "parquet":
+        return pd.read_parquet(path, engine="pyarrow", columns=columns)
+    if fmt == "feather":
+        return pd.read_feather(path, columns=columns)
+    raise ValueError(f"Unknown storage format '{fmt}'. Choose from {list(FORMATS)}")
@@ -0,0 +1,258 @@
+import os
+import re
+import json
+import zlib
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+DEFAULT_CACHE_FOLDER = os.path.join(PROJECT_ROOT, ".cache", "text_features")
+
+"""
+Dense numeric features of the review text, computed once per distinct text and cached by a hash of it.
+Models trained with DENSE_TEXT_FEATURES in train_catboost.py take these columns instead of the raw text, so
+building a Pool no longer tokenizes and dictionary-processes every review, and repeated or unchanged texts
+cost a cache lookup.
+
+The features do not depend on the labels, so the same values serve every training fold and scoring:
+lengths and token counts, character class ratios, and a signed hashed bag of words (feature hashing,
+L2-normalized) standing in for CatBoost's BoW estimates. FEATURE_VERSION names the definition; models record
+the version they were trained with and inference.load_metadata refuses another one.
+
+    with TextFeatureCache() as cache:
+        df = add_text_features(df, cache=cache)
+"""
+
+# Bump whenever compute_text_features changes, it invalidates the cache and the models trained on it
+FEATURE_VERSION = "txt-1"
+HASH_DIMS = 16
+PREFIX = "txt_"
+STAT_NAMES = ["chars", "words", "mean_word_len", "unique_word_ratio", "upper_ratio", "digit_ratio", "punct_ratio",
+              "exclaims", "questions", "urls", "repeated_chars", "is_unknown"]
+FEATURE_NAMES = [PREFIX + name for name in STAT_NAMES] + [f"{PREFIX}h{i}" for i in range(HASH_DIMS)]
+VERSION_FILE = "text_feature_version.pkl"
+DEFAULT_MAX_ROWS = 20000000  # ~2.2 GB of features
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+URL_RE = re.compile(r"https?://|www\.")
+REPEAT_RE = re.compile(r"(.)\1{2,}")
+
+
+def text_hashes(texts):
+    # 64-bit keys, one per text
+    return np.array([int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little")
+                     for t in texts], dtype=np.uint64)
+
+
+def _features(text):
+    n_chars = len(text)
+    tokens = TOKEN_RE.findall(text.lower())
+    n_words = len(tokens)
+    stats = [
+        n_chars,
+        n_words,
+        sum(map(len, tokens)) / n_words if n_words else 0.0,
+        len(set(tokens)) / n_words if n_words else 0.0,
+        sum(map(str.isupper, text)) / n_chars if n_chars else 0.0,
+        sum(map(str.isdigit, text)) / n_chars if n_chars else 0.0,
+        (n_chars - sum(map(str.isalnum, text)) - sum(map(str.isspace, text))) / n_chars if n_chars else 0.0,
+        text.count("!"),
+        text.count("?"),
+        len(URL_RE.findall(text)),
+        len(REPEAT_RE.findall(text)),
+        float(text == "unknown"),
+    ]
+    # crc32 is stable across processes and runs, unlike hash()
+    hashed = np.zeros(HASH_DIMS)
+    for token in tokens:
+        h = zlib.crc32(token.encode("utf-8"))
+        hashed[h % HASH_DIMS] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.sqrt((hashed ** 2).sum())
+    return stats + list(hashed / norm if norm else hashed)
+
+
+def compute_text_features(texts):
+    """
+    Returns:
+        np.ndarray: float32, one row per text, columns as FEATURE_NAMES
+    """
+    if not len(texts):
+        return np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32)
+    return np.array([_features(t) for t in texts], dtype=np.float32)
+
+
+class TextFeatureCache:
+    """
+    Text features by text hash, in two arrays: sorted uint64 keys and a float32 row per key.
+    On disk (keys.npy, features.npy and version.json in folder) they are memory-mapped, so opening the cache
+    reads nothing up front. New rows are merged in on save(). A cache written with another FEATURE_VERSION is
+    ignored, and past max_rows it starts over with the rows of the current run.
+
+    Args:
+        folder (str, optional): Cache folder. None keeps the cache in memory only (e.g. the scoring service).
+        max_rows (int): Texts kept.
+    """
+
+    def __init__(self, folder=DEFAULT_CACHE_FOLDER, max_rows=DEFAULT_MAX_ROWS):
+        self.folder = folder
+        self.max_rows = max_rows
+        self.stats = {"hits": 0, "misses": 0}
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.rows = np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32)
+        self._pending = {}
+        if folder and self._version_on_disk() == FEATURE_VERSION:
+            self.keys = np.load(os.path.join(folder, "keys.npy"), mmap_mode="r")
+            self.rows = np.load(os.path.join(folder, "features.npy"), mmap_mode="r")
+
+    def _version_on_disk(self):
+        try:
+            with open(os.path.join(self.folder, "version.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("features") != FEATURE_NAMES:
+            return None
+        return meta.get("version")
+
+    def __len__(self):
+        return len(self.keys) + len(self._pending)
+
+    def lookup(self, keys):
+        """
+        Returns:
+            tuple: (found mask, float32 rows of the found keys)
+        """
+        # Rows added since the last merge sit in a dict until there are enough of them to re-sort the arrays
+        if len(self._pending) >= max(4096, len(self.keys) // 8):
+            self._merge_pending()
+        keys = np.asarray(keys, dtype=np.uint64)
+        pos = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        found = self.keys[pos] == keys if len(self.keys) else np.zeros(len(keys), dtype=bool)
+        rows = np.empty((len(keys), len(FEATURE_NAMES)), dtype=np.float32)
+        rows[found] = self.rows[pos[found]]
+        if self._pending:
+            for i in np.flatnonzero(~found):
+                row = self._pending.get(int(keys[i]))
+                if row is not None:
+                    rows[i] = row
+                    found[i] = True
+        self.stats["hits"] += int(found.sum())
+        self.stats["misses"] += int(len(keys) - found.sum())
+        return found, rows[found]
+
+    def add(self, keys, rows):
+        self._pending.update(zip(np.asarray(keys, dtype=np.uint64).tolist(), np.asarray(rows, dtype=np.float32)))
+
+    def _merge_pending(self):
+        if not self._pending:
+            return
+        new_keys = np.fromiter(self._pending.keys(), dtype=np.uint64, count=len(self._pending))
+        new_rows = np.stack(list(self._pending.values()))
+        keys, rows = np.concatenate([new_keys, self.keys]), np.concatenate([new_rows, self.rows])
+        if len(keys) > self.max_rows:
+            keys, rows = new_keys, new_rows
+        keys, first = np.unique(keys, return_index=True)
+        self.keys, self.rows = keys, rows[first]
+        self._pending = {}
+
+    def save(self):
+        if not self.folder or not self._pending:
+            return
+        self._merge_pending()
+        os.makedirs(self.folder, exist_ok=True)
+        # Write aside then rename, a reader never sees half a cache
+        for name, array in (("keys", self.keys), ("features", self.rows)):
+            tmp = os.path.join(self.folder, f"{name}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, os.path.join(self.folder, f"{name}.npy"))
+        with open(os.path.join(self.folder, "version.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": FEATURE_VERSION, "features": FEATURE_NAMES}, f)
+
+    def report(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        rate = self.stats["hits"] / total if total else 0.0
+        print(f"♻️ Text feature cache: {self.stats['hits']} hits, {self.stats['misses']} computed "
+              f"({rate:.0%} hit rate), {len(self)} texts cached")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+
+def text_feature_matrix(texts, cache=None):
+    """
+    Features of every text. Each distinct text is looked up (or computed) once.
+
+    Returns:
+        np.ndarray: float32, one row per text, columns as FEATURE_NAMES
+    """
+    codes, uniques = pd.factorize(pd.Series(texts).fillna("unknown").astype(str))
+    uniques = list(uniques)
+    if cache is None:
+        return compute_text_features(uniques)[codes]
+
+    keys = text_hashes(uniques)
+    unique_rows = np.empty((len(uniques), len(FEATURE_NAMES)), dtype=np.float32)
+    found, rows = cache.lookup(keys)
+    unique_rows[found] = rows
+    missing = np.flatnonzero(~found)
+    if len(missing):
+        computed = compute_text_features([uniques[i] for i in missing])
+        unique_rows[missing] = computed
+        cache.add(keys[missing], computed)
+    return unique_rows[codes]
+
+
+def add_text_features(df, text_col="text", cache=None):
+    """
+    Returns:
+        pd.DataFrame: df with the FEATURE_NAMES columns added (the caller's frame is left alone)
+    """
+    matrix = text_feature_matrix(df[text_col], cache)
+    features = pd.DataFrame(matrix, columns=FEATURE_NAMES, index=df.index)
+    return pd.concat([df.drop(columns=FEATURE_NAMES, errors="ignore"), features], axis=1)
+
+
+def check_parity(cache, texts, sample_size=1000, seed=0):
+    """
+    Recomputes the features of a sample of texts and compares them with the cached rows, which are what
+    the models see at scoring time.
+
+    Returns:
+        int: texts compared
+    Raises:
+        ValueError: when a cached row differs from the recomputed one
+    """
+    texts = pd.Series(texts).fillna("unknown").astype(str).drop_duplicates()
+    if len(texts) > sample_size:
+        texts = texts.sample(sample_size, random_state=seed)
+    texts = texts.tolist()
+    cache._merge_pending()
+    found, rows = cache.lookup(text_hashes(texts))
+    expected = compute_text_features([t for t, f in zip(texts, found) if f])
+    bad = int((~np.isclose(rows, expected, rtol=1e-6, atol=1e-6).all(axis=1)).sum())
+    if bad:
+        raise ValueError(f"{bad} of {len(expected)} cached text feature rows differ from the features computed now")
+    return len(expected)
+
+
+def uses_text_features(feature_order):
+    return any(col in FEATURE_NAMES for col in feature_order)
+
+
+def check_model_version(model_folder):
+    # Models trained on dense text features saved the version they used, it must be the one computed here
+    import joblib
+    path = os.path.join(model_folder, VERSION_FILE)
+    if os.path.exists(path):
+        trained = joblib.load(path)
+        if trained != FEATURE_VERSION:
+            raise RuntimeError(f"The models in {model_folder} were trained on text features {trained}, this code "
+                               f"computes {FEATURE_VERSION}. Retrain them (train_catboost.py).")
@@ -1,16 +1,55 @@
 import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import GroupKFold
 from sklearn.metrics import average_precision_score, roc_auc_score, precision_recall_curve
-from catboost import CatBoostClassifier, Pool
+from catboost import CatBoostClassifier, Pool, __version__ as CATBOOST_VERSION
 import joblib
+from export_ensemble import export_fused_model
+from inference import build_pool, ensemble_predict
+from text_features import FEATURE_VERSION, VERSION_FILE, TextFeatureCache, add_text_features, check_parity
+
+"""
+Trains the GroupKFold CatBoost ensemble used by inference.py.
+
+    python src/train_catboost.py --workers 5            # 5 folds at a time, cores // 5 CatBoost threads each
+    train(n_workers=5)                                  # same from Python
+
+Every finished fold is checkpointed (model, out-of-fold predictions, best iteration) to a run folder named
+after the training data and the parameters, so running the same training again skips the folds already done,
+e.g. after a crash in fold 8. The out-of-fold predictions of all folds then go to the threshold search, and
+the fold models and metadata are written to the model folder.
+
+The training Pool is built once and every fold trains on row slices of it. Without raw text features
+(DENSE_TEXT_FEATURES) it is also quantized once and kept in .cache/datasets as a CatBoost quantized pool, which
+later runs and experiments load directly until the training CSV or the quantization parameters change. Its
+borders are computed once on all the training rows, so they also see each fold's validation rows.
+"""
 
 # ----------------------------
 # CONSTANTS
 # ----------------------------
-DATA_FOLDER = "training_data"
-MODEL_FOLDER = "model"
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))  # script mode
+except NameError:
+    PROJECT_ROOT = os.path.abspath("..")  # notebook mode
+
+DATA_FOLDER = os.path.join(PROJECT_ROOT, "training_data")
+MODEL_FOLDER = os.path.join(PROJECT_ROOT, "model")
+RUNS_FOLDER = os.path.join(PROJECT_ROOT, ".cache", "training_runs")
+DATASETS_FOLDER = os.path.join(PROJECT_ROOT, ".cache", "datasets")
+# Bump whenever prepare_dataset changes what goes into the Pool
+DATASET_VERSION = "pool-1"
+# CatBoost parameters that decide the borders, training on a quantized Pool ignores them
+QUANTIZATION_PARAMS = ["border_count", "max_bin", "feature_border_type", "per_float_feature_quantization",
+                       "nan_mode"]
 INPUT_FILE = "reviews_with_vader.csv"
 
 NUMBEROFKFOLDS = 10
@@ -20,122 +59,368 @@ MAXTREEDEPTH = 8
 RANDOMIZATION = 42
 CHANCES = 200
 UPDATEFREQUENCY = 200
+EXPORT_FUSED = False  # also write model/ensemble_fused.joblib, see export_ensemble.py
+# Replace CatBoost's text processing with the cached dense text features (text_features.py).
+# Every fold then reuses one feature matrix instead of tokenizing the texts again.
+DENSE_TEXT_FEATURES = False
+
+DEFAULT_PARAMS = {
+    "iterations": MAXITERS,
+    "learning_rate": RATE,
+    "depth": MAXTREEDEPTH,
+    "random_seed": RANDOMIZATION,
+    "early_stopping_rounds": CHANCES,
+}
+
 
 # ----------------------------
 # LOAD DATA
 # ----------------------------
-file_path = os.path.join(DATA_FOLDER, INPUT_FILE)
-df = pd.read_csv(file_path)
+def load_training_data(file_path=os.path.join(DATA_FOLDER, INPUT_FILE), dense_text_features=DENSE_TEXT_FEATURES):
+    """
+    Returns:
+        dict: df, X, y, groups, feature_cols, cat_features, text_features
+    """
+    df = pd.read_csv(file_path)
 
-# Drop duplicates & optional columns
-df = df.drop_duplicates()
-if "sentiment_category" in df.columns:
-    df = df.drop(columns=["sentiment_category"])
+    # Drop duplicates & optional columns
+    df = df.drop_duplicates().reset_index(drop=True)
+    if "sentiment_category" in df.columns:
+        df = df.drop(columns=["sentiment_category"])
 
-# Target column
-y = df["spam_label"].values
+    # Target column
+    y = df["spam_label"].values
 
-# Features (everything except label)
-feature_cols = [col for col in df.columns if col != "spam_label"]
-X = df[feature_cols].copy()
+    # Features (everything except label)
+    feature_cols = [col for col in df.columns if col != "spam_label"]
+    X = df[feature_cols].copy()
 
-# Ensure group labels are consistent
-groups = df["business_name"].fillna("unknown").astype(str).values
+    # Ensure group labels are consistent
+    groups = df["business_name"].fillna("unknown").astype(str).values
 
-# Identify categorical + text features
-cat_features = [i for i, col in enumerate(X.columns) if X[col].dtype == "object" and col != "text"]
-text_features = [X.columns.get_loc("text")]
+    if dense_text_features:
+        with TextFeatureCache() as text_cache:
+            X = add_text_features(X, cache=text_cache).drop(columns=["text"])
+            print(f"Text features parity checked on {check_parity(text_cache, df['text'])} texts")
+            text_cache.report()
+        feature_cols = X.columns.tolist()
+
+    # Identify categorical + text features (strings are "object" or "str" depending on the pandas version)
+    cat_features = [i for i, col in enumerate(X.columns)
+                    if not pd.api.types.is_numeric_dtype(X[col]) and col != "text"]
+    text_features = [X.columns.get_loc("text")] if "text" in X.columns else []
+
+    print("Categorical features:", [X.columns[i] for i in cat_features])
+    print("Text features:", [X.columns[i] for i in text_features])
+    return {"df": df, "X": X, "y": y, "groups": groups, "feature_cols": feature_cols,
+            "cat_features": cat_features, "text_features": text_features, "source_hash": file_hash(file_path)}
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def run_id(data, params, n_folds):
+    # Same data, parameters and folds -> same run folder, so a rerun finds the finished folds
+    h = hashlib.blake2b(digest_size=8)
+    h.update(pd.util.hash_pandas_object(data["X"], index=False).values.tobytes())
+    h.update(np.asarray(data["y"]).tobytes())
+    h.update(json.dumps({"params": params, "n_folds": n_folds, "columns": data["feature_cols"],
+                         "cat": data["cat_features"], "text": data["text_features"], "dataset": DATASET_VERSION},
+                        sort_keys=True).encode())
+    return h.hexdigest()
 
-print("Categorical features:", [X.columns[i] for i in cat_features])
-print("Text features:", [X.columns[i] for i in text_features])
 
 # ----------------------------
-# CROSS-VALIDATION TRAINING
+# DATASET PREPARATION
 # ----------------------------
-os.makedirs(MODEL_FOLDER, exist_ok=True)
+def quantization_params(params):
+    return {k: v for k, v in (params or {}).items() if k in QUANTIZATION_PARAMS}
+
+
+def dataset_path(data, folder=DATASETS_FOLDER, params=None):
+    h = hashlib.blake2b(digest_size=8)
+    h.update(json.dumps({"source": data["source_hash"], "columns": data["feature_cols"], "cat": data["cat_features"],
+                         "quantization": quantization_params(params), "version": DATASET_VERSION,
+                         "catboost": CATBOOST_VERSION}, sort_keys=True).encode())
+    return os.path.join(folder, f"{h.hexdigest()}.bin")
+
+
+def prepare_dataset(data, folder=DATASETS_FOLDER, params=None):
+    """
+    The labelled Pool of all training rows, which the folds slice by row index.
+
+    Without text features it is quantized once, with the QUANTIZATION_PARAMS found in params (CatBoost's
+    defaults otherwise), and saved to folder under a hash of the training CSV, the feature layout and those
+    parameters, and loaded from there, on the first run too, so every run trains on the same quantized data.
+    The borders are then computed on all the training rows, the validation rows of each fold included, where
+    quantizing each fold's own slice used only its training rows. CatBoost 1.2 can neither save text features
+    in a quantized pool nor train on slices of a quantized pool that has them, so with text features the raw
+    Pool is returned and each fold quantizes its own slice as before.
+
+    Args:
+        data (dict): load_training_data output.
+        folder (str, optional): Dataset cache folder. None keeps the Pool in memory only.
+        params (dict, optional): CatBoost parameters of the run, only QUANTIZATION_PARAMS are used.
+    Returns:
+        catboost.Pool
+    """
+    if data["text_features"] or folder is None:
+        return build_pool(data["X"], data["feature_cols"], data["cat_features"], data["text_features"],
+                          label=data["y"])
+
+    path = dataset_path(data, folder, params)
+    if os.path.exists(path):
+        print(f"♻️ Reusing the quantized training pool {path}")
+    else:
+        pool = build_pool(data["X"], data["feature_cols"], data["cat_features"], data["text_features"],
+                          label=data["y"])
+        pool.quantize(**quantization_params(params))
+        os.makedirs(folder, exist_ok=True)
+        # Write aside then rename, a concurrent run never loads half a pool
+        pool.save(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        print(f"✅ Quantized training pool saved to {path}")
+    return Pool("quantized://" + path)
+
+
+# ----------------------------
+# FOLD TRAINING
+# ----------------------------
+# Forked workers inherit the training data through this instead of pickling it
+_SHARED_DATA = {}
+
+
+def _fold_paths(run_dir, fold):
+    return os.path.join(run_dir, f"fold_{fold}.cbm"), os.path.join(run_dir, f"fold_{fold}.npz")
+
 
-gkf = GroupKFold(n_splits=NUMBEROFKFOLDS)
-oof_preds = np.zeros(len(df))
-best_iterations = []
+def fold_done(run_dir, fold):
+    # The .npz is written last, so its presence means the fold finished
+    return os.path.exists(_fold_paths(run_dir, fold)[1])
 
-# Class weights for imbalance
-genuine_count = (y == 0).sum()
-spam_count = (y == 1).sum()
-pos_weight = genuine_count / max(spam_count, 1)
-class_weights = [1.0, float(pos_weight)]
 
-for fold, (train_idx, val_idx) in enumerate(gkf.split(X, y, groups)):
-    print(f"\nFold {fold+1}/{NUMBEROFKFOLDS}")
+def load_fold_result(run_dir, fold):
+    with np.load(_fold_paths(run_dir, fold)[1]) as f:
+        return {"fold": fold, "val_idx": f["val_idx"], "val_preds": f["val_preds"],
+                "best_iteration": int(f["best_iteration"]), "seconds": float(f["seconds"])}
 
-    X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-    y_train, y_val = y[train_idx], y[val_idx]
 
-    train_pool = Pool(X_train, label=y_train, cat_features=cat_features, text_features=text_features)
-    val_pool = Pool(X_val, label=y_val, cat_features=cat_features, text_features=text_features)
+def train_fold(fold, train_idx, val_idx, params, run_dir, thread_count=-1, verbose=UPDATEFREQUENCY):
+    """
+    Trains one fold on the shared training data and checkpoints it to run_dir.
+
+    Returns:
+        dict: fold, val_idx, val_preds, best_iteration, seconds
+    """
+    started = time.perf_counter()
+    data = _SHARED_DATA
+    train_pool, val_pool = data["pool"].slice(train_idx), data["pool"].slice(val_idx)
 
     model = CatBoostClassifier(
-        iterations=MAXITERS,
-        learning_rate=RATE,
-        depth=MAXTREEDEPTH,
+        **params,
         loss_function="Logloss",
         eval_metric="AUC",
-        random_seed=RANDOMIZATION,
-        early_stopping_rounds=CHANCES,
-        verbose=UPDATEFREQUENCY,
-        class_weights=class_weights
+        verbose=verbose,
+        class_weights=data["class_weights"],
+        thread_count=thread_count,
+        train_dir=os.path.join(run_dir, f"catboost_info_fold_{fold}"),
     )
-
     model.fit(train_pool, eval_set=val_pool, use_best_model=True)
+    if val_pool.is_quantized():
+        # CatBoost cannot predict from the categorical columns of a quantized pool, the raw rows are needed
+        val_pool = build_pool(data["X"].iloc[val_idx], data["feature_cols"], data["cat_features"],
+                              data["text_features"])
     val_preds = model.predict_proba(val_pool)[:, 1]
-    oof_preds[val_idx] = val_preds
+    best_iteration = model.get_best_iteration() or params["iterations"]
+    seconds = time.perf_counter() - started
+
+    # Write aside then rename: an interrupted fold leaves no checkpoint behind
+    model_path, result_path = _fold_paths(run_dir, fold)
+    model.save_model(model_path + ".tmp")
+    os.replace(model_path + ".tmp", model_path)
+    with open(result_path + ".tmp", "wb") as f:
+        np.savez(f, val_idx=val_idx, val_preds=val_preds, best_iteration=best_iteration, seconds=seconds)
+    os.replace(result_path + ".tmp", result_path)
+    return load_fold_result(run_dir, fold)
+
+
+def train_folds(data, params=None, n_folds=NUMBEROFKFOLDS, run_dir=None, n_workers=1, thread_count=None,
+                folds=None, dataset_folder=DATASETS_FOLDER, verbose=UPDATEFREQUENCY):
+    """
+    Trains the GroupKFold folds, n_workers at a time, skipping the ones already checkpointed in run_dir.
+
+    Args:
+        data (dict): load_training_data output, with an optional prepared "pool" (prepare_dataset).
+        params (dict, optional): CatBoost parameters. Defaults to DEFAULT_PARAMS.
+        n_folds (int): GroupKFold splits.
+        run_dir (str, optional): Checkpoint folder. Defaults to RUNS_FOLDER/<run_id>.
+        n_workers (int): Folds trained at the same time, each in its own process (1 trains in this process).
+        thread_count (int, optional): CatBoost threads per fold. Defaults to cores // n_workers.
+        folds (list, optional): 1-based fold numbers to train, all by default.
+        dataset_folder (str, optional): Quantized pool cache, see prepare_dataset.
+    Returns:
+        tuple: (oof_preds with NaN for the folds not trained, list of fold results ordered by fold, run_dir)
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    run_dir = run_dir or os.path.join(RUNS_FOLDER, run_id(data, params, n_folds))
+    os.makedirs(run_dir, exist_ok=True)
+    thread_count = thread_count or max(1, (os.cpu_count() or 1) // n_workers)
+
+    # Class weights for imbalance
+    y = data["y"]
+    pos_weight = (y == 0).sum() / max((y == 1).sum(), 1)
+    _SHARED_DATA.update(data, class_weights=[1.0, float(pos_weight)])
 
-    best_iterations.append(model.get_best_iteration() or MAXITERS)
+    splits = list(GroupKFold(n_splits=n_folds).split(data["X"], y, data["groups"]))
+    wanted = folds or list(range(1, n_folds + 1))
+    done = [f for f in wanted if fold_done(run_dir, f)]
+    todo = [f for f in wanted if f not in done]
+    if done:
+        print(f"♻️ Folds {done} already trained in {run_dir}, skipping them")
+    if todo and "pool" not in data:
+        # Built once for all folds, the workers inherit it
+        _SHARED_DATA["pool"] = prepare_dataset(data, dataset_folder, params)
 
-    # Save each fold model
-    fold_model_path = os.path.join(MODEL_FOLDER, f"fold_{fold+1}.cbm")
-    model.save_model(fold_model_path)
-    print(f"✅ Saved fold {fold+1} model → {fold_model_path}")
-    print("Fold AP:", average_precision_score(y_val, val_preds))
+    results = {f: load_fold_result(run_dir, f) for f in done}
+    try:
+        if n_workers <= 1 or len(todo) <= 1:
+            for fold in todo:
+                print(f"\nFold {fold}/{n_folds}")
+                results[fold] = train_fold(fold, *splits[fold - 1], params, run_dir, thread_count, verbose)
+                _print_fold(results[fold], y)
+        else:
+            if "fork" not in multiprocessing.get_all_start_methods():
+                raise RuntimeError("Parallel fold training needs the fork start method, use n_workers=1")
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=min(n_workers, len(todo)), mp_context=context) as executor:
+                futures = [executor.submit(train_fold, fold, *splits[fold - 1], params, run_dir, thread_count,
+                                           verbose) for fold in todo]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[result["fold"]] = result
+                    _print_fold(result, y)
+    finally:
+        _SHARED_DATA.clear()
+
+    oof_preds = np.full(len(y), np.nan)
+    for result in results.values():
+        oof_preds[result["val_idx"]] = result["val_preds"]
+    return oof_preds, [results[f] for f in sorted(results)], run_dir
+
+
+def _print_fold(result, y):
+    print(f"✅ Fold {result['fold']} trained in {result['seconds']:.1f}s, best iteration {result['best_iteration']}, "
+          f"AP {average_precision_score(y[result['val_idx']], result['val_preds']):.4f}")
 
-print("\nOOF Average Precision:", average_precision_score(y, oof_preds))
-print("OOF ROC-AUC:", roc_auc_score(y, oof_preds))
 
 # ----------------------------
 # THRESHOLD SELECTION
 # ----------------------------
-precision, recall, thresholds = precision_recall_curve(y, oof_preds)
-f1_scores = 2 * precision[:-1] * recall[:-1] / (precision[:-1] + recall[:-1] + 1e-12)
-best_idx = np.nanargmax(f1_scores)
-best_threshold = thresholds[best_idx]
-best_f1 = f1_scores[best_idx]
+def best_f1_threshold(y, oof_preds):
+    precision, recall, thresholds = precision_recall_curve(y, oof_preds)
+    f1_scores = 2 * precision[:-1] * recall[:-1] / (precision[:-1] + recall[:-1] + 1e-12)
+    best_idx = np.nanargmax(f1_scores)
+    return thresholds[best_idx], f1_scores[best_idx]
 
-print(f"\nBest F1 = {best_f1:.4f} at threshold {best_threshold:.4f}")
-
-# Save metadata
-joblib.dump(feature_cols, os.path.join(MODEL_FOLDER, "features.pkl"))
-joblib.dump(cat_features, os.path.join(MODEL_FOLDER, "cat_features.pkl"))
-joblib.dump(text_features, os.path.join(MODEL_FOLDER, "text_features.pkl"))
-joblib.dump(best_threshold, os.path.join(MODEL_FOLDER, "threshold.pkl"))
-
-print("\n✅ Metadata saved to model/")
 
 # ----------------------------
-# ENSEMBLE INFERENCE (on training set for sanity check)
+# DRIVER
 # ----------------------------
-all_fold_preds = []
-for fold in range(1, NUMBEROFKFOLDS+1):
-    model = CatBoostClassifier()
-    model.load_model(os.path.join(MODEL_FOLDER, f"fold_{fold}.cbm"))
-    pool = Pool(X, cat_features=cat_features, text_features=text_features)
-    fold_probs = model.predict_proba(pool)[:, 1]
-    all_fold_preds.append(fold_probs)
-
-final_probs = np.mean(all_fold_preds, axis=0)
-final_preds = (final_probs >= best_threshold).astype(int)
-
-train_results = df.copy()
-train_results["probability_spam"] = final_probs
-train_results["predicted_spam_label"] = final_preds
-
-train_results.to_csv(os.path.join(DATA_FOLDER, "train_predictions.csv"), index=False)
-print(f"Ensemble predictions saved to {os.path.join(DATA_FOLDER, 'train_predictions.csv')}")
+def train(file_path=os.path.join(DATA_FOLDER, INPUT_FILE), model_folder=MODEL_FOLDER, params=None,
+          n_folds=NUMBEROFKFOLDS, n_workers=1, thread_count=None, run_dir=None, export_fused=EXPORT_FUSED,
+          dense_text_features=DENSE_TEXT_FEATURES, dataset_folder=DATASETS_FOLDER, verbose=UPDATEFREQUENCY):
+    """
+    Trains the fold ensemble on file_path and writes it with its metadata to model_folder.
+
+    Returns:
+        dict: oof_ap, oof_auc, best_threshold, best_f1, best_iterations, run_dir, seconds
+    """
+    started = time.perf_counter()
+    data = load_training_data(file_path, dense_text_features)
+    df, y = data["df"], data["y"]
+
+    # ----------------------------
+    # CROSS-VALIDATION TRAINING
+    # ----------------------------
+    oof_preds, results, run_dir = train_folds(data, params, n_folds, run_dir, n_workers, thread_count,
+                                              dataset_folder=dataset_folder, verbose=verbose)
+    best_iterations = [r["best_iteration"] for r in results]
+
+    oof_ap = average_precision_score(y, oof_preds)
+    oof_auc = roc_auc_score(y, oof_preds)
+    print("\nOOF Average Precision:", oof_ap)
+    print("OOF ROC-AUC:", oof_auc)
+
+    best_threshold, best_f1 = best_f1_threshold(y, oof_preds)
+    print(f"\nBest F1 = {best_f1:.4f} at threshold {best_threshold:.4f}")
+
+    # Save fold models and metadata
+    os.makedirs(model_folder, exist_ok=True)
+    for fold in range(1, n_folds + 1):
+        shutil.copy2(_fold_paths(run_dir, fold)[0], os.path.join(model_folder, f"fold_{fold}.cbm"))
+        print(f"✅ Saved fold {fold} model → {os.path.join(model_folder, f'fold_{fold}.cbm')}")
+    joblib.dump(data["feature_cols"], os.path.join(model_folder, "features.pkl"))
+    joblib.dump(data["cat_features"], os.path.join(model_folder, "cat_features.pkl"))
+    joblib.dump(data["text_features"], os.path.join(model_folder, "text_features.pkl"))
+    joblib.dump(best_threshold, os.path.join(model_folder, "threshold.pkl"))
+    if dense_text_features:
+        joblib.dump(FEATURE_VERSION, os.path.join(model_folder, VERSION_FILE))
+    elif os.path.exists(os.path.join(model_folder, VERSION_FILE)):
+        os.remove(os.path.join(model_folder, VERSION_FILE))
+
+    print(f"\n✅ Metadata saved to {model_folder}/")
+
+    # ----------------------------
+    # ENSEMBLE INFERENCE (on training set for sanity check)
+    # ----------------------------
+    models = []
+    for fold in range(1, n_folds + 1):
+        model = CatBoostClassifier()
+        model.load_model(os.path.join(model_folder, f"fold_{fold}.cbm"))
+        models.append(model)
+    pool = build_pool(data["X"], data["feature_cols"], data["cat_features"], data["text_features"])
+    final_probs = ensemble_predict(models, pool)
+    final_preds = (final_probs >= best_threshold).astype(int)
+
+    train_results = df.copy()
+    train_results["probability_spam"] = final_probs
+    train_results["predicted_spam_label"] = final_preds
+
+    predictions_path = os.path.join(os.path.dirname(file_path), "train_predictions.csv")
+    train_results.to_csv(predictions_path, index=False)
+    print(f"Ensemble predictions saved to {predictions_path}")
+
+    # ----------------------------
+    # EXPORT FUSED ENSEMBLE (opt-in)
+    # ----------------------------
+    if export_fused:
+        export_fused_model(model_folder, file_path)
+
+    seconds = time.perf_counter() - started
+    print(f"⏱️ Training took {seconds:.1f}s ({n_workers} workers)")
+    return {"oof_ap": oof_ap, "oof_auc": oof_auc, "best_threshold": best_threshold, "best_f1": best_f1,
+            "best_iterations": best_iterations, "run_dir": run_dir, "seconds": seconds}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the GroupKFold CatBoost ensemble.")
+    parser.add_argument("--input", default=os.path.join(DATA_FOLDER, INPUT_FILE))
+    parser.add_argument("--model-folder", default=MODEL_FOLDER)
+    parser.add_argument("--folds", type=int, default=NUMBEROFKFOLDS)
+    parser.add_argument("--params", type=json.loads, default=None,
+                        help="JSON CatBoost parameters over the defaults, e.g. from hyperparameter_search.py")
+    parser.add_argument("--workers", type=int, default=1, help="Folds trained at the same time")
+    parser.add_argument("--thread-count", type=int, default=None, help="CatBoost threads per fold")
+    parser.add_argument("--run-dir", default=None, help="Checkpoint folder, to resume a specific run")
+    parser.add_argument("--export-fused", action="store_true", default=EXPORT_FUSED)
+    parser.add_argument("--dense-text-features", action="store_true", default=DENSE_TEXT_FEATURES)
+    args = parser.parse_args()
+
+    train(args.input, args.model_folder, args.params, n_folds=args.folds, n_workers=args.workers,
+          thread_count=args.thread_count, run_dir=args.run_dir, export_fused=args.export_fused,
+          dense_text_features=args.dense_text_features)
@@ -1,13 +1,18 @@
-import jsonlines
 import random
 import os
 import json
+import math
+from itertools import chain, islice
 
 """ 
 Handles the special UCSD JSONL format. 
 Since this dataset already provides structured fields, we can skip the slower GPT-based standardization and perform faster operations instead. 
 This function randomly selects up to 1000 entries from the dataset and standardizes them into the project schema. 
 The sampled subset can then be used for testing or as input to generate pseudo-labels for training. 
+
+Detection only reads the first records, and sampling happens in the same pass over the file: the reservoir
+works on raw lines with Algorithm L, which draws how many lines to skip instead of a random number per line,
+and only the lines it keeps are decoded.
 """
 
 categories = [
@@ -15,17 +20,71 @@ categories = [
     "rating", "sentiment_category", "rating_category", "gmap_id"
 ]
 
-# UCSD Format check
-def is_ucsd_format(input_file):
-    with jsonlines.open(input_file) as reader:
-        data = [obj for obj in reader]
+UCSD_KEYS = ("user_id", "text", "time", "gmap_id")  # Distinct Features
+PEEK_RECORDS = 8
 
+def is_ucsd_records(data):
     return (
         isinstance(data, list)
-        and all(all(k in review for k in ("user_id", "text", "time", "gmap_id")) # Distinct Features
+        and all(isinstance(review, dict) and all(k in review for k in UCSD_KEYS)
                 for review in data[:8])
     )
 
+def iter_lines(f):
+    for line in f:
+        if line.strip():
+            yield line
+
+
+def peek_ucsd_lines(lines, n=PEEK_RECORDS):
+    """
+    Decodes the first n lines only.
+
+    Returns:
+        tuple: (is UCSD, iterator over every line again, peeked ones included)
+    """
+    head = list(islice(lines, n))
+    try:
+        records = [json.loads(line) for line in head]
+    except ValueError:
+        records = None  # a JSON array or some other text, not JSONL
+    return bool(head) and is_ucsd_records(records), chain(head, lines)
+
+
+# UCSD Format check, reads only the first records
+def is_ucsd_format(input_file):
+    with open(input_file, "r", encoding="utf-8") as f:
+        ucsd, _ = peek_ucsd_lines(iter_lines(f))
+    return ucsd
+
+
+def _open_unit(rng):
+    # Uniform in (0, 1), log() of it is finite
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+
+def reservoir_sample(items, k, rng):
+    """
+    Algorithm L (Li, 1994): uniform sample of k items in one pass. Draws the length of the next skip
+    instead of a random number per item, so skipped items are never looked at.
+    """
+    it = iter(items)
+    reservoir = list(islice(it, k))
+    if len(reservoir) < k or k == 0:
+        return reservoir
+
+    w = math.exp(math.log(_open_unit(rng)) / k)
+    while True:
+        skip = math.floor(math.log(_open_unit(rng)) / math.log(1.0 - w))
+        item = next(islice(it, skip, None), None)
+        if item is None:
+            return reservoir
+        reservoir[rng.randrange(k)] = item
+        w *= math.exp(math.log(_open_unit(rng)) / k)
+
 
 # Dealing with float rating (dissimilar to kaggle data)
 def get_rating_category(rating):
@@ -44,33 +103,40 @@ def get_rating_category(rating):
         return "positive"
     return None
 
-def handle_ucsd_json(input_file: str, output_file: str, sample_size: int, seed: int):
-        
-    reservoir = []
-    n = 0
-    # Sample 1000 for training purposes
-    with jsonlines.open(input_file) as reader:
-        for review in reader:
-            n += 1
-            if len(reservoir) < sample_size:
-                reservoir.append(review)
-            else:
-                j = random.randint(0, n - 1)
-                if j < sample_size:
-                    reservoir[j] = review
+def standardize_review(review):
+    entry = {}
+    for field in categories:
+        if field == "user_name":
+            entry[field] = review.get("name", None)
+        elif field == "sentiment_category":
+            entry[field] = get_rating_category(review.get("rating"))
+        else:
+            entry[field] = review.get(field, None)
+    return entry
+
+def sample_ucsd_file(input_file: str, sample_size: int, seed: int):
+    """
+    Detects the UCSD format and samples it in a single pass over the file.
+
+    Returns:
+        list: sample_size raw reviews (all of them if the file is smaller), or None if the file is not UCSD JSONL
+    """
+    with open(input_file, "r", encoding="utf-8") as f:
+        ucsd, lines = peek_ucsd_lines(iter_lines(f))
+        if not ucsd:
+            return None
+        # Sample 1000 for training purposes, only the kept lines are decoded
+        return [json.loads(line) for line in reservoir_sample(lines, sample_size, random.Random(seed))]
+
+
+def handle_ucsd_json(input_file: str, output_file: str, sample_size: int, seed: int, reservoir=None):
+    if reservoir is None:
+        reservoir = sample_ucsd_file(input_file, sample_size, seed)
+        if reservoir is None:
+            raise ValueError(f"{input_file} is not in the UCSD JSONL format")
 
     # standardize schema
-    standardized = []
-    for review in reservoir:
-        entry = {}
-        for field in categories:
-            if field == "user_name":
-                entry[field] = review.get("name", None)
-            elif field == "sentiment_category":
-                entry[field] = get_rating_category(review.get("rating"))
-            else:
-                entry[field] = review.get(field, None)
-        standardized.append(entry)
+    standardized = [standardize_review(review) for review in reservoir]
 
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(standardized, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules in src/ import each other by bare name, as they do in the notebook
+sys.path.insert(0, os.path.join(ROOT, "src"))
+# The benchmark helpers are imported as the benchmarks package
+sys.path.insert(1, ROOT)
+
+TRAINING_FILE = os.path.join(ROOT, "training_data", "reviews_with_vader.csv")
+
+
+@pytest.fixture
+def small_training_file(tmp_path):
+    # Writes tmp_path/reviews_with_vader.csv: every spam row plus n_rows of the rest, so each fold sees both classes
+    def write(n_rows=600):
+        df = pd.read_csv(TRAINING_FILE)
+        df = pd.concat([df[df["spam_label"] == 1], df[df["spam_label"] == 0].sample(n_rows, random_state=0)])
+        path = str(tmp_path / "reviews_with_vader.csv")
+        df.to_csv(path, index=False)
+        return path
+    return write
@@ -0,0 +1,43 @@
+import json
+
+from benchmarks.suite import best_of, compare, run_size
+from benchmarks.synthetic import generate_reviews, write_input
+from ucsd_json_standardization import categories
+
+
+def test_generator_is_deterministic_and_follows_the_knobs():
+    df = generate_reviews(2000, seed=3, text_words=8, duplicate_rate=0.5, n_places=7, n_users=40)
+    assert df.equals(generate_reviews(2000, seed=3, text_words=8, duplicate_rate=0.5, n_places=7, n_users=40))
+    assert not df.equals(generate_reviews(2000, seed=4, text_words=8, duplicate_rate=0.5, n_places=7, n_users=40))
+
+    assert list(df.columns) == categories
+    assert df["gmap_id"].nunique() == 7 and df["user_id"].nunique() <= 40
+    assert df["text"].nunique() < 0.6 * len(df)
+    assert 6 < df["text"].str.split().str.len().mean() < 10
+    assert generate_reviews(2000, duplicate_rate=0.0)["text"].nunique() > 0.99 * 2000
+
+
+def test_written_input_has_free_text_lines(tmp_path):
+    path = tmp_path / "reviews.jsonl"
+    n_free = write_input(generate_reviews(500), str(path), free_text_rate=0.1)
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 500 and sum(isinstance(line, str) for line in lines) == n_free > 0
+
+
+def test_compare_flags_slower_stages():
+    baseline = {"1000": {"vader": {"wall_s": 1.0}, "pool": {"wall_s": 0.001}}}
+    results = {"1000": {"vader": {"wall_s": 1.5}, "pool": {"wall_s": 0.01}, "new": {"wall_s": 1.0}}}
+    assert compare(results, baseline) == [("1000", "vader", 1.5)]
+
+
+def test_best_of_keeps_the_fastest_run():
+    runs = [{"a": {"wall_s": 2.0}, "b": {"wall_s": 1.0}}, {"a": {"wall_s": 1.0}, "b": {"wall_s": 3.0}}]
+    assert best_of(runs) == {"a": {"wall_s": 1.0}, "b": {"wall_s": 1.0}}
+
+
+def test_every_stage_runs(tmp_path):
+    stages = run_size(300, str(tmp_path), free_text_rate=0.02, stub_latency=0.0)
+    for name in ["ingest", "preprocess", "vader", "pool", "score", "write_csv", "write_parquet", "end_to_end",
+                 "pipeline.score"]:
+        assert name in stages
+    assert stages["end_to_end"]["rows_in"] == 300
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import cascade
+import inference
+from cascade import CascadeFilter, band_report, build_cascade, tune_band
+from inference import run_inference
+
+
+@pytest.fixture(scope="module")
+def tier_one():
+    return build_cascade(target_agreement=0.9)
+
+
+def test_band_keeps_the_target_on_the_spam_flags():
+    rng = np.random.default_rng(0)
+    reference = rng.random(2000) < 0.05
+    estimates = np.clip(rng.normal(0.3 + 0.3 * reference, 0.15), 0, 1)
+    for target in (0.8, 0.9, 0.99):
+        low, high = tune_band(estimates, reference, target)
+        check = band_report(estimates, reference, low, high)
+        assert check["spam_recall"] >= target and check["spam_precision"] >= target
+        assert 0 < check["escalated"] < 1
+    assert band_report(estimates, reference, *tune_band(estimates, reference, 1.0))["agreement"] == 1.0
+
+
+def test_separated_classes_are_all_settled():
+    estimates = np.array([0.1, 0.2, 0.3, 0.7, 0.8])
+    reference = estimates > 0.5
+    low, high = tune_band(estimates, reference, 0.99)
+    check = band_report(estimates, reference, low, high)
+    assert check["escalated"] == 0 and check["agreement"] == 1.0
+
+
+def test_oof_check_meets_target(tier_one):
+    model, estimates, reference = tier_one
+    assert model.check["spam_recall"] >= 0.9 and model.check["spam_precision"] >= 0.9
+    assert model.check == band_report(estimates, reference, model.low, model.high)
+
+
+@pytest.mark.parametrize("low, high", [(-np.inf, np.inf), (np.inf, np.inf), (-np.inf, -np.inf), (0.2, 0.6)])
+def test_escalated_reviews_get_the_ensemble_scores(tier_one, low, high, tmp_path, monkeypatch):
+    model = tier_one[0]
+    band = CascadeFilter(model.model, low, high, model.best_threshold, 0.9, model.check)
+    monkeypatch.setattr(cascade, "load_cascade", lambda *a: band)
+    monkeypatch.setattr(inference, "OUTPUT_FOLDER", str(tmp_path))
+    full, _ = run_inference("test_standardized")
+    cascaded, _ = run_inference("test_standardized", use_cascade=True)
+
+    df = inference.load_frame(inference.artifact_path(inference.DATA_FOLDER, "test_standardized_final", "csv"))
+    _, tier_one_decisions, escalate = band.route(df)
+    assert np.allclose(cascaded["probability"][escalate], full["probability"][escalate])
+    np.testing.assert_array_equal(cascaded["decision"][escalate], full["decision"][escalate])
+    np.testing.assert_array_equal(cascaded["decision"][~escalate], tier_one_decisions[~escalate])
+    # Settled probabilities agree with their decisions
+    np.testing.assert_array_equal(cascaded["decision"], (cascaded["probability"] >= band.best_threshold).astype(int))
+
+
+def test_cascade_rejects_fused():
+    with pytest.raises(ValueError):
+        run_inference("test_standardized", use_fused=True, use_cascade=True)
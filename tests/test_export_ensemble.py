@@ -0,0 +1,53 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+
+from export_ensemble import build_fused_ensemble, export_fused_model
+from inference import build_pool, ensemble_predict, load_fold_models, load_fused_model
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAINING_FILE = os.path.join(ROOT, "training_data", "reviews_with_vader.csv")
+FEATURES = ["gmap_id", "time", "rating", "vader_score"]
+
+
+def small_fold_models(folder):
+    # Folds without text features, so CatBoost can sum them
+    df = pd.read_csv(TRAINING_FILE)
+    X = df[FEATURES].astype({"gmap_id": str})
+    for i in range(1, 4):
+        rows = X.sample(frac=0.8, random_state=i)
+        model = CatBoostClassifier(iterations=30, depth=4, verbose=0, random_seed=i, allow_writing_files=False)
+        model.fit(rows, df["spam_label"].loc[rows.index], cat_features=[0])
+        model.save_model(os.path.join(folder, f"fold_{i}.cbm"))
+    joblib.dump(FEATURES, os.path.join(folder, "features.pkl"))
+    joblib.dump([0], os.path.join(folder, "cat_features.pkl"))
+    joblib.dump([], os.path.join(folder, "text_features.pkl"))
+    joblib.dump(0.5, os.path.join(folder, "threshold.pkl"))
+
+
+def test_summed_model_is_one_pass_and_close(tmp_path):
+    small_fold_models(str(tmp_path))
+    fused, check = build_fused_ensemble(str(tmp_path), TRAINING_FILE, tolerance=1.0)
+    assert fused.kind == "summed"
+    assert fused.model.tree_count_ == sum(m.tree_count_ for m in load_fold_models(str(tmp_path)))
+    assert check["decision_agreement"] > 0.99
+
+
+def test_nothing_written_above_tolerance(tmp_path):
+    small_fold_models(str(tmp_path))
+    assert export_fused_model(str(tmp_path), TRAINING_FILE, tolerance=0.0) is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "ensemble_fused.joblib"))
+
+
+def test_exported_model_loads_in_one_call(tmp_path):
+    small_fold_models(str(tmp_path))
+    export_fused_model(str(tmp_path), TRAINING_FILE, tolerance=1.0)
+    fused = load_fused_model(str(tmp_path))
+
+    df = pd.read_csv(TRAINING_FILE).head(200)
+    pool = build_pool(df, fused.feature_order, fused.cat_features, fused.text_features)
+    reference = ensemble_predict(load_fold_models(str(tmp_path)), pool)
+    assert np.max(np.abs(fused.predict_proba(pool) - reference)) < 0.1
@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+import pytest
+
+nltk_data = pytest.importorskip("nltk.data")
+from nltk.sentiment import SentimentIntensityAnalyzer
+from nltk.sentiment.vader import SentiText, VaderConstants
+
+from fast_vader import NLTK_LEXICON, FastVader, compile_index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GOLDEN = [
+    "", "   ", "a", "GREAT", "GREAT food", "Good good GOOD good.", "no",
+    "I do NOT like it", "not bad at all", "isn't great", "without love", "uh-uh good",
+    "The food was kind of good but the service was VERY BAD!!!", "good but bad good but",
+    "never so good", "never this bad", "so good", "at least it was fine", "least good", "very least good",
+    "the shit", "yeah right, great", "cut the mustard indeed good", "it was the bomb", "kiss of death",
+    "kind of good", "sort of bad", "just enough good", "barely ok", "extremely HAPPY with it",
+    ":) :( <3", "wasn't it good??", "good????", "good!!!!!!", "'good' \"bad\"", "good... bad!?!", "--good", "(good)",
+]
+
+
+@pytest.fixture(scope="module")
+def analyzers(tmp_path_factory):
+    try:
+        sia = SentimentIntensityAnalyzer()
+    except LookupError:
+        pytest.skip("NLTK vader_lexicon is not installed")
+    # Compile from the same lexicon NLTK uses, whatever version is installed
+    path = compile_index(nltk_data.load(NLTK_LEXICON), str(tmp_path_factory.mktemp("vader") / "vader_index.bin"))
+    return sia, FastVader(path)
+
+
+def test_tokenizer_matches_sentitext(analyzers):
+    constants = VaderConstants()
+    for text in GOLDEN:
+        expected = SentiText(text, constants.PUNC_LIST, constants.REGEX_REMOVE_PUNCTUATION).words_and_emoticons
+        assert FastVader.tokenize(text) == expected, text
+
+
+def test_compound_matches_nltk_on_golden_set(analyzers):
+    sia, fast = analyzers
+    texts = GOLDEN + pd.read_csv(os.path.join(ROOT, "training_data", "reviews_with_vader.csv"))["text"] \
+        .dropna().astype(str).head(2000).tolist()
+    assert fast.score_batch(texts) == [sia.polarity_scores(t)["compound"] for t in texts]
+
+
+def test_shipped_index_loads():
+    fast = FastVader()
+    assert fast.version.startswith("fast-vader-")
+    assert fast.polarity_compound("great") > 0 > fast.polarity_compound("terrible")
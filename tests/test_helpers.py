@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from helpers import iter_json_array, iter_records
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 7, 1 << 16])
+def test_numbers_are_not_split_at_block_boundaries(tmp_path, block_size):
+    path = write(tmp_path, "a.json", "[1234, 5678]")
+    assert list(iter_json_array(path, block_size=block_size)) == [1234, 5678]
+
+
+@pytest.mark.parametrize("block_size", [2, 5, 64])
+def test_objects_round_trip(tmp_path, block_size):
+    data = [{"text": "x" * (i * 7 % 40) + "]}", "rating": i} for i in range(50)] + [True, None, "s", 1.5]
+    path = write(tmp_path, "a.json", json.dumps(data, indent=2))
+    assert list(iter_json_array(path, block_size=block_size)) == data
+
+
+def test_long_leading_whitespace(tmp_path):
+    path = write(tmp_path, "a.json", " " * 5000 + "\n[{\"a\": 1}]")
+    assert list(iter_json_array(path, block_size=16)) == [{"a": 1}]
+    assert list(iter_records(path)) == [{"a": 1}]
+
+
+def test_empty_array_and_unterminated_array(tmp_path):
+    assert list(iter_json_array(write(tmp_path, "a.json", "[ ]"))) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path, "b.json", "[1, 2")))
+
+
+def test_json_lines_with_json_extension(tmp_path):
+    path = write(tmp_path, "a.json", '{"a": 1}\n\n{"a": 2}\n')
+    assert list(iter_records(path)) == [{"a": 1}, {"a": 2}]
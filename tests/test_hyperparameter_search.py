@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+
+import train_catboost
+from hyperparameter_search import sample_trials, successive_halving
+from train_catboost import load_training_data
+
+SPACE = {"learning_rate": [0.1, 0.3], "depth": [3, 4], "early_stopping_rounds": [10]}
+RUNGS = [(2, 10), (3, 20)]
+
+
+def test_grid_when_small_and_seeded_sample_otherwise():
+    assert len(sample_trials(SPACE, n_trials=10)) == 4
+    sample = sample_trials(SPACE, n_trials=3, seed=1)
+    assert len(sample) == 3 and sample == sample_trials(SPACE, n_trials=3, seed=1)
+
+
+def test_only_the_best_trials_reach_the_full_folds(tmp_path, monkeypatch, small_training_file):
+    monkeypatch.setattr(train_catboost, "RUNS_FOLDER", str(tmp_path / "runs"))
+    data = load_training_data(small_training_file())
+    log_path = str(tmp_path / "search.jsonl")
+    best, records = successive_halving(data, sample_trials(SPACE), rungs=RUNGS, eta=2, n_folds=3, n_workers=2,
+                                       thread_count=1, log_path=log_path, dataset_folder=None)
+
+    first, last = [r for r in records if r["rung"] == 0], [r for r in records if r["rung"] == 1]
+    assert len(first) == 4 and len(last) == 2
+    assert {r["trial"] for r in last} == {r["trial"] for r in sorted(first, key=lambda r: -r["oof_ap"])[:2]}
+    assert best["folds"] == 3 and best["params"]["iterations"] == 20
+    assert best["oof_ap"] == max(r["oof_ap"] for r in last)
+
+    with open(log_path, encoding="utf-8") as f:
+        logged = [json.loads(line) for line in f]
+    assert len(logged) == 6
+    assert all(r["run_dir"].startswith(str(tmp_path)) for r in logged)
+    assert all(np.isfinite([r["oof_ap"], r["oof_auc"], r["train_s"], r["wall_s"]]).all() for r in logged)
@@ -0,0 +1,109 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental import ResultsStore, run_incremental
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def reviews():
+    with open(os.path.join(ROOT, "input", "test.json"), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_feed(path, records, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+
+
+def test_runs_score_only_the_new_reviews(tmp_path, reviews):
+    feed, store = str(tmp_path / "feed.json"), str(tmp_path / "store")
+    write_feed(feed, reviews[:6])
+    first = run_incremental(feed, store, chunk_size=4)
+    assert (first["new"], first["skipped"], first["reviews"]) == (6, 0, 6)
+
+    assert run_incremental(feed, store)["new"] == 0
+
+    write_feed(feed, reviews[6:], mode="a")
+    second = run_incremental(feed, store, chunk_size=4)
+    assert (second["new"], second["skipped"], second["reviews"]) == (len(reviews) - 6, 0, len(reviews))
+
+    # Same probabilities as the notebook run over the whole file
+    with ResultsStore(store) as s:
+        result = s.load().sort_values("time").reset_index(drop=True)
+    expected = pd.read_csv(os.path.join(ROOT, "data", "test_standardized_results.csv"))
+    expected = expected.sort_values("time").reset_index(drop=True)
+    assert np.allclose(result["probability"], expected["probability"])
+    assert result["decision"].sum() == second["spam"]
+
+
+def test_edited_review_replaces_its_result(tmp_path, reviews):
+    feed, store = str(tmp_path / "feed.json"), str(tmp_path / "store")
+    write_feed(feed, reviews)
+    run_incremental(feed, store)
+
+    edited = dict(reviews[0], text="Terrible place, never again. Dirty and rude staff.")
+    write_feed(feed, [edited], mode="a")
+    run = run_incremental(feed, store)
+    assert (run["new"], run["changed"], run["reviews"]) == (0, 1, len(reviews))
+
+    with ResultsStore(store) as s:
+        texts = s.load()["text"].tolist()
+    assert edited["text"] in texts and reviews[0]["text"] not in texts
+
+
+def test_full_scan_skips_seen_records(tmp_path, reviews):
+    feed, store = str(tmp_path / "feed.json"), str(tmp_path / "store")
+    write_feed(feed, reviews)
+    run_incremental(feed, store)
+    run = run_incremental(feed, store, full_scan=True)
+    assert (run["new"], run["skipped"]) == (0, len(reviews))
+
+
+def test_partial_last_line_waits_for_the_next_run(tmp_path, reviews):
+    feed, store = str(tmp_path / "feed.json"), str(tmp_path / "store")
+    write_feed(feed, reviews[:3])
+    with open(feed, "a", encoding="utf-8") as f:
+        f.write(json.dumps(reviews[3])[:20])
+    assert run_incremental(feed, store)["new"] == 3
+
+    with open(feed, "a", encoding="utf-8") as f:
+        f.write(json.dumps(reviews[3])[20:] + "\n")
+    assert run_incremental(feed, store)["new"] == 1
+
+
+class FlakyTransport:
+    # Answers every batch with the standardized reviews wrapped in it, and fails the batches holding a failing text
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    async def __call__(self, prompt):
+        items, _ = json.JSONDecoder().raw_decode(prompt[prompt.index("["):])
+        records = [json.loads(item)["payload"] for item in items]
+        if any(r["text"] in self.failing for r in records):
+            raise RuntimeError("API error")
+        return json.dumps(records)
+
+
+def test_failed_gpt_batch_is_retried_on_the_next_run(tmp_path, reviews):
+    from ucsd_json_standardization import standardize_review
+
+    # Wrapped so the schema cannot map them and every record goes to GPT
+    wrapped = [{"payload": standardize_review(r)} for r in reviews]
+    feed, store = str(tmp_path / "feed.json"), str(tmp_path / "store")
+    write_feed(feed, wrapped)
+
+    # One GPT request per chunk of 5, the second one fails
+    failing = FlakyTransport(failing=[wrapped[7]["payload"]["text"]])
+    first = run_incremental(feed, store, chunk_size=5, transport=failing)
+    assert (first["new"], first["failed"], first["reviews"]) == (5, 5, 5)
+
+    second = run_incremental(feed, store, chunk_size=5, transport=FlakyTransport())
+    assert (second["new"], second["failed"], second["skipped"], second["reviews"]) == (5, 0, 0, len(reviews))
+    assert run_incremental(feed, store, transport=FlakyTransport())["new"] == 0
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from inference import (EXECUTION_MODES, adaptive_predict, build_pool, ensemble_predict, load_fold_models, load_metadata,
+                       run_inference)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def folds():
+    feature_order, cat_features, text_features, _ = load_metadata()
+    df = pd.read_csv(os.path.join(ROOT, "data", "test_standardized_final.csv"))
+    return load_fold_models(), build_pool(df, feature_order, cat_features, text_features)
+
+
+@pytest.mark.parametrize("mode", EXECUTION_MODES)
+def test_every_mode_matches_serial(folds, mode):
+    models, pool = folds
+    reference = ensemble_predict(models, pool)
+    assert np.allclose(ensemble_predict(models, pool, mode, n_workers=2, thread_count=1), reference)
+
+
+def test_catboost_native_honours_thread_count(folds, monkeypatch):
+    models, pool = folds
+    seen = []
+    model_type = type(models[0])
+    original = model_type.predict_proba
+    monkeypatch.setattr(model_type, "predict_proba",
+                        lambda self, data, **kw: seen.append(kw["thread_count"]) or original(self, data, **kw))
+    ensemble_predict(models, pool, "catboost-native", thread_count=3)
+    assert seen == [3] * len(models)
+
+
+def test_bound_exit_keeps_every_decision(folds):
+    models, pool = folds
+    threshold = 0.3
+    probabilities, folds_used = adaptive_predict(models, pool, threshold, "bound")
+    np.testing.assert_array_equal(probabilities >= threshold, ensemble_predict(models, pool) >= threshold)
+    assert folds_used.min() >= 2 and folds_used.max() <= len(models)
+
+
+def test_margin_exit_is_the_full_ensemble_when_nothing_settles(folds):
+    models, pool = folds
+    probabilities, folds_used = adaptive_predict(models, pool, 0.5, "margin", margin=1.0)
+    assert np.allclose(probabilities, ensemble_predict(models, pool))
+    assert (folds_used == len(models)).all()
+
+
+def test_settled_rows_skip_the_remaining_folds(folds):
+    models, pool = folds
+    probabilities, folds_used = adaptive_predict(models, pool, 0.5, "margin", margin=0.0, min_folds=1)
+    assert (folds_used == 1).all()
+    assert np.allclose(probabilities, models[0].predict_proba(pool)[:, 1])
+
+
+def test_early_exit_rejects_execution_mode():
+    with pytest.raises(ValueError):
+        run_inference("test_standardized", execution_mode="threads", early_exit="margin")
+
+
+def test_fused_rejects_execution_mode():
+    with pytest.raises(ValueError):
+        run_inference("test_standardized", use_fused=True, execution_mode="threads")
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import instrumentation
+from instrumentation import Recorder, timed
+
+
+@pytest.fixture
+def recorder():
+    recorder = Recorder(verbose=False)
+    previous = instrumentation.set_recorder(recorder)
+    yield recorder
+    instrumentation.set_recorder(previous)
+
+
+def test_stage_records_time_memory_and_rows(recorder):
+    with instrumentation.stage("load", rows_in=100) as t:
+        data = bytearray(50 * 1024 * 1024)
+        time.sleep(0.01)
+        t.rows_out = 80
+    del data
+
+    (record,) = recorder.stages
+    assert record["stage"] == "load" and record["wall_s"] >= 0.01
+    assert record["peak_rss_mb"] >= 50
+    assert record["rows_per_s"] == pytest.approx(80 / record["wall_s"])
+
+
+def test_nested_stages_keep_the_outer_peak(recorder):
+    with instrumentation.stage("outer"):
+        with instrumentation.stage("outer.big"):
+            data = bytearray(80 * 1024 * 1024)
+            del data
+        with instrumentation.stage("outer.small"):
+            pass
+    peaks = {r["stage"]: r["peak_rss_mb"] for r in recorder.stages}
+    assert peaks["outer"] >= peaks["outer.big"] >= peaks["outer.small"] + 50
+
+
+def test_timed_counts_returned_rows_and_aggregates(recorder):
+    @timed("stage")
+    def run(n):
+        return pd.DataFrame({"x": range(n)}), "path"
+
+    run(3)
+    run(4)
+    report = recorder.report()["stages"]["stage"]
+    assert report["calls"] == 2 and report["rows_out"] == 7
+
+
+def test_reports(recorder, tmp_path):
+    with instrumentation.stage("inference.predict", rows_in=10):
+        pass
+    json_path, prom_path = recorder.write_report(str(tmp_path / "run"))
+
+    with open(json_path) as f:
+        assert json.load(f)["stages"]["inference.predict"]["rows_in"] == 10
+    with open(prom_path) as f:
+        prom = f.read()
+    assert "# TYPE review_pipeline_stage_wall_seconds_total counter" in prom
+    assert 'review_pipeline_stage_rows_in_total{stage="inference.predict"} 10' in prom
+
+
+def test_cprofile_capture(tmp_path):
+    recorder = Recorder(verbose=False, profile="cprofile", profile_dir=str(tmp_path))
+    with recorder.stage("vader"):
+        sum(range(1000))
+    assert os.path.exists(tmp_path / "vader.prof")
+
+
+def test_calls_are_capped_but_totals_kept():
+    recorder = Recorder(verbose=False, max_calls=3)
+    for _ in range(5):
+        with recorder.stage("score", rows_in=10):
+            pass
+    assert len(recorder.stages) == 3
+    assert recorder.report()["stages"]["score"]["calls"] == 5
+    assert recorder.report()["stages"]["score"]["rows_in"] == 50
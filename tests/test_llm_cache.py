@@ -0,0 +1,84 @@
+import pytest
+
+from llm_cache import LLMCache, complete_by_review, complete_records
+from llm_client import HTTPTransport, StubLLMServer
+from parse_file import gpt_extract_records
+
+
+class FakeLLM:
+    # One {"text": review} per review, or a bad answer for reviews containing "merge"
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, batches):
+        self.sent.extend(batches)
+        return [[{"text": r} for r in batch] if not any("merge" in r for r in batch) else [{"text": "merged"}]
+                for batch in batches]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with LLMCache(str(tmp_path / "llm.sqlite")) as cache:
+        yield cache
+
+
+def test_only_misses_are_sent_and_order_is_kept(cache):
+    llm = FakeLLM()
+    assert complete_records(["a", "b", "c"], 2, llm, cache, "m", "v1") == [{"text": t} for t in "abc"]
+    assert llm.sent == [["a", "b"], ["c"]]
+
+    llm.sent = []
+    records = complete_records(["d", "b", "  a ", "d", "c", "e"], 2, llm, cache, "m", "v1")
+    assert [r["text"] for r in records] == ["d", "b", "a", "d", "c", "e"]
+    assert llm.sent == [["d", "e"]]  # "  a " normalizes to "a", the second "d" is sent once
+    assert cache.stats["hits"] == 3 and cache.stats["misses"] == 6
+    assert cache.hit_rate() == pytest.approx(3 / 9)
+
+
+def test_model_and_prompt_version_are_part_of_the_key(cache):
+    llm = FakeLLM()
+    complete_records(["a"], 10, llm, cache, "m", "v1")
+    complete_records(["a"], 10, llm, cache, "m", "v2")
+    complete_records(["a"], 10, llm, cache, "other", "v1")
+    assert len(llm.sent) == 3
+
+
+def test_unmatched_answers_pass_through_uncached(cache):
+    llm = FakeLLM()
+    records = complete_records(["a", "merge b", "c"], 2, llm, cache, "m", "v1")
+    assert records == [{"text": "merged"}, {"text": "c"}]
+    assert cache.stats["uncached"] == 2
+
+    llm.sent = []
+    complete_records(["a", "merge b", "c"], 2, llm, cache, "m", "v1")
+    assert llm.sent == [["a", "merge b"]]
+
+
+def test_failed_batches_are_none_per_review(cache):
+    def llm(batches):
+        return [None if "b" in batch else [{"text": r} for r in batch] for batch in batches]
+
+    assert complete_by_review(["a", "b", "c", "a"], 1, llm, cache, "m", "v1") == [
+        [{"text": "a"}], None, [{"text": "c"}], [{"text": "a"}]]
+    assert complete_by_review(["a", "b", "c"], 2, llm) == [None, None, [{"text": "c"}]]
+
+
+def test_least_recently_used_rows_are_evicted(tmp_path):
+    llm = FakeLLM()
+    with LLMCache(str(tmp_path / "llm.sqlite"), max_rows=2) as cache:
+        for review in "abc":
+            complete_records([review], 10, llm, cache, "m", "v1")
+        llm.sent = []
+        complete_records(["a", "b", "c"], 10, llm, cache, "m", "v1")
+        assert llm.sent == [["a"]]
+
+
+def test_rerun_through_the_api_is_free(cache):
+    reviews = [f"Review number {i}, the food was fine" for i in range(25)]
+    with StubLLMServer() as stub:
+        transport = HTTPTransport(stub.url)
+        first = gpt_extract_records(reviews, 10, transport=transport, cache=cache)
+        requests = stub.requests
+        second = gpt_extract_records(reviews, 10, transport=transport, cache=cache)
+    assert requests == 3 and stub.requests == 3
+    assert second == first and [r["text"] for r in first] == reviews
@@ -0,0 +1,56 @@
+import json
+import time
+import asyncio
+
+import pytest
+
+from llm_client import AsyncLLMClient, HTTPTransport, StubLLMServer, TokenBucket
+
+
+def test_results_come_back_in_order_with_retries():
+    prompts = [f"Review:\n{json.dumps([json.dumps({'text': f'review {i}'})])}" for i in range(20)]
+    with StubLLMServer(latency=0.01, fail_every=4) as stub:
+        llm = AsyncLLMClient(HTTPTransport(stub.url), concurrency=5, backoff_base=0.01)
+        outputs = llm.run(prompts)
+
+    assert [json.loads(o)[0]["text"] for o in outputs] == [f"review {i}" for i in range(20)]
+    assert llm.stats["retries"] >= 5 and llm.stats["failures"] == 0
+
+
+def test_permanent_failure_is_returned_in_place():
+    async def transport(prompt):
+        if prompt == "bad":
+            raise ValueError("not retried")
+        return prompt.upper()
+
+    llm = AsyncLLMClient(transport, concurrency=2)
+    outputs = llm.run(["a", "bad", "c"])
+    assert outputs[0] == "A" and outputs[2] == "C"
+    assert isinstance(outputs[1], ValueError)
+    assert llm.stats["retries"] == 0
+
+
+def test_concurrency_overlaps_requests():
+    with StubLLMServer(latency=0.1) as stub:
+        start = time.perf_counter()
+        AsyncLLMClient(HTTPTransport(stub.url), concurrency=8).run(["[]"] * 8)
+        assert time.perf_counter() - start < 0.5
+
+
+def test_token_bucket_paces_requests():
+    async def take(n):
+        bucket = TokenBucket(rate=50, capacity=1)
+        for _ in range(n):
+            await bucket.acquire()
+
+    start = time.perf_counter()
+    asyncio.run(take(11))
+    assert time.perf_counter() - start == pytest.approx(0.2, abs=0.1)
+
+
+def test_gpt_extract_batches_through_stub():
+    parse_file = pytest.importorskip("parse_file")
+    batches = [[json.dumps({"user_name": f"u{i}", "text": "ok"}) for i in range(j, j + 3)] for j in range(0, 9, 3)]
+    with StubLLMServer() as stub:
+        results = parse_file.gpt_extract_batches(batches, concurrency=3, transport=HTTPTransport(stub.url))
+    assert [r["user_name"] for batch in results for r in batch] == [f"u{i}" for i in range(9)]
@@ -0,0 +1,46 @@
+import os
+import sys
+import subprocess
+
+import pandas as pd
+import pytest
+
+import Main
+import inference
+import storage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["pandas", "numpy", "catboost", "sklearn", "nltk", "openai"]
+
+
+def imported_after(code):
+    # Runs code in a fresh interpreter and returns the heavy packages it imported
+    script = f"import sys; sys.path.insert(0, 'src'); {code}; print(' '.join(m for m in {HEAVY} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def test_help_imports_nothing_heavy():
+    assert imported_after("import Main; Main.build_parser().format_help()") == []
+
+
+def test_llm_modules_import_without_openai():
+    assert "openai" not in imported_after("import parse_file, pseudo_labelling")
+
+
+def test_options_match_the_step_modules():
+    assert Main.FORMATS == list(storage.FORMATS)
+    assert Main.EXECUTION_MODES == inference.EXECUTION_MODES
+    assert Main.EARLY_EXIT_RULES == inference.EARLY_EXIT_RULES
+
+
+def test_score_subcommand(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference, "OUTPUT_FOLDER", str(tmp_path))
+    assert Main.cli(["score", "test_standardized", "--no-cache"]) == 0
+    result = pd.read_csv(tmp_path / "test_standardized_results.csv")
+    assert list(result.columns) == inference.KEEP_COLS and len(result) == 10
+
+
+def test_unknown_subcommand_exits():
+    with pytest.raises(SystemExit):
+        Main.cli(["train"])
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from merging_metadata import merge_with_metadata
+from metadata_index import MetadataIndex
+
+META = [
+    {"name": "Top Coin Laundry", "gmap_id": "0x1:0xa", "category": ["Laundromat"]},
+    {"name": "Urban Kitchen", "gmap_id": "0x2:0xb", "hours": [["Monday", "9AM-5PM"]]},
+    {"name": "Urban Kitchen (new)", "gmap_id": "0x2:0xb"},
+    {"name": "No id"},
+]
+REVIEWS = [
+    {"user_id": "1", "text": "Clean", "gmap_id": "0x1:0xa", "business_name": None},
+    {"user_id": "2", "text": "Tasty ñ", "gmap_id": "0x2:0xb", "business_name": "old"},
+    {"user_id": "3", "text": None, "gmap_id": "0x9:0xz", "business_name": "gone"},
+    {"user_id": "4", "text": "No place"},
+]
+
+
+@pytest.fixture
+def files(tmp_path):
+    meta = tmp_path / "meta-Test.json"
+    meta.write_text("\n".join(json.dumps(m) for m in META) + "\n", encoding="utf-8")
+    reviews = tmp_path / "review-Test_standardized.json"
+    reviews.write_text(json.dumps(REVIEWS, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(reviews), str(meta), str(tmp_path / "review-Test_meta.json")
+
+
+def old_merge(reviews, metadata):
+    metadata_map = {m["gmap_id"]: m for m in metadata if "gmap_id" in m}
+    for review in reviews:
+        gmap_id = review.get("gmap_id")
+        review["business_name"] = metadata_map[gmap_id].get("name") if gmap_id in metadata_map else None
+    return json.dumps(reviews, ensure_ascii=False, indent=2)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_output_matches_in_memory_merge(files, chunk_size):
+    reviews, meta, output = files
+    merge_with_metadata(reviews, meta, output, chunk_size=chunk_size)
+    with open(output, encoding="utf-8") as f:
+        assert f.read() == old_merge(json.loads(json.dumps(REVIEWS)), META)
+
+
+def test_empty_reviews(files, tmp_path):
+    _, meta, output = files
+    empty = tmp_path / "empty.json"
+    empty.write_text("[]", encoding="utf-8")
+    merge_with_metadata(str(empty), meta, output)
+    with open(output, encoding="utf-8") as f:
+        assert json.load(f) == []
+
+
+def test_index_is_reused_until_the_metadata_changes(files):
+    _, meta, _ = files
+    with MetadataIndex(meta) as index:
+        assert index.built and len(index) == 2
+        assert index.lookup(["0x2:0xb", "0x9:0xz"]) == {"0x2:0xb": {"name": "Urban Kitchen (new)"}}
+    with MetadataIndex(meta) as index:
+        assert not index.built
+    with MetadataIndex(meta, columns=("name", "category")) as index:
+        assert index.built
+        assert json.loads(index.lookup(["0x1:0xa"])["0x1:0xa"]["category"]) == ["Laundromat"]
+
+    with open(meta, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"name": "Late", "gmap_id": "0x3:0xc"}) + "\n")
+    with MetadataIndex(meta, columns=("name", "category")) as index:
+        assert index.built and len(index) == 3
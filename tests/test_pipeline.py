@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from llm_client import HTTPTransport, StubLLMServer
+from pipeline import run_streaming_pipeline, standardize_chunk
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_chunked_run_matches_notebook_results(tmp_path):
+    output = str(tmp_path / "results.csv")
+    run_streaming_pipeline(os.path.join(ROOT, "input", "test.json"), chunk_size=3, output_path=output)
+
+    result = pd.read_csv(output)
+    expected = pd.read_csv(os.path.join(ROOT, "data", "test_standardized_results.csv"))
+    assert list(result.columns) == list(expected.columns)
+    assert np.allclose(result["probability"], expected["probability"])
+    assert (result["verdict"] == expected["verdict"]).all()
+
+
+def test_empty_input_writes_header_only(tmp_path):
+    source = tmp_path / "empty.json"
+    source.write_text("", encoding="utf-8")
+    output = str(tmp_path / "results.csv")
+    run_streaming_pipeline(str(source), output_path=output)
+
+    assert os.path.exists(output)
+    assert len(pd.read_csv(output)) == 0
+
+
+def test_gpt_records_keep_their_place_in_the_chunk():
+    records = ["A plain line of review", {"review": "Mapped one", "stars": 4},
+               {"other": "left for GPT"}, {"review": "Mapped two", "stars": 2}]
+    with StubLLMServer() as stub:
+        standardized = standardize_chunk(records, False, {"text": "review", "rating": "stars"},
+                                         transport=HTTPTransport(stub.url))
+    assert [r.get("text", r.get("other")) for r in standardized] == ["A plain line of review", "Mapped one",
+                                                                     "left for GPT", "Mapped two"]
+
+
+def test_each_chunk_is_preprocessed_once(tmp_path, monkeypatch):
+    import scoring_service
+    calls = []
+    real = scoring_service.preprocess_frame
+    monkeypatch.setattr(scoring_service, "preprocess_frame", lambda df: calls.append(len(df)) or real(df))
+    run_streaming_pipeline(os.path.join(ROOT, "input", "test.json"), chunk_size=4,
+                           output_path=str(tmp_path / "results.csv"))
+    assert calls == [4, 4, 2]
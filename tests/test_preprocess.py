@@ -0,0 +1,64 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import preprocess
+from inference import build_pool, ensemble_predict, load_fold_models, load_metadata
+from preprocess import preprocess_frame
+from storage import ChunkWriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def raw():
+    return pd.DataFrame({
+        "user_id": [109129804842686204152, None, 108233908345184666082, 109129804842686204152],
+        "gmap_id": ["0x1:0x2", None, "0x1:0x2", "unknown"],
+        "user_name": [None, None, None, None],
+        "text": ["Great stay", None, "Bad", "Fine"],
+        "rating": [5, 1, None, "4"],
+        "time": [1566331951619, 1503373018846, None, 1503373018847],
+        "rating_category": [None, None, None, None],
+    })
+
+
+def test_categorical_matches_the_string_columns():
+    strings = preprocess_frame(raw(), categorical=False)
+    categorical = preprocess_frame(raw())
+    assert "rating_category" not in categorical.columns
+    assert isinstance(categorical["gmap_id"].dtype, pd.CategoricalDtype)
+    assert categorical["gmap_id"].cat.categories.tolist() == ["0x1:0x2", "unknown"]
+    assert categorical.astype(str).equals(strings.astype(str))
+    assert categorical["rating"].tolist() == [5, 1, -999, 4]
+
+
+def test_categorical_frame_gives_the_same_predictions():
+    feature_order, cat_features, text_features, _ = load_metadata()
+    df = pd.read_csv(os.path.join(ROOT, "data", "test_standardized_final.csv"))
+    categorical = preprocess_frame(df.copy())
+    assert isinstance(categorical["user_id"].dtype, pd.CategoricalDtype)
+
+    models = load_fold_models()
+    expected = ensemble_predict(models, build_pool(df, feature_order, cat_features, text_features))
+    assert (ensemble_predict(models, build_pool(categorical, feature_order, cat_features, text_features))
+            == expected).all()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_chunked_mode_writes_the_same_output(tmp_path, monkeypatch, fmt):
+    monkeypatch.setattr(preprocess, "DATA_FOLDER", str(tmp_path))
+    shutil.copy(os.path.join(ROOT, "data", "test_standardized.csv"), tmp_path / "test.csv")
+
+    full, path = preprocess.preprocess_file("test", fmt=fmt)
+    whole = pd.read_csv(path) if fmt == "csv" else pd.read_parquet(path)
+    chunked, _ = preprocess.preprocess_file("test", fmt=fmt, chunk_size=3)
+    assert chunked is None
+    loaded = pd.read_csv(path) if fmt == "csv" else pd.read_parquet(path)
+    assert loaded.astype(str).equals(whole.astype(str)) and len(loaded) == len(full)
+
+
+def test_feather_cannot_be_chunked(tmp_path):
+    with pytest.raises(ValueError):
+        ChunkWriter(str(tmp_path / "out.feather"))
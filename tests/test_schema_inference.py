@@ -0,0 +1,84 @@
+import json
+
+from llm_client import HTTPTransport, StubLLMServer
+from schema_inference import apply_schema, infer_schema, parse_time, standardize_with_schema
+from ucsd_json_standardization import categories
+
+KAGGLE_STYLE = [
+    {"business_name": "Haci'nin Yeri", "author_name": "Gulsum Akar", "text": "We went to Marmaris for dinner.",
+     "photo": "dataset/taste/1.png", "rating": "5", "rating_category": "taste"},
+    {"business_name": "Haci'nin Yeri", "author_name": "Oguzhan Cetin", "text": "Quite a decent lunch spot.",
+     "photo": "dataset/menu/2.png", "rating": "3", "rating_category": "menu"},
+    {"business_name": "Haci'nin Yeri", "author_name": "Yasin Kuyu", "text": "",
+     "photo": "dataset/menu/3.png", "rating": "1", "rating_category": "menu"},
+    {"review": "Came in late, they still served us. Lovely people."},
+]
+
+
+def test_kaggle_columns_are_mapped():
+    mapping = infer_schema(KAGGLE_STYLE[:3])
+    assert mapping == {"business_name": "business_name", "user_name": "author_name", "text": "text",
+                       "rating": "rating", "rating_category": "rating_category"}
+
+    standardized, unmapped = standardize_with_schema(KAGGLE_STYLE, mapping)
+    assert list(standardized[0]) == categories
+    assert standardized[0]["rating"] == 5 and standardized[0]["sentiment_category"] == "positive"
+    assert standardized[1]["sentiment_category"] == "neutral" and standardized[1]["user_id"] is None
+    assert standardized[2]["text"] is None and standardized[2]["sentiment_category"] == "negative"
+    assert unmapped == [KAGGLE_STYLE[3]]  # none of the mapped keys, left for GPT
+
+
+def test_synonyms_need_matching_values():
+    records = [{"Review Text": "Lovely staff, great coffee", "Stars": "4.0", "Date": "2021-03-04",
+                "score": "very high", "Reviewer": "amy"}] * 5
+    mapping = infer_schema(records)
+    assert mapping["text"] == "Review Text" and mapping["rating"] == "Stars" and mapping["time"] == "Date"
+    assert mapping["user_name"] == "Reviewer"
+    entry = apply_schema(records[0], mapping)
+    assert entry["time"] == 1614816000000 and entry["rating"] == 4
+
+
+def test_text_found_without_a_known_header():
+    records = [{"id": "1", "blurb": "The pasta was cold and the waiter was rude"},
+               {"id": "2", "blurb": "Best pizza in town, will be back"}]
+    assert infer_schema(records)["text"] == "blurb"
+
+
+def test_unrecognised_input_maps_nothing():
+    assert infer_schema([{"a": 1, "b": 2}]) == {}
+    assert infer_schema(["free text line"]) == {}
+
+
+def test_parse_time():
+    assert parse_time(1566331951619) == 1566331951619
+    assert parse_time("1566331951") == 1566331951000
+    assert parse_time("yesterday") is None
+
+
+def test_parse_file_only_sends_unmapped_records_to_gpt(tmp_path):
+    from parse_file import parse_file
+
+    source = tmp_path / "reviews.jsonl"
+    source.write_text("\n".join(json.dumps(r) for r in KAGGLE_STYLE) + "\nA plain line of review text\n")
+
+    with StubLLMServer() as stub:
+        parsed = parse_file(str(source), None, transport=HTTPTransport(stub.url))
+        assert stub.requests == 1
+    assert len(parsed) == 5
+    # The stub echoes what it was sent
+    assert parsed[3] == KAGGLE_STYLE[3] and parsed[4] == {"text": "A plain line of review text"}
+
+
+def test_parse_file_keeps_the_input_order_of_mixed_records(tmp_path):
+    from parse_file import parse_file
+
+    lines = ["A first plain line of review", KAGGLE_STYLE[0], KAGGLE_STYLE[3], KAGGLE_STYLE[1],
+             "Another plain line of review", KAGGLE_STYLE[2]]
+    source = tmp_path / "reviews.jsonl"
+    source.write_text("\n".join(r if isinstance(r, str) else json.dumps(r) for r in lines) + "\n")
+
+    with StubLLMServer() as stub:
+        parsed = parse_file(str(source), None, transport=HTTPTransport(stub.url))
+    mapping = infer_schema(KAGGLE_STYLE[:3])
+    assert parsed == [{"text": lines[0]}, apply_schema(lines[1], mapping), KAGGLE_STYLE[3],
+                      apply_schema(lines[3], mapping), {"text": lines[4]}, apply_schema(lines[5], mapping)]
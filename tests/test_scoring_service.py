@@ -0,0 +1,45 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from inference import build_pool, ensemble_predict
+from scoring_service import ReviewScorer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    with ReviewScorer(max_wait_ms=5) as s:
+        yield s
+
+
+def test_empty_review_is_scored(scorer):
+    results = scorer.score([{}], timeout=20)
+    assert len(results) == 1
+    assert results[0]["verdict"] in ("likely spam", "likely ham")
+
+
+def test_batch_matches_direct_scoring():
+    with open(os.path.join(ROOT, "input", "test.json"), encoding="utf-8") as f:
+        reviews = [json.loads(line) for line in f]
+
+    # Batches of 3 reviews, scored against the whole file at once
+    with ReviewScorer(max_batch_size=3, max_wait_ms=5) as s:
+        results = s.score(reviews, timeout=20)
+        df = s.prepare(pd.DataFrame(reviews))
+        direct = ensemble_predict(s.models, build_pool(df, s.feature_order, s.cat_features, s.text_features))
+    assert s.stats.snapshot()["batches"] > 1
+    np.testing.assert_allclose([r["probability"] for r in results], direct)
+    assert [r["decision"] for r in results] == (direct >= s.best_threshold).astype(int).tolist()
+
+
+def test_short_result_fails_every_future(scorer, monkeypatch):
+    monkeypatch.setattr(scorer, "score_frame", lambda df: df.iloc[:0].assign(probability=0.5, decision=0, verdict="x"))
+    futures = [scorer.submit({"text": "a"}), scorer.submit({"text": "b"})]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=20)
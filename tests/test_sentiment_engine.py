@@ -0,0 +1,41 @@
+import sqlite3
+
+import numpy as np
+
+from sentiment_engine import SentimentEngine, vader_labels, _score_texts
+
+
+def test_matches_row_by_row_vader():
+    texts = ["Great food!", "Terrible service", "Great food!", "ok", None]
+    engine = SentimentEngine()
+    expected = _score_texts([str(t) for t in texts], backend="nltk")
+    assert np.array_equal(engine.score(texts), expected)
+    assert engine.stats["unique"] == 4
+
+
+def test_labels():
+    assert list(vader_labels([0.5, 0.05, 0.0, -0.05, -0.5])) == ["positive", "positive", "neutral", "negative", "negative"]
+
+
+def test_disk_cache_is_bounded_and_reused(tmp_path):
+    path = str(tmp_path / "vader.sqlite")
+    engine = SentimentEngine(cache_path=path, disk_cache_size=3)
+    engine.score(["a good day", "a bad day", "fine", "awful", "lovely"])
+    engine.close()
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM vader_scores").fetchone()[0] == 3
+
+    engine = SentimentEngine(cache_path=path, disk_cache_size=3)
+    engine.score(["lovely", "awful"])
+    assert engine.stats["disk_hits"] == 2
+
+
+def test_version_is_part_of_the_key(tmp_path):
+    path = str(tmp_path / "vader.sqlite")
+    engine = SentimentEngine(cache_path=path)
+    engine.score(["lovely"])
+    engine.close()
+
+    engine = SentimentEngine(cache_path=path)
+    engine.version = "another-lexicon"
+    engine.score(["lovely"])
+    assert engine.stats["disk_hits"] == 0
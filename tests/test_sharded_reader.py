@@ -0,0 +1,55 @@
+import csv
+import json
+import os
+
+import pytest
+
+from schema_inference import standardize_with_schema
+from sharded_reader import detect_layout, read_sharded, shard_offsets
+from ucsd_json_standardization import standardize_review
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UCSD_FILE = os.path.join(ROOT, "input", "test.json")
+
+
+def test_offsets_end_on_newlines(tmp_path):
+    path = tmp_path / "lines.jsonl"
+    path.write_bytes(b"".join(b'{"text": "%d"}\n' % i for i in range(100)))
+    offsets = shard_offsets(str(path), shard_bytes=50)
+    data = path.read_bytes()
+    assert offsets[0][0] == 0 and offsets[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(offsets, offsets[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in offsets)
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_ucsd_shards_match_serial_read(n_workers):
+    with open(UCSD_FILE, encoding="utf-8") as f:
+        expected = [standardize_review(json.loads(line)) for line in f if line.strip()]
+    standardized, unmapped = read_sharded(UCSD_FILE, n_workers=n_workers, shard_bytes=500)
+    assert standardized == expected and unmapped == []
+
+
+def test_csv_shards_match_serial_read(tmp_path):
+    rows = [{"author_name": f"user {i}", "review_text": f"Nice place number {i}", "stars": str(i % 5 + 1)}
+            for i in range(200)]
+    path = tmp_path / "reviews.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    assert detect_layout(str(path))["kind"] == "csv"
+    standardized, unmapped = read_sharded(str(path), n_workers=2, shard_bytes=256)
+    assert standardized == standardize_with_schema(rows)[0] and unmapped == []
+
+
+def test_multiline_csv_falls_back_to_serial(tmp_path):
+    path = tmp_path / "reviews.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["user_name", "text"])
+        for i in range(50):
+            writer.writerow([f"user {i}", f"line one of {i}\nline two, with a comma"])
+    standardized, _ = read_sharded(str(path), n_workers=1, shard_bytes=64)
+    assert [r["user_name"] for r in standardized] == [f"user {i}" for i in range(50)]
@@ -0,0 +1,77 @@
+import os
+
+import pandas as pd
+import pytest
+
+import preprocess
+from stage_cache import StageCache
+
+
+@pytest.fixture
+def data_folder(tmp_path, monkeypatch):
+    folder = tmp_path / "data"
+    folder.mkdir()
+    pd.DataFrame({
+        "user_id": ["1", "2"], "gmap_id": ["0x1:0x2", None], "text": ["Great stay", "Awful"],
+        "rating": [5, 1], "time": [1566331951619, 1503373018846],
+    }).to_csv(folder / "test_standardized.csv", index=False)
+    monkeypatch.setattr(preprocess, "DATA_FOLDER", str(folder))
+    return folder
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with StageCache(str(tmp_path / "cache")) as cache:
+        yield cache
+
+
+def test_rerun_restores_the_output(data_folder, cache, monkeypatch):
+    first, path = preprocess.preprocess_file("test_standardized", cache=cache)
+    os.remove(path)
+
+    monkeypatch.setattr(preprocess, "preprocess_frame", lambda df: pytest.fail("stage ran on a cache hit"))
+    second, again = preprocess.preprocess_file("test_standardized", cache=cache)
+    assert again == path and os.path.exists(path)
+    assert second.astype(str).equals(pd.read_csv(path).astype(str))
+    assert cache.stats == {"preprocess": {"hits": 1, "misses": 1}}
+
+
+def test_changed_input_or_config_misses(data_folder, cache):
+    preprocess.preprocess_file("test_standardized", cache=cache)
+    preprocess.preprocess_file("test_standardized", fmt="parquet", cache=cache)
+
+    with open(data_folder / "test_standardized.csv", "a", encoding="utf-8") as f:
+        f.write("3,0x9:0x9,Fine,3,1503373018900\n")
+    df, _ = preprocess.preprocess_file("test_standardized", cache=cache)
+    assert len(df) == 3
+    assert cache.stats["preprocess"] == {"hits": 0, "misses": 3}
+
+
+def test_key_covers_code_and_artifacts(tmp_path, cache):
+    model = tmp_path / "model"
+    model.mkdir()
+    (model / "fold_1.cbm").write_bytes(b"v1")
+    key = cache.key("inference", code=["inference"], artifacts=[str(model)])
+    assert key != cache.key("inference", code=["inference", "storage"], artifacts=[str(model)])
+
+    (model / "fold_1.cbm").write_bytes(b"v2")
+    assert key != cache.key("inference", code=["inference"], artifacts=[str(model)])
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    outputs = []
+    for name in "abc":
+        path = tmp_path / f"{name}.csv"
+        path.write_bytes(b"x" * 100)
+        outputs.append(str(path))
+
+    with StageCache(str(tmp_path / "cache"), max_bytes=250) as cache:
+        cache.store("s", "a" * 32, [outputs[0]])
+        cache.store("s", "b" * 32, [outputs[1]])
+        assert cache.restore("s", "a" * 32, [outputs[0]])  # a is now more recent than b
+        cache.store("s", "c" * 32, [outputs[2]])
+
+        assert cache.size() == 200
+        assert not cache.restore("s", "b" * 32, [outputs[1]])
+        assert cache.restore("s", "a" * 32, [outputs[0]])
+        assert not cache.store("s", "d" * 32, outputs)  # bigger than the whole cache
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from preprocess import preprocess_frame
+from storage import FORMATS, artifact_path, load_frame, save_frame
+
+
+@pytest.fixture
+def frame():
+    return preprocess_frame(pd.DataFrame({
+        "user_id": [109129804842686204152, None, 108233908345184666082],
+        "gmap_id": ["0x1:0x2", "0x1:0x2", None],
+        "text": ["Great stay", None, "Bad, \"really\" bad\nnever again"],
+        "rating": [5, 1, None],
+        "time": [1566331951619, 1503373018846, 1503373018847],
+        "vader_category": ["positive", "neutral", "negative"],
+    }))
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_round_trip(tmp_path, frame, fmt):
+    path = save_frame(frame, artifact_path(str(tmp_path), "test_final", fmt))
+    assert path.endswith(FORMATS[fmt])
+    loaded = load_frame(path)
+    assert loaded.astype(str).equals(frame.astype(str))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_columnar_keeps_dtypes(tmp_path, frame, fmt):
+    loaded = load_frame(save_frame(frame, artifact_path(str(tmp_path), "test_final", fmt)))
+    assert isinstance(loaded["gmap_id"].dtype, pd.CategoricalDtype)
+    assert isinstance(loaded["vader_category"].dtype, pd.CategoricalDtype)
+    assert loaded["time"].dtype == "int64"
+    assert frame["vader_category"].dtype != "category"  # the caller's frame is not converted
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        artifact_path(str(tmp_path), "test_final", "xlsx")
@@ -0,0 +1,71 @@
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from catboost import CatBoostClassifier
+
+import text_features
+from inference import build_pool, load_metadata
+from text_features import (FEATURE_NAMES, TextFeatureCache, add_text_features, check_parity,
+                           compute_text_features, text_feature_matrix)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEXTS = ["Great food!", "Terrible service, never again!!!", "unknown", "Great food!", "Visit www.spam.example NOW",
+         ""]
+
+
+def test_cached_features_match_the_computed_ones(tmp_path):
+    expected = compute_text_features(TEXTS)
+    assert expected.shape == (len(TEXTS), len(FEATURE_NAMES)) and expected.dtype == np.float32
+
+    with TextFeatureCache(str(tmp_path)) as cache:
+        assert np.array_equal(text_feature_matrix(TEXTS, cache), expected)
+        assert cache.stats == {"hits": 0, "misses": 5}  # the repeated text is computed once
+        assert np.array_equal(text_feature_matrix(TEXTS, cache), expected)  # before the rows are merged
+
+    reopened = TextFeatureCache(str(tmp_path))
+    assert len(reopened) == 5
+    assert np.array_equal(text_feature_matrix(TEXTS, reopened), expected)
+    assert reopened.stats == {"hits": 5, "misses": 0}
+    assert check_parity(reopened, TEXTS) == 5
+
+
+def test_cache_of_another_version_is_ignored(tmp_path, monkeypatch):
+    with TextFeatureCache(str(tmp_path)) as cache:
+        text_feature_matrix(TEXTS, cache)
+    monkeypatch.setattr(text_features, "FEATURE_VERSION", "txt-test")
+    assert len(TextFeatureCache(str(tmp_path))) == 0
+
+
+def test_parity_check_catches_stale_rows():
+    cache = TextFeatureCache(folder=None)
+    text_feature_matrix(TEXTS, cache)
+    cache._merge_pending()
+    cache.rows[0, 0] += 1.0
+    with pytest.raises(ValueError):
+        check_parity(cache, TEXTS)
+
+
+def test_models_trained_on_dense_features_score_raw_frames():
+    df = pd.read_csv(os.path.join(ROOT, "data", "test_standardized_final.csv"))
+    feature_order = ["rating", "vader_score"] + FEATURE_NAMES
+    model = CatBoostClassifier(iterations=20, verbose=False, allow_writing_files=False)
+    model.fit(add_text_features(df)[feature_order], np.arange(len(df)) % 2)
+
+    cache = TextFeatureCache(folder=None)
+    pool = build_pool(df, feature_order, [], [], text_cache=cache)
+    assert cache.stats["misses"] == df["text"].nunique()
+    expected = model.predict_proba(add_text_features(df)[feature_order])
+    assert np.allclose(model.predict_proba(pool), expected)
+
+
+def test_models_of_another_feature_version_are_refused(tmp_path):
+    for name in ["features.pkl", "cat_features.pkl", "text_features.pkl", "threshold.pkl"]:
+        shutil.copy(os.path.join(ROOT, "model", name), tmp_path / name)
+    load_metadata(str(tmp_path))
+    joblib.dump("txt-0", tmp_path / text_features.VERSION_FILE)
+    with pytest.raises(RuntimeError):
+        load_metadata(str(tmp_path))
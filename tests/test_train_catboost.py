@@ -0,0 +1,100 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import train_catboost
+from train_catboost import dataset_path, fold_done, load_training_data, prepare_dataset, train, train_folds
+
+PARAMS = {"iterations": 20, "depth": 4, "early_stopping_rounds": 10}
+
+
+def test_string_columns_are_categorical(small_training_file):
+    data = load_training_data(small_training_file())
+    cats = [data["feature_cols"][i] for i in data["cat_features"]]
+    assert {"gmap_id", "user_name", "business_name", "vader_category"} <= set(cats)
+    assert "text" not in cats and "rating" not in cats
+    assert data["feature_cols"][data["text_features"][0]] == "text"
+
+
+def test_rerun_skips_checkpointed_folds(tmp_path, monkeypatch, small_training_file):
+    data = load_training_data(small_training_file())
+    run_dir = str(tmp_path / "run")
+    _, first, _ = train_folds(data, PARAMS, n_folds=3, run_dir=run_dir, folds=[2], verbose=0)
+    assert [r["fold"] for r in first] == [2] and fold_done(run_dir, 2) and not fold_done(run_dir, 1)
+
+    trained = []
+    real_train_fold = train_catboost.train_fold
+    monkeypatch.setattr(train_catboost, "train_fold", lambda fold, *a: trained.append(fold) or real_train_fold(fold, *a))
+    oof, results, _ = train_folds(data, PARAMS, n_folds=3, run_dir=run_dir, verbose=0)
+    assert trained == [1, 3]
+    assert [r["fold"] for r in results] == [1, 2, 3]
+    assert not np.isnan(oof).any()
+    np.testing.assert_array_equal(results[1]["val_preds"], first[0]["val_preds"])
+
+
+def test_process_pool_matches_serial_loop(tmp_path, small_training_file):
+    data = load_training_data(small_training_file())
+    serial, _, _ = train_folds(data, PARAMS, n_folds=3, run_dir=str(tmp_path / "serial"), thread_count=1, verbose=0)
+    parallel, results, _ = train_folds(data, PARAMS, n_folds=3, run_dir=str(tmp_path / "parallel"), n_workers=3,
+                                       thread_count=1, verbose=0)
+    np.testing.assert_allclose(parallel, serial, rtol=1e-6)
+    assert all(r["best_iteration"] >= 0 for r in results)
+
+
+def test_train_writes_models_and_metadata(tmp_path, small_training_file):
+    model_folder = str(tmp_path / "model")
+    summary = train(small_training_file(), model_folder, PARAMS, n_folds=3,
+                    run_dir=str(tmp_path / "run"), verbose=0)
+    assert sorted(f for f in os.listdir(model_folder) if f.endswith(".cbm")) == [f"fold_{i}.cbm" for i in (1, 2, 3)]
+    assert joblib.load(os.path.join(model_folder, "threshold.pkl")) == summary["best_threshold"]
+    assert 0.5 < summary["oof_auc"] <= 1.0
+    assert os.path.exists(tmp_path / "train_predictions.csv")
+
+
+def without_text(data):
+    # The layout of a DENSE_TEXT_FEATURES run, without computing the text features
+    X = data["X"].drop(columns=["text"])
+    cats = [data["feature_cols"][i] for i in data["cat_features"]]
+    return {**data, "X": X, "feature_cols": X.columns.tolist(), "text_features": [],
+            "cat_features": [i for i, col in enumerate(X.columns) if col in cats]}
+
+
+def test_quantized_pool_is_saved_once_and_sliced_by_fold(tmp_path, capsys, small_training_file):
+    data = without_text(load_training_data(small_training_file()))
+    folder = str(tmp_path / "datasets")
+    pool = prepare_dataset(data, folder)
+    assert pool.is_quantized() and pool.num_row() == len(data["y"])
+    assert os.listdir(folder) == [os.path.basename(dataset_path(data, folder))]
+
+    mtime = os.path.getmtime(dataset_path(data, folder))
+    assert prepare_dataset(data, folder).slice(np.arange(10)).num_row() == 10
+    assert os.path.getmtime(dataset_path(data, folder)) == mtime
+    assert "Reusing the quantized training pool" in capsys.readouterr().out
+
+    first, _, _ = train_folds(data, PARAMS, n_folds=3, run_dir=str(tmp_path / "a"), dataset_folder=folder, verbose=0)
+    again, _, _ = train_folds(data, PARAMS, n_folds=3, run_dir=str(tmp_path / "b"), dataset_folder=folder, verbose=0)
+    np.testing.assert_array_equal(first, again)
+
+
+def test_changed_csv_gets_a_new_dataset(small_training_file):
+    data = without_text(load_training_data(small_training_file()))
+    changed = without_text(load_training_data(small_training_file(n_rows=500)))
+    assert dataset_path(data) != dataset_path(changed)
+
+
+def test_quantization_params_reach_the_saved_pool(tmp_path, small_training_file):
+    data = without_text(load_training_data(small_training_file()))
+    folder = str(tmp_path / "datasets")
+    params = {"border_count": 16, "depth": 4}
+    assert dataset_path(data, folder, params) == dataset_path(data, folder, {"border_count": 16})
+    assert dataset_path(data, folder, params) != dataset_path(data, folder)
+
+    borders = {}
+    for name, run_params in (("default", None), ("16", params)):
+        path = str(tmp_path / f"borders_{name}.tsv")
+        prepare_dataset(data, folder, run_params).save_quantization_borders(path)
+        borders[name] = pd.read_csv(path, sep="\t", header=None).groupby(0).size().max()
+    assert len(os.listdir(folder)) == 2
+    assert borders["16"] == 16 < borders["default"]
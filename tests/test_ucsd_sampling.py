@@ -0,0 +1,46 @@
+import json
+import os
+import random
+from collections import Counter
+
+from ucsd_json_standardization import handle_ucsd_json, is_ucsd_format, reservoir_sample, sample_ucsd_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UCSD_FILE = os.path.join(ROOT, "input", "test.json")
+
+
+def test_reservoir_is_uniform():
+    counts = Counter()
+    rng = random.Random(0)
+    for _ in range(4000):
+        counts.update(reservoir_sample(range(100), 10, rng))
+    # Every item is expected 400 times
+    assert min(counts.values()) > 300 and max(counts.values()) < 500
+
+
+def test_reservoir_smaller_input():
+    assert reservoir_sample(range(3), 10, random.Random(0)) == [0, 1, 2]
+    assert reservoir_sample([], 10, random.Random(0)) == []
+
+
+def test_detection_reads_only_the_head(tmp_path):
+    source = tmp_path / "big.json"
+    lines = open(UCSD_FILE, encoding="utf-8").read().splitlines()
+    # Garbage after the peeked records does not matter for detection
+    source.write_text("\n".join(lines[:8] + ["not json"]), encoding="utf-8")
+    assert is_ucsd_format(str(source))
+
+    array = tmp_path / "array.json"
+    array.write_text(json.dumps([json.loads(line) for line in lines]), encoding="utf-8")
+    assert not is_ucsd_format(str(array))
+    assert sample_ucsd_file(str(array), 5, 1) is None
+
+
+def test_sample_is_seeded_and_standardized(tmp_path):
+    first = sample_ucsd_file(UCSD_FILE, 4, seed=7)
+    assert first == sample_ucsd_file(UCSD_FILE, 4, seed=7)
+    assert len(first) == 4 and all("gmap_id" in r for r in first)
+
+    output = handle_ucsd_json(UCSD_FILE, str(tmp_path / "out.json"), 1000, seed=7)
+    with open(output, encoding="utf-8") as f:
+        assert len(json.load(f)) == 10